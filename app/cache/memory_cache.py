@@ -0,0 +1,68 @@
+# app/cache/memory_cache.py
+from collections import OrderedDict
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+# Returned by LRUCache.get when a key is absent
+MISSING = object()
+
+class LRUCache:
+    """
+    Size-bounded in-process cache with LRU eviction and per-entry TTL.
+    Expired entries are kept until evicted so callers can still fall back
+    to them (allow_stale) when the authoritative store is unreachable.
+    """
+
+    def __init__(self, max_size: int, ttl: float):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries: "OrderedDict[Hashable, Tuple[Any, float]]" = OrderedDict()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, allow_stale: bool = False) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISSING
+
+        value, expires_at = entry
+        if expires_at < time.monotonic():
+            if not allow_stale:
+                self.misses += 1
+                return MISSING
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -1,80 +1,108 @@
 # app/cache/redis_cache.py
-import redis
+import redis.asyncio as redis
+from redis.exceptions import AuthenticationError, RedisError
 import logging
+from typing import Dict, Iterable, List, Optional
 from ..core.config import settings
-import time
 
 class RedisCache:
-    """Redis cache implementation with robust connection handling and authentication"""
-    
-    def __init__(self):
-        self.connection_params = {
-            'host': 'localhost',
-            'port': 6379,
-            # 'password': 'Jordan297',
-            'decode_responses': True,
-            'socket_timeout': 5,
-            'retry_on_timeout': True,
-            'db': 0 
-        }
-        self.redis_client = None
-        self._connect()
+    """
+    Async Redis cache backed by a shared connection pool.
+    Connections are opened lazily by the pool on first use, and bulk
+    helpers use MGET and pipelining so diffing a whole catalog costs a
+    handful of round trips instead of several per product.
+    """
 
-    def _connect(self, max_retries=3):
-        """Establish connection to Redis with retries"""
-        for attempt in range(max_retries):
-            try:
-                self.redis_client = redis.Redis(**self.connection_params)
-                self.redis_client.ping()
-                logging.info("Successfully connected to Redis")
-                return
-            except redis.AuthenticationError as e:
-                logging.error(f"Redis authentication failed: {str(e)}")
-                raise
-            except redis.ConnectionError as e:
-                logging.warning(f"Redis connection attempt {attempt + 1} failed: {str(e)}")
-                if attempt < max_retries - 1:
-                    time.sleep(2 ** attempt)
-                continue
-            except Exception as e:
-                logging.error(f"Unexpected Redis error: {str(e)}")
-                raise
+    KEY_PREFIX = "product:price:"
 
-    async def ensure_connection(self):
-        """Ensure Redis connection is active"""
+    def __init__(
+        self,
+        url: str = settings.REDIS_URL,
+        max_connections: int = settings.REDIS_MAX_CONNECTIONS
+    ):
+        self.pool = redis.ConnectionPool.from_url(
+            url,
+            decode_responses=True,
+            socket_timeout=5,
+            socket_connect_timeout=5,
+            retry_on_timeout=True,
+            max_connections=max_connections
+        )
+        self.redis_client = redis.Redis(connection_pool=self.pool)
+
+    def _key(self, product_title: str) -> str:
+        return f"{self.KEY_PREFIX}{product_title}"
+
+    @staticmethod
+    def _chunks(items: List, size: int = settings.REDIS_BATCH_SIZE) -> Iterable[List]:
+        for start in range(0, len(items), size):
+            yield items[start:start + size]
+
+    async def ensure_connection(self) -> bool:
+        """Check that Redis is reachable"""
         try:
-            if self.redis_client is None or not self.redis_client.ping():
-                self._connect()
-        except Exception as e:
+            return await self.redis_client.ping()
+        except AuthenticationError as e:
+            logging.error(f"Redis authentication failed: {str(e)}")
+            raise
+        except RedisError as e:
             logging.error(f"Failed to ensure Redis connection: {str(e)}")
-            self.redis_client = None
+            return False
+
+    async def close(self) -> None:
+        await self.pool.disconnect()
 
-    async def get_product_price(self, product_title: str) -> float:
-        """Get cached product price with connection retry logic"""
-        await self.ensure_connection()
-        if not self.redis_client:
-            return None
-            
+    async def get_product_price(self, product_title: str) -> Optional[float]:
+        """Get cached product price"""
+        prices = await self.get_prices([product_title])
+        return prices.get(product_title)
+
+    async def set_product_price(
+        self,
+        product_title: str,
+        price: float,
+        ttl: int = settings.PRICE_CACHE_TTL
+    ) -> None:
+        """Set product price in cache"""
+        await self.set_prices({product_title: price}, ttl)
+
+    async def get_prices(self, product_titles: List[str]) -> Dict[str, Optional[float]]:
+        """Fetch cached prices for many products with MGET; missing titles map to None"""
         try:
-            key = f"product:price:{product_title}"
-            value = self.redis_client.get(key)
-            return float(value) if value else None
-        except Exception as e:
-            logging.error(f"Error getting price from Redis: {str(e)}")
-            return None
+            return await self.fetch_prices(product_titles)
+        except RedisError as e:
+            logging.error(f"Error getting prices from Redis: {str(e)}")
+            return {title: None for title in product_titles}
 
-    async def set_product_price(self, product_title: str, price: float) -> None:
-        """Set product price in cache with connection retry logic"""
-        await self.ensure_connection()
-        if not self.redis_client:
-            return
-            
+    async def set_prices(
+        self,
+        prices: Dict[str, float],
+        ttl: int = settings.PRICE_CACHE_TTL
+    ) -> None:
+        """Cache many prices in pipelined batches"""
         try:
-            key = f"product:price:{product_title}"
-            self.redis_client.setex(
-                key,
-                3600,  # 1 hour expiration
-                str(float(price))
-            )
-        except Exception as e:
-            logging.error(f"Error setting price in Redis: {str(e)}")
\ No newline at end of file
+            await self.store_prices(prices, ttl)
+        except RedisError as e:
+            logging.error(f"Error setting prices in Redis: {str(e)}")
+
+    async def fetch_prices(self, product_titles: List[str]) -> Dict[str, Optional[float]]:
+        """Like get_prices, but raises RedisError instead of hiding outages"""
+        prices: Dict[str, Optional[float]] = {}
+        titles = list(dict.fromkeys(product_titles))
+        for chunk in self._chunks(titles):
+            values = await self.redis_client.mget([self._key(title) for title in chunk])
+            for title, value in zip(chunk, values):
+                prices[title] = float(value) if value else None
+        return prices
+
+    async def store_prices(
+        self,
+        prices: Dict[str, float],
+        ttl: int = settings.PRICE_CACHE_TTL
+    ) -> None:
+        """Like set_prices, but raises RedisError instead of hiding outages"""
+        for chunk in self._chunks(list(prices.items())):
+            async with self.redis_client.pipeline(transaction=False) as pipe:
+                for title, price in chunk:
+                    pipe.setex(self._key(title), ttl, str(float(price)))
+                await pipe.execute()
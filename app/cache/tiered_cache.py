@@ -0,0 +1,136 @@
+# app/cache/tiered_cache.py
+import logging
+import time
+from typing import Dict, List, Optional, Tuple
+from redis.exceptions import RedisError
+from ..core.config import settings
+from .memory_cache import LRUCache, MISSING
+from .redis_cache import RedisCache
+
+class TieredPriceCache:
+    """
+    Two-tier price cache: an in-process LRU/TTL tier in front of Redis.
+    Reads are served from memory when possible and read through to Redis
+    otherwise. Writes land in memory first and are written behind to Redis;
+    while Redis is unreachable they stay queued and reads fall back to
+    (possibly expired) memory entries, so a Redis blip doesn't make every
+    product look changed.
+    """
+
+    def __init__(
+        self,
+        redis_cache: Optional[RedisCache] = None,
+        max_size: int = settings.MEMORY_CACHE_SIZE,
+        ttl: int = settings.MEMORY_CACHE_TTL,
+        retry_interval: float = settings.REDIS_RETRY_INTERVAL
+    ):
+        self.redis = redis_cache or RedisCache()
+        self.memory = LRUCache(max_size, ttl)
+        self.retry_interval = retry_interval
+        self.redis_errors = 0
+        self._retry_at = 0.0
+        # title -> (price, ttl) not yet written to Redis
+        self._pending: Dict[str, Tuple[float, int]] = {}
+
+    @property
+    def redis_available(self) -> bool:
+        return time.monotonic() >= self._retry_at
+
+    def _mark_unavailable(self, error: Exception) -> None:
+        self.redis_errors += 1
+        self._retry_at = time.monotonic() + self.retry_interval
+        logging.warning(
+            f"Redis unavailable ({str(error)}), serving prices from memory "
+            f"for the next {self.retry_interval}s"
+        )
+
+    async def ensure_connection(self) -> bool:
+        return await self.redis.ensure_connection()
+
+    async def close(self) -> None:
+        await self.flush()
+        await self.redis.close()
+
+    async def get_product_price(self, product_title: str) -> Optional[float]:
+        prices = await self.get_prices([product_title])
+        return prices.get(product_title)
+
+    async def set_product_price(
+        self,
+        product_title: str,
+        price: float,
+        ttl: int = settings.PRICE_CACHE_TTL
+    ) -> None:
+        await self.set_prices({product_title: price}, ttl)
+
+    async def get_prices(self, product_titles: List[str]) -> Dict[str, Optional[float]]:
+        """Read prices from memory, reading through to Redis for misses"""
+        prices: Dict[str, Optional[float]] = {}
+        misses = []
+        for title in dict.fromkeys(product_titles):
+            value = self.memory.get(title)
+            if value is MISSING:
+                misses.append(title)
+            else:
+                prices[title] = value
+
+        if not misses:
+            return prices
+
+        fetched = None
+        if self.redis_available:
+            try:
+                await self.flush()
+                fetched = await self.redis.fetch_prices(misses)
+            except RedisError as e:
+                self._mark_unavailable(e)
+
+        if fetched is not None:
+            for title, value in fetched.items():
+                if value is not None:
+                    self.memory.set(title, value)
+                prices[title] = value
+        else:
+            # Redis is down: an expired price beats treating the product as new
+            for title in misses:
+                value = self.memory.get(title, allow_stale=True)
+                prices[title] = None if value is MISSING else value
+
+        return prices
+
+    async def set_prices(
+        self,
+        prices: Dict[str, float],
+        ttl: int = settings.PRICE_CACHE_TTL
+    ) -> None:
+        """Update memory immediately and write behind to Redis"""
+        for title, price in prices.items():
+            self.memory.set(title, float(price))
+            self._pending[title] = (float(price), ttl)
+        await self.flush()
+
+    async def flush(self) -> None:
+        """Write queued prices to Redis if it is reachable"""
+        if not self._pending or not self.redis_available:
+            return
+
+        batch, self._pending = self._pending, {}
+        by_ttl: Dict[int, Dict[str, float]] = {}
+        for title, (price, ttl) in batch.items():
+            by_ttl.setdefault(ttl, {})[title] = price
+
+        try:
+            for ttl, prices in by_ttl.items():
+                await self.redis.store_prices(prices, ttl)
+        except RedisError as e:
+            self._mark_unavailable(e)
+            # Keep anything written to memory since, it is newer
+            for title, entry in batch.items():
+                self._pending.setdefault(title, entry)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            **self.memory.stats(),
+            "pending_writes": len(self._pending),
+            "redis_errors": self.redis_errors,
+        }
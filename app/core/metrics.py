@@ -0,0 +1,248 @@
+# app/core/metrics.py
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+import time
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+BYTES_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+class Metric:
+    """A named metric family with optional labels"""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, object]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def _labels(self, key: Tuple[str, ...], extra: Optional[Tuple[str, str]] = None) -> str:
+        pairs = list(zip(self.labelnames, key))
+        if extra:
+            pairs.append(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+    def samples(self) -> Iterator[str]:
+        return iter(())
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterator[str]:
+        for key, value in sorted(self._values.items()):
+            yield f"{self.name}{self._labels(key)} {_format_value(value)}"
+
+class Histogram(Metric):
+    """Fixed-bucket histogram; buckets are cumulated only when rendered"""
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts (last one is +Inf), sum, count]
+        self._values: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        entry[0][bisect_left(self.buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+    def count(self, **labels) -> int:
+        entry = self._values.get(self._key(labels))
+        return entry[2] if entry else 0
+
+    def samples(self) -> Iterator[str]:
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                yield f"{self.name}_bucket{self._labels(key, ('le', _format_value(bound)))} {cumulative}"
+            yield f"{self.name}_sum{self._labels(key)} {_format_value(total)}"
+            yield f"{self.name}_count{self._labels(key)} {count}"
+
+class MetricsRegistry:
+    """Holds metric families and renders them in the Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = LATENCY_BUCKETS
+    ) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+# Metrics are only updated from the event loop thread, so nothing here locks
+REGISTRY = MetricsRegistry()
+
+STAGE_SECONDS = REGISTRY.histogram(
+    "scraper_stage_duration_seconds", "Duration of each call of a crawl stage", ("stage",)
+)
+STAGE_BYTES = REGISTRY.histogram(
+    "scraper_stage_bytes", "Payload size handled by each call of a crawl stage", ("stage",), BYTES_BUCKETS
+)
+STAGE_ITEMS = REGISTRY.counter(
+    "scraper_stage_items_total", "Pages, products or images processed by each crawl stage", ("stage",)
+)
+STAGE_ERRORS = REGISTRY.counter(
+    "scraper_stage_errors_total", "Failed calls of each crawl stage", ("stage",)
+)
+HTTP_RESPONSES = REGISTRY.counter(
+    "scraper_http_responses_total", "Responses received from scraped sites by status code", ("status",)
+)
+SCRAPE_RUNS = REGISTRY.counter(
+    "scraper_runs_total", "Completed scrape runs by outcome", ("status",)
+)
+PRODUCTS_SCRAPED = REGISTRY.counter("scraper_products_total", "Products scraped")
+PRODUCTS_UPDATED = REGISTRY.counter("scraper_products_updated_total", "Products whose price changed")
+
+class RunStages:
+    """Per-stage totals for one scrape run, reported in its stats"""
+
+    def __init__(self):
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def record(self, stage: str, seconds: float, size: Optional[int], items: int, failed: bool) -> None:
+        totals = self.stages.get(stage)
+        if totals is None:
+            totals = self.stages[stage] = {
+                "calls": 0, "items": 0, "errors": 0, "bytes": 0, "seconds": 0.0, "max_seconds": 0.0
+            }
+        totals["calls"] += 1
+        totals["items"] += items
+        totals["errors"] += failed
+        totals["bytes"] += size or 0
+        totals["seconds"] += seconds
+        totals["max_seconds"] = max(totals["max_seconds"], seconds)
+
+    def to_dict(self) -> Dict[str, Dict]:
+        return {
+            stage: {
+                "calls": totals["calls"],
+                "items": totals["items"],
+                "errors": totals["errors"],
+                "bytes": totals["bytes"],
+                "total_seconds": round(totals["seconds"], 3),
+                "mean_ms": round(totals["seconds"] / totals["calls"] * 1000, 3),
+                "max_ms": round(totals["max_seconds"] * 1000, 3),
+            }
+            for stage, totals in self.stages.items()
+        }
+
+# Tasks inherit the context they were created in, so everything a run
+# spawns (page workers, image downloads) reports into the same RunStages
+_current_run: ContextVar[Optional[RunStages]] = ContextVar("current_run_stages", default=None)
+
+@contextmanager
+def track_run() -> Iterator[RunStages]:
+    """Collect per-stage totals for the code run inside the block"""
+    run = RunStages()
+    token = _current_run.set(run)
+    try:
+        yield run
+    finally:
+        _current_run.reset(token)
+
+def record_stage(
+    stage: str,
+    seconds: float,
+    size: Optional[int] = None,
+    items: int = 1,
+    failed: bool = False
+) -> None:
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    if size is not None:
+        STAGE_BYTES.observe(size, stage=stage)
+    if failed:
+        STAGE_ERRORS.inc(stage=stage)
+        items = 0
+    elif items:
+        STAGE_ITEMS.inc(items, stage=stage)
+    run = _current_run.get()
+    if run is not None:
+        run.record(stage, seconds, size, items, failed)
+
+class StageTimer:
+    """
+    Times a block as one call of a crawl stage. Set `size`, `items` or
+    `failed` inside the block; an exception also counts as a failure, and
+    a failed call contributes no items.
+    """
+
+    __slots__ = ("stage", "size", "items", "failed", "_start")
+
+    def __init__(self, stage: str, items: int = 1):
+        self.stage = stage
+        self.size: Optional[int] = None
+        self.items = items
+        self.failed = False
+
+    def __enter__(self) -> "StageTimer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        # Cancellation isn't a failure of the stage
+        failed = self.failed or (exc_type is not None and issubclass(exc_type, Exception))
+        record_stage(self.stage, time.perf_counter() - self._start, self.size, self.items, failed)
+        return False
@@ -0,0 +1,158 @@
+# app/core/responses.py
+import asyncio
+from email.utils import formatdate, parsedate_to_datetime
+import os
+from typing import Dict, Optional, Tuple
+from fastapi import Request
+from fastapi.responses import Response
+
+FILE_CHUNK_SIZE = 256 * 1024
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against our ETag"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(',')]
+    return '*' in candidates or any(tag.removeprefix('W/') == etag for tag in candidates)
+
+class RangeNotSatisfiable(Exception):
+    """The requested byte range lies outside the file"""
+    pass
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Inclusive (start, end) of a single `bytes=` range.
+    Returns None for headers we answer with the whole file instead
+    (malformed, other units, several ranges) and raises
+    RangeNotSatisfiable when the range starts past the end.
+    """
+    if not header or not header.startswith('bytes='):
+        return None
+    spec = header[len('bytes='):].strip()
+    if ',' in spec:
+        return None
+    start_text, separator, end_text = spec.partition('-')
+    if not separator or not (start_text or end_text):
+        return None
+    try:
+        start = int(start_text) if start_text else None
+        end = int(end_text) if end_text else None
+    except ValueError:
+        return None
+
+    if start is None:
+        # Suffix range: the last `end` bytes
+        if end == 0 or size == 0:
+            raise RangeNotSatisfiable()
+        return max(0, size - end), size - 1
+    if end is not None and end < start:
+        return None
+    if start >= size:
+        raise RangeNotSatisfiable()
+    return start, min(end if end is not None else size - 1, size - 1)
+
+def _not_modified_since(if_modified_since: Optional[str], mtime: float) -> bool:
+    if not if_modified_since:
+        return False
+    try:
+        return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+    except (TypeError, ValueError):
+        return False
+
+class RangeFileResponse(Response):
+    """
+    Sends `count` bytes of a file starting at `offset`.
+    The body goes out as a zero-copy sendfile when the server supports the
+    ASGI `http.response.zerocopysend` extension, and is streamed in chunks
+    read on a worker thread otherwise.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        offset: int,
+        count: int,
+        status_code: int,
+        headers: Dict[str, str],
+        media_type: str,
+        send_body: bool = True
+    ):
+        self.path = path
+        self.offset = offset
+        self.count = count
+        self.status_code = status_code
+        self.media_type = media_type
+        self.send_body = send_body
+        self.background = None
+        self.init_headers(headers)
+
+    async def __call__(self, scope, receive, send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        if not self.send_body or self.count <= 0:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+            return
+
+        file = await asyncio.to_thread(open, self.path, 'rb')
+        try:
+            if "http.response.zerocopysend" in scope.get("extensions", {}):
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file,
+                    "offset": self.offset,
+                    "count": self.count,
+                    "more_body": False,
+                })
+                return
+
+            await asyncio.to_thread(file.seek, self.offset)
+            remaining = self.count
+            while remaining > 0:
+                chunk = await asyncio.to_thread(file.read, min(FILE_CHUNK_SIZE, remaining))
+                remaining = remaining - len(chunk) if chunk else 0
+                await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0})
+        finally:
+            await asyncio.to_thread(file.close)
+
+async def file_response(
+    request: Request,
+    path: str,
+    etag: str,
+    media_type: str,
+    headers: Optional[Dict[str, str]] = None
+) -> Response:
+    """
+    Answer a GET or HEAD for a file: 304 when the client's copy is current,
+    206 for a satisfiable single byte range (honouring If-Range), 416 for
+    one past the end, and the whole file otherwise.
+    Raises FileNotFoundError if the file is gone.
+    """
+    stat_result = await asyncio.to_thread(os.stat, path)
+    last_modified = formatdate(stat_result.st_mtime, usegmt=True)
+    headers = {**(headers or {}), "ETag": etag, "Last-Modified": last_modified, "Accept-Ranges": "bytes"}
+
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers=headers)
+    elif _not_modified_since(request.headers.get('if-modified-since'), stat_result.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    size = stat_result.st_size
+    start, end, status = 0, size - 1, 200
+    if_range = request.headers.get('if-range')
+    # A stale If-Range means the client's partial copy is outdated: send it all
+    if 'range' in request.headers and (if_range is None or if_range in (etag, last_modified)):
+        try:
+            byte_range = parse_range(request.headers['range'], size)
+        except RangeNotSatisfiable:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        if byte_range is not None:
+            start, end = byte_range
+            status = 206
+            headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+
+    headers["Content-Length"] = str(end - start + 1)
+    return RangeFileResponse(
+        path, start, end - start + 1, status, headers, media_type,
+        send_body=request.method != "HEAD"
+    )
@@ -1,8 +1,25 @@
 # app/main.py
-from fastapi import FastAPI, HTTPException, Depends, Header
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, Depends, Header, Path, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from typing import Optional, Dict
 from .services.scraping_service import ScrapingService
+from .services.sources import MultiSourceScraper, create_scraper_registry
+from .services.image_store import ImageStore
+from .services.http_client import SharedSession
+from .services.parsers import shutdown_process_pool
+from .services.checkpoint import create_checkpoint_store
+from .services.image_variants import VARIANT_FORMATS, ImageVariantCache, ImageVariantError, preferred_format
+from .cache.redis_cache import RedisCache
+from .cache.tiered_cache import TieredPriceCache
+from .services.jobs import JobLimitError, JobManager
+from .services.progress import CrawlProgress
 from .core.config import settings
+from .core.metrics import PROMETHEUS_CONTENT_TYPE, REGISTRY
+from .core.responses import etag_matches, file_response
+import asyncio
+import base64
+import hashlib
 import logging
 
 # Configure logging
@@ -11,13 +28,58 @@ logging.basicConfig(
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Build the shared resources once per process and release them on shutdown.
+    Nothing connects here: the HTTP session, Redis pool and storage files are
+    opened on first use, so startup stays fast even when Redis is down.
+    """
+    http_session = SharedSession()
+    redis_cache = RedisCache()
+    image_store = ImageStore()
+    sources = create_scraper_registry(
+        shared_session=http_session,
+        checkpoints=create_checkpoint_store(redis_cache=redis_cache),
+        image_store=image_store
+    )
+    service = ScrapingService(scraper=MultiSourceScraper(sources), cache=TieredPriceCache(redis_cache))
+
+    async def run_scrape_job(params: Dict, progress: CrawlProgress) -> Dict:
+        return await service.run_scraping(
+            params.get("page_limit"),
+            params.get("proxy"),
+            progress,
+            params.get("resume"),
+            params.get("distributed", False)
+        )
+
+    app.state.scraping_service = service
+    app.state.image_store = image_store
+    app.state.image_variants = ImageVariantCache()
+    app.state.job_manager = JobManager(run_scrape_job)
+    try:
+        yield
+    finally:
+        await app.state.job_manager.shutdown()
+        await http_session.close()
+        await service.close()
+        shutdown_process_pool()
+
 # Initialize FastAPI application
 app = FastAPI(
     title="Dental Products Scraper",
     description="API for scraping dental products from DentalStall",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+def get_scraping_service(request: Request) -> ScrapingService:
+    return request.app.state.scraping_service
+
+def get_job_manager(request: Request) -> JobManager:
+    return request.app.state.job_manager
+
 # Authentication dependency
 async def verify_token(x_token: str = Header(...)):
     """Verify the API token provided in headers"""
@@ -36,48 +98,294 @@ async def health_check():
         "service": "dental-scraper"
     }
 
-@app.post("/scrape")
+@app.get("/metrics")
+async def metrics():
+    """Crawl stage timings and counters in the Prometheus text format"""
+    return Response(content=REGISTRY.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+@app.post("/scrape", status_code=202)
 async def scrape_products(
     page_limit: Optional[int] = None,
     proxy: Optional[str] = None,
+    resume: Optional[bool] = None,
+    distributed: bool = False,
+    service: ScrapingService = Depends(get_scraping_service),
+    jobs: JobManager = Depends(get_job_manager),
     _: str = Depends(verify_token)
 ):
     """
-    Trigger the scraping process
+    Start a background scraping job and return its id right away
     
     Parameters:
     - page_limit: Optional limit on number of pages to scrape
-    - proxy: Optional proxy server to use for requests
+    - proxy: Optional proxy server to use for requests (not with distributed)
+    - resume: Continue an interrupted crawl from its checkpoint (default true; not with distributed)
+    - distributed: Hand the pages to crawl workers (`python -m app.worker`) through Redis
+    
+    Requests with the same parameters as a queued or running job join
+    that job instead of starting another crawl.
     """
     try:
-        service = ScrapingService()
-        stats = await service.run_scraping(page_limit, proxy)
-        return {
-            "status": "success",
-            "message": "Scraping completed successfully",
-            "stats": stats
-        }
-    except Exception as e:
-        logging.error(f"Scraping failed: {str(e)}")
-        raise HTTPException(
-            status_code=500,
-            detail=f"Scraping failed: {str(e)}"
+        service.check_scrape_options(proxy, resume, distributed)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if not distributed and resume is None:
+        resume = True
+
+    try:
+        job, created = jobs.submit(
+            page_limit=page_limit, proxy=proxy, resume=resume, distributed=distributed
         )
+    except JobLimitError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+
+    return {
+        "status": "accepted",
+        "message": "Scraping job started" if created else "Joined running scraping job",
+        "job_id": job.id,
+        "job": job.to_dict()
+    }
+
+@app.get("/scrape/{job_id}")
+async def get_scrape_job(
+    job_id: str,
+    jobs: JobManager = Depends(get_job_manager),
+    _: str = Depends(verify_token)
+):
+    """Live progress and final stats of a scraping job"""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+def encode_cursor(product_title: str) -> str:
+    return base64.urlsafe_b64encode(product_title.encode('utf-8')).decode('ascii')
+
+def decode_cursor(cursor: str) -> str:
+    try:
+        return base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+    except (ValueError, UnicodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
 @app.get("/products")
-async def get_products(_: str = Depends(verify_token)):
-    """Retrieve all scraped products"""
+async def get_products(
+    limit: Optional[int] = Query(None, ge=1),
+    cursor: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    title: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    if_none_match: Optional[str] = Header(None),
+    service: ScrapingService = Depends(get_scraping_service),
+    _: str = Depends(verify_token)
+):
+    """
+    Retrieve scraped products, ordered by title
+    
+    Parameters:
+    - limit: Page size (JSON) or total row cap (NDJSON, unbounded by default)
+    - cursor: next_cursor from the previous page
+    - min_price / max_price: Price range filter
+    - title: Case-insensitive title substring filter
+    - format: "json" for a single page, "ndjson" to stream every matching row
+    """
     try:
-        service = ScrapingService()
-        products = await service.get_stored_products()
-        return {
-            "status": "success",
-            "count": len(products),
-            "products": products
-        }
+        after = decode_cursor(cursor) if cursor else None
+        filters = {"min_price": min_price, "max_price": max_price, "title": title}
+
+        # The ETag ties the response to the catalog version and the query,
+        # so polling clients get a 304 until something actually changes
+        etag = None
+        version = await service.catalog_version()
+        if version is not None:
+            query = f"{limit}|{cursor}|{min_price}|{max_price}|{title}|{format}"
+            etag = f'"{version}-{hashlib.sha1(query.encode("utf-8")).hexdigest()[:12]}"'
+            if etag_matches(if_none_match, etag):
+                return Response(status_code=304, headers={"ETag": etag})
+        headers = {"ETag": etag} if etag else {}
+
+        if format == "ndjson":
+            async def rows():
+                async for product in service.iter_stored_products(after=after, limit=limit, **filters):
+                    yield product.model_dump_json() + "\n"
+
+            return StreamingResponse(rows(), media_type="application/x-ndjson", headers=headers)
+
+        page_size = min(limit or settings.PRODUCTS_PAGE_SIZE, settings.PRODUCTS_MAX_PAGE_SIZE)
+        products = await service.get_stored_products(after=after, limit=page_size + 1, **filters)
+        has_more = len(products) > page_size
+        products = products[:page_size]
+
+        return JSONResponse(
+            content={
+                "status": "success",
+                "count": len(products),
+                "products": [product.model_dump(mode="json") for product in products],
+                "next_cursor": encode_cursor(products[-1].product_title) if has_more else None
+            },
+            headers=headers
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Failed to retrieve products: {str(e)}")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to retrieve products: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@app.get("/products/search")
+async def search_products(
+    q: str = Query(..., min_length=1),
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    limit: int = Query(20, ge=1, le=settings.SEARCH_MAX_LIMIT),
+    fuzzy: bool = True,
+    service: ScrapingService = Depends(get_scraping_service),
+    _: str = Depends(verify_token)
+):
+    """
+    Search products by title, best matches first
+    
+    Parameters:
+    - q: Search words; each is matched exactly, as a prefix, and (with fuzzy) despite typos
+    - min_price / max_price: Price range filter
+    - limit: Maximum number of results
+    - fuzzy: Also match misspelled words (default true)
+    """
+    try:
+        results = await service.search_products(q, min_price, max_price, limit, fuzzy)
+    except Exception as e:
+        logging.error(f"Failed to search products: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to search products: {str(e)}"
+        )
+    return {
+        "status": "success",
+        "query": q,
+        "count": len(results),
+        "products": [
+            {**product.model_dump(mode="json"), "score": score}
+            for product, score in results
+        ]
+    }
+
+@app.get("/products/history")
+async def get_price_history(
+    title: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    service: ScrapingService = Depends(get_scraping_service),
+    _: str = Depends(verify_token)
+):
+    """
+    Price history of one product
+    
+    Parameters:
+    - title: Exact product title
+    - start / end: Optional Unix timestamp range (inclusive)
+    """
+    try:
+        points = await service.get_price_history(title, start, end)
+    except Exception as e:
+        logging.error(f"Failed to retrieve price history: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to retrieve price history: {str(e)}"
+        )
+    if points is None:
+        raise HTTPException(status_code=404, detail="No price history for this product")
+    return {
+        "status": "success",
+        "product_title": title,
+        "count": len(points),
+        "history": [{"timestamp": ts, "price": price} for ts, price in points]
+    }
+
+@app.get("/products/changes")
+async def get_price_changes(
+    since: float,
+    limit: int = Query(1000, ge=1, le=10000),
+    service: ScrapingService = Depends(get_scraping_service),
+    _: str = Depends(verify_token)
+):
+    """
+    Price changes recorded after a point in time
+    
+    Parameters:
+    - since: Unix timestamp; only changes strictly after it are returned
+    - limit: Maximum number of changes, oldest first
+    """
+    try:
+        changes = await service.get_price_changes(since, limit)
+    except Exception as e:
+        logging.error(f"Failed to retrieve price changes: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to retrieve price changes: {str(e)}"
+        )
+    return {
+        "status": "success",
+        "count": len(changes),
+        "changes": changes
+    }
+
+@app.api_route("/images/{image_id}", methods=["GET", "HEAD"])
+async def get_image(
+    request: Request,
+    image_id: str = Path(..., pattern="^[0-9a-f]{64}$"),
+    width: Optional[int] = None,
+    format: Optional[str] = Query(None, pattern="^(auto|avif|webp|jpeg)$"),
+    _: str = Depends(verify_token)
+):
+    """
+    Serve a stored product image, or a resized/transcoded variant of it
+    
+    Parameters:
+    - image_id: SHA-256 of the image, i.e. the file name in `path_to_image` without extension
+    - width: Resize to this many pixels wide (one of IMAGE_VARIANT_WIDTHS)
+    - format: avif, webp or jpeg; `auto` (the default with `width`) picks the best one the client accepts
+    
+    Supports HEAD, conditional requests and byte ranges.
+    """
+    headers = {"Cache-Control": f"public, max-age={settings.IMAGE_CACHE_MAX_AGE}, immutable"}
+    variant = width is not None or format is not None
+    if variant:
+        image_format = format or "auto"
+        if image_format == "auto":
+            image_format = preferred_format(request.headers.get('accept'))
+            headers["Vary"] = "Accept"
+        variants: ImageVariantCache = request.app.state.image_variants
+        etag = f'"{image_id}-{width or "full"}-q{variants.quality}.{image_format}"'
+    else:
+        etag = f'"{image_id}"'
+
+    # Images never change under an id, so a matching ETag needs no disk access
+    if etag_matches(request.headers.get('if-none-match'), etag):
+        return Response(status_code=304, headers={**headers, "ETag": etag})
+
+    store = request.app.state.image_store
+    source = await asyncio.to_thread(store.find_blob, image_id)
+    if source is None:
+        raise HTTPException(status_code=404, detail="Image not found")
+
+    if variant:
+        try:
+            path = await variants.get(source, image_id, width, image_format)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        except ImageVariantError as e:
+            logging.error(str(e))
+            raise HTTPException(status_code=422, detail="Image can't be converted")
+        media_type = VARIANT_FORMATS[image_format][2]
+    else:
+        path = source
+        media_type = store.content_type_for(source)
+
+    try:
+        return await file_response(request, path, etag, media_type, headers)
+    except FileNotFoundError:
+        # Evicted or removed between lookup and open
+        raise HTTPException(status_code=404, detail="Image not found")
@@ -0,0 +1,222 @@
+# app/services/checkpoint.py
+from abc import ABC, abstractmethod
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+from redis.exceptions import RedisError
+from ..cache.redis_cache import RedisCache
+from ..core.config import settings
+
+class CheckpointStore(ABC):
+    """
+    Persists crawl progress so an interrupted crawl can pick up where it
+    stopped. A checkpoint is a small metadata record plus the products of
+    every page that was fully scraped, written one page at a time.
+    """
+
+    @abstractmethod
+    async def load(self, key: str) -> Optional[Dict]:
+        """Return {"meta": {...}, "pages": {url: [product dicts]}} or None"""
+        pass
+
+    @abstractmethod
+    async def begin(self, key: str, meta: Dict) -> None:
+        """Start a fresh checkpoint, discarding any previous one"""
+        pass
+
+    @abstractmethod
+    async def add_page(self, key: str, url: str, products: List[Dict]) -> None:
+        """Record a completed page"""
+        pass
+
+    @abstractmethod
+    async def clear(self, key: str) -> None:
+        """Forget the checkpoint once the crawl has finished"""
+        pass
+
+class FileCheckpointStore(CheckpointStore):
+    """
+    One append-only JSONL file per crawl: a metadata line followed by a line
+    per completed page, so recording a page never rewrites earlier ones.
+    """
+
+    def __init__(self, directory: str = settings.CHECKPOINT_PATH):
+        self.directory = directory
+        self._lock = asyncio.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.jsonl")
+
+    def _read(self, key: str) -> Optional[Dict]:
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        meta, pages = None, {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # Torn write from a crash; that page is simply redone
+                    logging.warning(f"Skipping torn entry in checkpoint {path}")
+                    continue
+                if 'meta' in record:
+                    meta = record['meta']
+                else:
+                    pages[record['url']] = record['products']
+        return {"meta": meta, "pages": pages} if meta is not None else None
+
+    def _write(self, key: str, record: Dict, mode: str) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self._path(key), mode, encoding='utf-8') as f:
+            f.write("\n" + json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _remove(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    async def load(self, key: str) -> Optional[Dict]:
+        async with self._lock:
+            return await asyncio.to_thread(self._read, key)
+
+    async def begin(self, key: str, meta: Dict) -> None:
+        async with self._lock:
+            await asyncio.to_thread(self._write, key, {"meta": meta}, 'w')
+
+    async def add_page(self, key: str, url: str, products: List[Dict]) -> None:
+        async with self._lock:
+            await asyncio.to_thread(self._write, key, {"url": url, "products": products}, 'a')
+
+    async def clear(self, key: str) -> None:
+        async with self._lock:
+            await asyncio.to_thread(self._remove, key)
+
+class RedisCheckpointStore(CheckpointStore):
+    """Checkpoints as Redis hashes (field per page), so any worker can resume them"""
+
+    KEY_PREFIX = "crawl:checkpoint:"
+
+    def __init__(
+        self,
+        redis_cache: Optional[RedisCache] = None,
+        ttl: int = settings.CHECKPOINT_MAX_AGE
+    ):
+        self.redis = redis_cache or RedisCache()
+        self.ttl = ttl
+
+    def _key(self, key: str) -> str:
+        return f"{self.KEY_PREFIX}{key}"
+
+    async def load(self, key: str) -> Optional[Dict]:
+        fields = await self.redis.redis_client.hgetall(self._key(key))
+        if 'meta' not in fields:
+            return None
+        pages = {
+            field[len('page:'):]: json.loads(value)
+            for field, value in fields.items()
+            if field.startswith('page:')
+        }
+        return {"meta": json.loads(fields['meta']), "pages": pages}
+
+    async def begin(self, key: str, meta: Dict) -> None:
+        async with self.redis.redis_client.pipeline(transaction=True) as pipe:
+            pipe.delete(self._key(key))
+            pipe.hset(self._key(key), 'meta', json.dumps(meta))
+            pipe.expire(self._key(key), self.ttl)
+            await pipe.execute()
+
+    async def add_page(self, key: str, url: str, products: List[Dict]) -> None:
+        await self.redis.redis_client.hset(
+            self._key(key), f"page:{url}", json.dumps(products, ensure_ascii=False)
+        )
+
+    async def clear(self, key: str) -> None:
+        await self.redis.redis_client.delete(self._key(key))
+
+CHECKPOINT_BACKENDS = {
+    "file": FileCheckpointStore,
+    "redis": RedisCheckpointStore,
+}
+
+def create_checkpoint_store(
+    backend: str = settings.CHECKPOINT_BACKEND,
+    redis_cache: Optional[RedisCache] = None
+) -> CheckpointStore:
+    """Build the checkpoint backend selected in settings"""
+    if backend not in CHECKPOINT_BACKENDS:
+        raise ValueError(f"Unknown checkpoint backend: {backend}")
+    if backend == "redis":
+        return RedisCheckpointStore(redis_cache)
+    return CHECKPOINT_BACKENDS[backend]()
+
+class CrawlCheckpoint:
+    """
+    Checkpoint of a single crawl.
+    Checkpoint I/O never fails the crawl: if the store is unavailable the
+    crawl carries on and just can't be resumed.
+    """
+
+    def __init__(self, store: CheckpointStore, key: str):
+        self.store = store
+        self.key = key
+        self.total_pages: Optional[int] = None
+        self.pages: Dict[str, List[Dict]] = {}
+
+    @staticmethod
+    def key_for(**params) -> str:
+        return hashlib.sha1(json.dumps(params, sort_keys=True, default=str).encode()).hexdigest()
+
+    async def restore(self, max_age: float = settings.CHECKPOINT_MAX_AGE) -> bool:
+        """Load a previous, recent checkpoint for this crawl; True if there was one"""
+        try:
+            state = await self.store.load(self.key)
+        except (OSError, ValueError, RedisError) as e:
+            logging.error(f"Could not load crawl checkpoint {self.key}: {str(e)}")
+            return False
+        if not state:
+            return False
+        try:
+            meta = state['meta']
+            started_at = float(meta.get('started_at', 0))
+            total_pages = int(meta['total_pages'])
+            pages = dict(state['pages'])
+        except (KeyError, TypeError, ValueError, AttributeError) as e:
+            logging.error(f"Ignoring malformed crawl checkpoint {self.key}: {str(e)}")
+            return False
+        if time.time() - started_at > max_age:
+            logging.info(f"Ignoring stale crawl checkpoint {self.key}")
+            return False
+        self.total_pages = total_pages
+        self.pages = pages
+        return True
+
+    async def begin(self, total_pages: int) -> None:
+        self.total_pages = total_pages
+        self.pages = {}
+        try:
+            await self.store.begin(self.key, {"total_pages": total_pages, "started_at": time.time()})
+        except (OSError, RedisError) as e:
+            logging.error(f"Could not start crawl checkpoint {self.key}: {str(e)}")
+
+    async def page_done(self, url: str, products: List[Dict]) -> None:
+        self.pages[url] = products
+        try:
+            await self.store.add_page(self.key, url, products)
+        except (OSError, RedisError) as e:
+            logging.error(f"Could not checkpoint page {url}: {str(e)}")
+
+    async def clear(self) -> None:
+        try:
+            await self.store.clear(self.key)
+        except (OSError, RedisError) as e:
+            logging.error(f"Could not clear crawl checkpoint {self.key}: {str(e)}")
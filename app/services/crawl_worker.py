@@ -0,0 +1,133 @@
+# app/services/crawl_worker.py
+import asyncio
+from contextlib import AsyncExitStack
+import logging
+import os
+import socket
+from typing import Dict
+from aiohttp import ClientSession
+from redis.exceptions import RedisError
+from ..core.config import settings
+from .image_downloader import ImageDownloadPool
+from .image_store import ImageStore
+from .progress import CrawlProgress
+from .sources import ScraperRegistry
+from .work_queue import RedisWorkQueue
+
+class CrawlWorker:
+    """
+    Pulls listing pages from the shared work queue, scrapes them and
+    acknowledges each one with its products. Run as many of these as you
+    like, on one machine or several; they only share Redis.
+    Each page is crawled by the source whose shop URL it belongs to, so it
+    gets that source's headers, scheduler and share of the budgets.
+    """
+
+    def __init__(
+        self,
+        sources: ScraperRegistry,
+        queue: RedisWorkQueue,
+        concurrency: int = settings.WORKER_CONCURRENCY
+    ):
+        self.sources = sources
+        self.queue = queue
+        self.concurrency = max(1, concurrency)
+        self.name = f"{socket.gethostname()}:{os.getpid()}"
+        self.pages_done = 0
+        self._stopping = asyncio.Event()
+
+    def stop(self) -> None:
+        """Finish the pages in hand, then return from run()"""
+        self._stopping.set()
+
+    async def _heartbeat(self, task: str) -> None:
+        while True:
+            await asyncio.sleep(self.queue.lease_seconds / 3)
+            try:
+                await self.queue.extend(task)
+            except RedisError as e:
+                logging.warning(f"Could not extend lease: {str(e)}")
+
+    async def process(
+        self,
+        session: ClientSession,
+        task: str,
+        image_pools: Dict[str, ImageDownloadPool]
+    ) -> None:
+        try:
+            _, url = self.queue.parse(task)
+        except (ValueError, KeyError, TypeError) as e:
+            # There is no run to report to, so the task is just dropped
+            logging.error(f"Dropping malformed task {task!r}: {str(e)}")
+            await self.queue.discard(task)
+            return
+        scraper = self.sources.for_url(url)
+        if scraper is None:
+            logging.error(f"No source configured for {url}, giving up on it")
+            await self.queue.ack(task, [], status="failed")
+            return
+
+        progress = CrawlProgress()
+        products = []
+        heartbeat = asyncio.create_task(self._heartbeat(task))
+        try:
+            async for product in scraper.iter_page(session, url, image_pools[scraper.name], progress):
+                products.append(product.model_dump(mode='json'))
+        except Exception as e:
+            # e.g. a failed cache or checkpoint write; retried like a page error
+            logging.error(f"Error crawling {url}: {str(e)}", exc_info=True)
+            progress.errors += 1
+        finally:
+            heartbeat.cancel()
+
+        if progress.errors:
+            requeued = await self.queue.nack(task, products)
+            logging.warning(
+                f"Page {url} had {progress.errors} errors, "
+                f"{'requeued' if requeued else 'giving up'}"
+            )
+        else:
+            await self.queue.ack(task, products)
+            self.pages_done += 1
+        # Keep the image manifest current in case this worker is killed
+        await self._flush(scraper.image_store)
+
+    @staticmethod
+    async def _flush(image_store: ImageStore) -> None:
+        try:
+            await image_store.flush()
+        except Exception as e:
+            logging.error(f"Could not save the image manifest: {str(e)}")
+
+    async def _loop(self, session: ClientSession, image_pools: Dict[str, ImageDownloadPool]) -> None:
+        while not self._stopping.is_set():
+            try:
+                task = await self.queue.lease()
+                if task is not None:
+                    await self.process(session, task, image_pools)
+            except RedisError as e:
+                logging.error(f"Work queue unavailable: {str(e)}")
+                await asyncio.sleep(settings.RETRY_DELAY)
+            except Exception as e:
+                # The task's lease runs out and the reaper requeues it
+                logging.error(f"Crawl worker task failed: {str(e)}", exc_info=True)
+
+    async def run(self) -> None:
+        """Work until stop() is called"""
+        logging.info(
+            f"Crawl worker {self.name} started with concurrency {self.concurrency} "
+            f"for sources {', '.join(self.sources.names)}"
+        )
+        scrapers = list(self.sources)
+        # The sources share one session, so any of them can open it
+        async with scrapers[0].open_session() as session:
+            async with AsyncExitStack() as stack:
+                # Image downloads go through their own source's scheduler
+                image_pools = {
+                    scraper.name: await stack.enter_async_context(ImageDownloadPool(scraper.download_image))
+                    for scraper in scrapers
+                }
+                await asyncio.gather(*(self._loop(session, image_pools) for _ in range(self.concurrency)))
+        for image_store in {id(scraper.image_store): scraper.image_store for scraper in scrapers}.values():
+            await self._flush(image_store)
+        logging.info(f"Crawl worker {self.name} stopped after {self.pages_done} pages")
@@ -0,0 +1,89 @@
+# app/services/http_cache.py
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+from ..core.config import settings
+
+class HttpCache:
+    """
+    On-disk HTTP response cache for listing pages.
+    Each URL gets one JSON entry holding the last body, its ETag and
+    Last-Modified validators and, once the page has been fully processed,
+    the products parsed from it. A 304 on revalidation lets the scraper reuse
+    those products without parsing the page again.
+    """
+
+    def __init__(self, cache_dir: str = settings.HTTP_CACHE_PATH):
+        self.cache_dir = cache_dir
+
+    def _entry_path(self, url: str) -> str:
+        key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    async def get(self, url: str) -> Optional[Dict]:
+        return await asyncio.to_thread(self._read, self._entry_path(url))
+
+    def _read(self, path: str) -> Optional[Dict]:
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"Ignoring unreadable HTTP cache entry {path}: {str(e)}")
+            return None
+
+    def _write(self, path: str, entry: Dict) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _remove(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    async def put(self, url: str, body: str, etag: Optional[str], last_modified: Optional[str]) -> None:
+        """Store a fresh body; products parsed from the previous body are dropped"""
+        if not etag and not last_modified:
+            # Nothing to revalidate against, so caching the body buys nothing.
+            # Drop the old entry too, or its validators would be sent next
+            # time and a 304 would bring back its stale body and products
+            await asyncio.to_thread(self._remove, self._entry_path(url))
+            return
+        entry = {
+            'url': url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'body': body,
+            'products': None,
+            'fetched_at': time.time(),
+        }
+        await asyncio.to_thread(self._write, self._entry_path(url), entry)
+
+    async def put_products(self, url: str, products: List[Dict]) -> None:
+        """Attach the products parsed from the cached body of a page"""
+        path = self._entry_path(url)
+        entry = await asyncio.to_thread(self._read, path)
+        if entry is None:
+            return
+        entry['products'] = products
+        await asyncio.to_thread(self._write, path, entry)
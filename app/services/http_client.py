@@ -0,0 +1,40 @@
+# app/services/http_client.py
+import aiohttp
+from aiohttp import ClientSession, TCPConnector
+from typing import Optional
+from ..core.config import settings
+
+def create_http_session(
+    limit: int = settings.HTTP_POOL_SIZE,
+    limit_per_host: int = settings.MAX_CONCURRENCY
+) -> ClientSession:
+    """ClientSession with keep-alive connection pooling and DNS caching"""
+    connector = TCPConnector(
+        ssl=False,
+        limit=limit,
+        limit_per_host=limit_per_host,
+        use_dns_cache=True,
+        ttl_dns_cache=settings.DNS_CACHE_TTL,
+        keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT
+    )
+    return ClientSession(connector=connector, cookie_jar=aiohttp.CookieJar(unsafe=True))
+
+class SharedSession:
+    """
+    One ClientSession shared by every crawl in the process.
+    The session (and its connection pool) is created on first use, so app
+    startup doesn't open anything, and later crawls reuse warm connections.
+    """
+
+    def __init__(self):
+        self._session: Optional[ClientSession] = None
+
+    async def get(self) -> ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = create_http_session()
+        return self._session
+
+    async def close(self) -> None:
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
@@ -0,0 +1,109 @@
+# app/services/image_downloader.py
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, List, Optional
+from aiohttp import ClientResponse, ClientSession
+from ..core.config import settings
+
+DownloadFunc = Callable[[ClientSession, str, str], Awaitable[str]]
+
+async def write_response_to_file(response: ClientResponse, filepath: str, hasher=None) -> int:
+    """
+    Stream a response body to disk in chunks without blocking the event loop.
+    The body is written to a temporary file first and moved into place once
+    complete, so readers never observe a half-written image. When a hashlib
+    object is given it is updated with every chunk.
+    Returns the number of bytes written (the file is removed when empty).
+    """
+    tmp_path = f"{filepath}.part"
+    f = await asyncio.to_thread(open, tmp_path, 'wb')
+    size = 0
+    try:
+        async for chunk in response.content.iter_chunked(settings.IMAGE_CHUNK_SIZE):
+            await asyncio.to_thread(f.write, chunk)
+            if hasher is not None:
+                hasher.update(chunk)
+            size += len(chunk)
+    except BaseException:
+        await asyncio.to_thread(f.close)
+        await asyncio.to_thread(os.remove, tmp_path)
+        raise
+
+    await asyncio.to_thread(f.close)
+    if size:
+        await asyncio.to_thread(os.replace, tmp_path, filepath)
+    else:
+        await asyncio.to_thread(os.remove, tmp_path)
+    return size
+
+class ImageDownloadPool:
+    """
+    Dedicated worker pool for product image downloads.
+    Jobs are queued by the page parser and picked up by a fixed number of
+    workers, so image fetching no longer serializes page processing.
+    """
+
+    def __init__(
+        self,
+        download: DownloadFunc,
+        concurrency: int = settings.IMAGE_DOWNLOAD_CONCURRENCY
+    ):
+        self.download = download
+        self.concurrency = max(1, concurrency)
+        self._jobs: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+
+    async def __aenter__(self) -> "ImageDownloadPool":
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.close()
+
+    def start(self) -> None:
+        if self._workers:
+            return
+        self._jobs = asyncio.Queue(maxsize=self.concurrency * 4)
+        self._workers = [
+            asyncio.create_task(self._worker())
+            for _ in range(self.concurrency)
+        ]
+
+    async def close(self) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        # Fail whatever was still queued so nobody waits on it forever
+        while self._jobs is not None and not self._jobs.empty():
+            *_, future = self._jobs.get_nowait()
+            if not future.done():
+                future.cancel()
+
+    async def submit(self, session: ClientSession, image_url: str, product_title: str) -> asyncio.Future:
+        """Queue an image download; the returned future resolves to the saved path"""
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        await self._jobs.put((session, image_url, product_title, future))
+        return future
+
+    async def _worker(self) -> None:
+        while True:
+            session, image_url, product_title, future = await self._jobs.get()
+            if future.done():
+                continue
+            try:
+                path = await self.download(session, image_url, product_title)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                logging.error(f"Image job failed for {product_title}: {str(e)}")
+                if not future.done():
+                    future.set_result("")
+            else:
+                # The consumer may have given up on the job mid-download
+                if not future.done():
+                    future.set_result(path)
@@ -0,0 +1,188 @@
+# app/services/image_store.py
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Dict, Optional
+from urllib.parse import urlparse
+from aiohttp import ClientResponse
+from ..core.config import settings
+from .image_downloader import write_response_to_file
+
+CONTENT_TYPE_EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/jpg': '.jpg',
+    'image/png': '.png',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+    'image/avif': '.avif',
+}
+
+# Every extension a blob can be stored under, most common first
+EXTENSION_CONTENT_TYPES = {
+    '.jpg': 'image/jpeg',
+    '.jpeg': 'image/jpeg',
+    '.png': 'image/png',
+    '.webp': 'image/webp',
+    '.gif': 'image/gif',
+    '.avif': 'image/avif',
+}
+
+def url_key(url: str) -> str:
+    """Stable manifest key for an image URL"""
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()
+
+class ImageStore:
+    """
+    Content-addressed, deduplicating image store.
+    Image bodies are stored once under the SHA-256 of their content, and a
+    manifest keyed by URL hash remembers which blob each URL points at along
+    with its ETag/Last-Modified, so later runs can revalidate with a
+    conditional GET instead of downloading the image again.
+    """
+
+    def __init__(
+        self,
+        root: str = settings.IMAGE_STORAGE_PATH,
+        manifest_path: str = settings.IMAGE_MANIFEST_PATH
+    ):
+        self.root = root
+        self.manifest_path = manifest_path
+        self._manifest: Optional[Dict[str, Dict]] = None
+        self._dirty = False
+        self._lock = asyncio.Lock()
+
+    @property
+    def manifest(self) -> Dict[str, Dict]:
+        """URL hash -> entry, read from disk on first use"""
+        if self._manifest is None:
+            self._manifest = self._load_manifest()
+        return self._manifest
+
+    def _load_manifest(self) -> Dict[str, Dict]:
+        if not os.path.exists(self.manifest_path):
+            return {}
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logging.warning(f"Ignoring unreadable image manifest {self.manifest_path}: {str(e)}")
+            return {}
+
+    def lookup(self, url: str) -> Optional[Dict]:
+        """Return the manifest entry for a URL if its blob is still on disk"""
+        entry = self.manifest.get(url_key(url))
+        if entry and os.path.exists(entry['path']):
+            return entry
+        return None
+
+    def stored_size(self, url: str) -> int:
+        """Size in bytes of the stored image for a URL, 0 if there is none"""
+        entry = self.manifest.get(url_key(url))
+        return entry['size'] if entry else 0
+
+    def conditional_headers(self, url: str) -> Dict[str, str]:
+        """Validators to send so an unchanged image comes back as 304"""
+        entry = self.lookup(url)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def mark_fresh(self, url: str) -> Optional[str]:
+        """Record a 304 revalidation and return the stored path"""
+        entry = self.lookup(url)
+        if entry is None:
+            return None
+        entry['checked_at'] = time.time()
+        self._dirty = True
+        return entry['path']
+
+    def blob_path(self, digest: str, extension: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}{extension}")
+
+    def find_blob(self, digest: str) -> Optional[str]:
+        """Path of the stored blob with this SHA-256, whatever its extension"""
+        for extension in EXTENSION_CONTENT_TYPES:
+            path = self.blob_path(digest, extension)
+            if os.path.exists(path):
+                return path
+        return None
+
+    @staticmethod
+    def content_type_for(path: str) -> str:
+        _, extension = os.path.splitext(path)
+        return EXTENSION_CONTENT_TYPES.get(extension.lower(), 'application/octet-stream')
+
+    def _extension_for(self, url: str, content_type: Optional[str]) -> str:
+        if content_type:
+            extension = CONTENT_TYPE_EXTENSIONS.get(content_type.split(';')[0].strip().lower())
+            if extension:
+                return extension
+        _, extension = os.path.splitext(urlparse(url).path)
+        if extension.lower() in CONTENT_TYPE_EXTENSIONS.values() or extension.lower() == '.jpeg':
+            return extension.lower()
+        return '.jpg'
+
+    async def store_response(self, url: str, response: ClientResponse) -> str:
+        """
+        Stream a 200 response into the store and return the blob path.
+        Returns an empty string when the body was empty.
+        """
+        await asyncio.to_thread(os.makedirs, self.root, exist_ok=True)
+        tmp_path = os.path.join(self.root, f".{uuid.uuid4().hex}.download")
+
+        hasher = hashlib.sha256()
+        size = await write_response_to_file(response, tmp_path, hasher)
+        if not size:
+            return ""
+
+        digest = hasher.hexdigest()
+        path = self.blob_path(digest, self._extension_for(url, response.headers.get('Content-Type')))
+        await asyncio.to_thread(self._commit_blob, tmp_path, path)
+
+        self.manifest[url_key(url)] = {
+            'url': url,
+            'path': path,
+            'sha256': digest,
+            'size': size,
+            'content_type': response.headers.get('Content-Type'),
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified'),
+            'checked_at': time.time(),
+        }
+        self._dirty = True
+        return path
+
+    @staticmethod
+    def _commit_blob(tmp_path: str, path: str) -> None:
+        # Identical content is already stored under the same digest
+        if os.path.exists(path):
+            os.remove(tmp_path)
+            return
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+
+    async def flush(self) -> None:
+        """Persist the manifest atomically if anything changed"""
+        async with self._lock:
+            if not self._dirty:
+                return
+            data = json.dumps(self.manifest, indent=2, ensure_ascii=False)
+            self._dirty = False
+            await asyncio.to_thread(self._write_manifest, data)
+
+    def _write_manifest(self, data: str) -> None:
+        directory = os.path.dirname(self.manifest_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp_path, self.manifest_path)
@@ -0,0 +1,194 @@
+# app/services/image_variants.py
+import asyncio
+from collections import OrderedDict
+import logging
+import os
+import uuid
+from typing import Dict, List, Optional
+from PIL import Image, ImageOps, UnidentifiedImageError, features
+from ..core.config import settings
+from .parsers import get_process_pool
+
+# variant format -> (Pillow format, file extension, content type)
+VARIANT_FORMATS = {
+    "avif": ("AVIF", ".avif", "image/avif"),
+    "webp": ("WEBP", ".webp", "image/webp"),
+    "jpeg": ("JPEG", ".jpg", "image/jpeg"),
+}
+
+_supported_formats: Optional[List[str]] = None
+
+def supported_formats() -> List[str]:
+    """Variant formats this Pillow build can encode, best compression first"""
+    global _supported_formats
+    if _supported_formats is None:
+        _supported_formats = [
+            name for name in VARIANT_FORMATS
+            if name == "jpeg" or features.check(name)
+        ]
+    return _supported_formats
+
+def preferred_format(accept: Optional[str]) -> str:
+    """Smallest variant format the client says it accepts; JPEG otherwise"""
+    accepted = {part.split(';')[0].strip().lower() for part in (accept or "").split(',')}
+    for name in supported_formats():
+        if VARIANT_FORMATS[name][2] in accepted:
+            return name
+    return "jpeg"
+
+class ImageVariantError(Exception):
+    """Raised when a variant can't be produced from the source image"""
+    pass
+
+def render_variant(source: str, target: str, width: Optional[int], image_format: str, quality: int) -> int:
+    """
+    Module-level entry point so rendering can run in a worker process.
+    Writes the variant atomically and returns its size in bytes.
+    """
+    pil_format = VARIANT_FORMATS[image_format][0]
+    with Image.open(source) as original:
+        image = ImageOps.exif_transpose(original)
+        if width and image.width > width:
+            # Only the width is bounded; the aspect ratio is kept
+            image.thumbnail((width, image.height), Image.Resampling.LANCZOS)
+        if pil_format == "JPEG" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA", "L", "LA"):
+            image = image.convert("RGBA")
+
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp_path = f"{target}.{uuid.uuid4().hex}.tmp"
+        try:
+            image.save(tmp_path, pil_format, quality=quality)
+            os.replace(tmp_path, target)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+    return os.path.getsize(target)
+
+class ImageVariantCache:
+    """
+    Resized and transcoded copies (thumbnails, WebP/AVIF) of stored images.
+    A variant is rendered in the process pool the first time it is asked
+    for and served from disk afterwards. Concurrent requests for the same
+    variant share one render. The cache is bounded by total size: past
+    `max_bytes`, the least recently used variants are deleted.
+    """
+
+    def __init__(
+        self,
+        root: str = settings.IMAGE_VARIANT_PATH,
+        max_bytes: int = settings.IMAGE_VARIANT_CACHE_BYTES,
+        widths: List[int] = settings.IMAGE_VARIANT_WIDTHS,
+        quality: int = settings.IMAGE_VARIANT_QUALITY,
+        processes: int = settings.PARSER_PROCESSES
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.widths = set(widths)
+        self.quality = quality
+        self.processes = processes
+        self.total_bytes = 0
+        # path -> size, least recently used first; loaded from disk on first use
+        self._entries: Optional["OrderedDict[str, int]"] = None
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._lock = asyncio.Lock()
+
+    def variant_path(self, digest: str, width: Optional[int], image_format: str) -> str:
+        extension = VARIANT_FORMATS[image_format][1]
+        return os.path.join(self.root, digest[:2], f"{digest}-{width or 'full'}{extension}")
+
+    def _scan(self) -> "OrderedDict[str, int]":
+        found = []
+        if os.path.isdir(self.root):
+            for directory, _, files in os.walk(self.root):
+                for name in files:
+                    if name.endswith('.tmp'):
+                        continue
+                    path = os.path.join(directory, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    found.append((stat.st_mtime, path, stat.st_size))
+        # Recency isn't persisted; after a restart, older files go first
+        found.sort()
+        return OrderedDict((path, size) for _, path, size in found)
+
+    async def _index(self) -> "OrderedDict[str, int]":
+        if self._entries is None:
+            async with self._lock:
+                if self._entries is None:
+                    entries = await asyncio.to_thread(self._scan)
+                    self.total_bytes = sum(entries.values())
+                    self._entries = entries
+        return self._entries
+
+    def _forget(self, path: str) -> None:
+        size = self._entries.pop(path, None)
+        if size is not None:
+            self.total_bytes -= size
+
+    async def get(self, source: str, digest: str, width: Optional[int], image_format: str) -> str:
+        """
+        Path of the variant of `source` (the blob stored under `digest`) at
+        `width` pixels wide (None keeps the size) in `image_format`.
+        """
+        if width is not None and width not in self.widths:
+            raise ValueError(f"Unsupported width {width}; use one of {sorted(self.widths)}")
+        if image_format not in supported_formats():
+            raise ValueError(f"Unsupported format {image_format}; use one of {supported_formats()}")
+
+        path = self.variant_path(digest, width, image_format)
+        entries = await self._index()
+        if path in entries:
+            if os.path.exists(path):
+                entries.move_to_end(path)
+                return path
+            self._forget(path)
+
+        future = self._inflight.get(path)
+        if future is None:
+            future = asyncio.ensure_future(self._render(source, path, width, image_format))
+            self._inflight[path] = future
+            future.add_done_callback(lambda _: self._inflight.pop(path, None))
+        # A client that goes away mustn't cancel a render others are waiting on
+        return await asyncio.shield(future)
+
+    async def _render(self, source: str, path: str, width: Optional[int], image_format: str) -> str:
+        loop = asyncio.get_running_loop()
+        try:
+            size = await loop.run_in_executor(
+                get_process_pool(self.processes),
+                render_variant, source, path, width, image_format, self.quality
+            )
+        except (OSError, UnidentifiedImageError, Image.DecompressionBombError) as e:
+            raise ImageVariantError(f"Could not render {os.path.basename(path)}: {str(e)}")
+
+        self._forget(path)
+        self._entries[path] = size
+        self.total_bytes += size
+        await self._evict(keep=path)
+        return path
+
+    async def _evict(self, keep: str) -> None:
+        victims = []
+        for path in list(self._entries):
+            if self.total_bytes <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            victims.append(path)
+            self._forget(path)
+        if victims:
+            logging.info(f"Evicting {len(victims)} image variants, cache at {self.total_bytes} bytes")
+            await asyncio.to_thread(self._remove, victims)
+
+    @staticmethod
+    def _remove(paths: List[str]) -> None:
+        for path in paths:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,123 @@
+# app/services/jobs.py
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass, field
+import json
+import logging
+import time
+import uuid
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from ..core.config import settings
+from .progress import CrawlProgress
+
+JobRunner = Callable[[Dict[str, Any], CrawlProgress], Awaitable[Dict]]
+
+class JobLimitError(Exception):
+    """Raised when too many scrape jobs are already queued or running"""
+    pass
+
+@dataclass
+class ScrapeJob:
+    id: str
+    params: Dict[str, Any]
+    status: str = "queued"  # queued -> running -> succeeded | failed | cancelled
+    progress: CrawlProgress = field(default_factory=CrawlProgress)
+    stats: Optional[Dict] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+    @property
+    def active(self) -> bool:
+        return self.status in ("queued", "running")
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "params": self.params,
+            "created_at": self.created_at,
+            "progress": self.progress.to_dict(),
+            "stats": self.stats,
+            "error": self.error,
+        }
+
+class JobManager:
+    """
+    Runs scrape jobs in the background.
+    Submitting parameters that match a queued or running job returns that
+    job instead of starting a second crawl (single-flight). At most
+    `max_concurrent` jobs run at once; further jobs wait in the queue, and
+    submissions are refused once `max_queued` jobs are waiting.
+    """
+
+    def __init__(
+        self,
+        runner: JobRunner,
+        max_concurrent: int = settings.MAX_CONCURRENT_JOBS,
+        max_queued: int = settings.MAX_QUEUED_JOBS,
+        history_size: int = settings.JOB_HISTORY_SIZE
+    ):
+        self.runner = runner
+        self.max_queued = max_queued
+        self.history_size = history_size
+        self._slots = asyncio.Semaphore(max_concurrent)
+        self._jobs: "OrderedDict[str, ScrapeJob]" = OrderedDict()
+        self._active: Dict[str, ScrapeJob] = {}
+
+    @staticmethod
+    def _key(params: Dict[str, Any]) -> str:
+        return json.dumps(params, sort_keys=True, default=str)
+
+    def submit(self, **params) -> Tuple[ScrapeJob, bool]:
+        """Start (or join) a job; returns the job and whether it was newly created"""
+        key = self._key(params)
+        existing = self._active.get(key)
+        if existing is not None:
+            return existing, False
+
+        queued = sum(1 for job in self._active.values() if job.status == "queued")
+        if queued >= self.max_queued:
+            raise JobLimitError(f"Too many scrape jobs waiting ({queued})")
+
+        job = ScrapeJob(id=uuid.uuid4().hex, params=params)
+        self._jobs[job.id] = job
+        self._active[key] = job
+        job.task = asyncio.create_task(self._run(job, key))
+        self._trim_history()
+        return job, True
+
+    def get(self, job_id: str) -> Optional[ScrapeJob]:
+        return self._jobs.get(job_id)
+
+    async def _run(self, job: ScrapeJob, key: str) -> None:
+        try:
+            async with self._slots:
+                job.status = "running"
+                job.progress = CrawlProgress()
+                logging.info(f"Scrape job {job.id} started with {job.params}")
+                job.stats = await self.runner(job.params, job.progress)
+                job.status = "succeeded"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+            raise
+        except Exception as e:
+            logging.error(f"Scrape job {job.id} failed: {str(e)}", exc_info=True)
+            job.status = "failed"
+            job.error = str(e)
+        finally:
+            job.progress.finish()
+            self._active.pop(key, None)
+            logging.info(f"Scrape job {job.id} finished: {job.status}")
+
+    def _trim_history(self) -> None:
+        """Forget the oldest finished jobs beyond the history size"""
+        finished = [job_id for job_id, job in self._jobs.items() if not job.active]
+        for job_id in finished[:max(0, len(self._jobs) - self.history_size)]:
+            del self._jobs[job_id]
+
+    async def shutdown(self) -> None:
+        tasks = [job.task for job in self._active.values() if job.task]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
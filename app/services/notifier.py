@@ -1,9 +1,12 @@
 # app/services/notifier.py
 from abc import ABC, abstractmethod
-from typing import Dict
+import asyncio
+import logging
+from typing import Dict, List, Optional
 import aiosmtplib
 from email.mime.text import MIMEText
 from ..core.config import settings
+from .pipeline import STOP
 
 class NotificationStrategy(ABC):
     """Abstract base class for notification strategies"""
@@ -13,6 +16,15 @@ class NotificationStrategy(ABC):
         """Send notification"""
         pass
 
+    async def notify_many(self, messages: List[str]) -> None:
+        """Send several notifications; channels that can batch them override this"""
+        for message in messages:
+            await self.notify(message)
+
+    async def close(self) -> None:
+        """Release connections held by the channel"""
+        pass
+
 class ConsoleNotifier(NotificationStrategy):
     """Simple console notification implementation"""
     
@@ -23,52 +35,207 @@ class ConsoleNotifier(NotificationStrategy):
         print("===========================\n")
 
 class EmailNotifier(NotificationStrategy):
-    """Email notification implementation using async SMTP"""
-    
-    def __init__(self):
-        self.smtp_server = settings.SMTP_SERVER
-        self.port = settings.SMTP_PORT
-        self.username = settings.EMAIL_SENDER
-        self.password = settings.EMAIL_PASSWORD
-        self.from_email = settings.EMAIL_SENDER
-        self.to_email = settings.EMAIL_RECIPIENT
+    """
+    Email notification implementation using async SMTP.
+    The connection (TLS handshake and login included) is kept open and
+    reused for later messages, and reopened if the server dropped it.
+    """
 
-    async def notify(self, message: str) -> None:
-        """Send notification via email"""
-        msg = MIMEText(message)
-        msg['Subject'] = 'Scraping Notification'
+    def __init__(
+        self,
+        smtp_server: str = settings.SMTP_SERVER,
+        port: int = settings.SMTP_PORT,
+        username: str = settings.EMAIL_SENDER,
+        password: str = settings.EMAIL_PASSWORD,
+        from_email: str = settings.EMAIL_SENDER,
+        to_email: str = settings.EMAIL_RECIPIENT,
+        timeout: float = settings.SMTP_TIMEOUT
+    ):
+        self.smtp_server = smtp_server
+        self.port = port
+        self.username = username
+        self.password = password
+        self.from_email = from_email
+        self.to_email = to_email
+        self.timeout = timeout
+        self._smtp: Optional[aiosmtplib.SMTP] = None
+        self._lock = asyncio.Lock()
+
+    async def _connection(self) -> aiosmtplib.SMTP:
+        if self._smtp is not None and self._smtp.is_connected:
+            return self._smtp
+        smtp = aiosmtplib.SMTP(
+            hostname=self.smtp_server,
+            port=self.port,
+            use_tls=self.port == 465,
+            start_tls=self.port == 587,
+            validate_certs=True,
+            timeout=self.timeout
+        )
+        await smtp.connect()
+        # Local relays and test sinks usually don't authenticate
+        if self.password:
+            await smtp.login(self.username, self.password)
+        self._smtp = smtp
+        return smtp
+
+    def _discard_connection(self) -> None:
+        if self._smtp is not None:
+            self._smtp.close()
+            self._smtp = None
+
+    def _message(self, body: str, subject: str = 'Scraping Notification') -> MIMEText:
+        msg = MIMEText(body)
+        msg['Subject'] = subject
         msg['From'] = self.from_email
         msg['To'] = self.to_email
+        return msg
+
+    async def _send(self, msg: MIMEText) -> None:
+        async with self._lock:
+            try:
+                try:
+                    await (await self._connection()).send_message(msg)
+                except aiosmtplib.SMTPServerDisconnected:
+                    # The server hung up on the idle connection; reconnect once
+                    self._discard_connection()
+                    await (await self._connection()).send_message(msg)
+            except Exception:
+                self._discard_connection()
+                raise
+        logging.info(f"Email sent to {self.to_email}")
+
+    async def notify(self, message: str) -> None:
+        """Send notification via email"""
+        await self._send(self._message(message))
 
+    async def notify_many(self, messages: List[str]) -> None:
+        """Send several notifications as a single digest email"""
+        if len(messages) == 1:
+            await self.notify(messages[0])
+            return
+        body = "\n\n----------\n\n".join(messages)
+        await self._send(self._message(body, f'Scraping Notification ({len(messages)} updates)'))
+
+    async def close(self) -> None:
+        async with self._lock:
+            smtp, self._smtp = self._smtp, None
+            if smtp is None or not smtp.is_connected:
+                return
+            try:
+                await smtp.quit()
+            except aiosmtplib.SMTPException:
+                smtp.close()
+
+def coalesce_messages(messages: List[str]) -> List[str]:
+    """Collapse repeated messages into one line with a count, keeping order"""
+    counts: Dict[str, int] = {}
+    for message in messages:
+        counts[message] = counts.get(message, 0) + 1
+    return [message if count == 1 else f"{message} (x{count})" for message, count in counts.items()]
+
+class NotificationDispatcher(NotificationStrategy):
+    """
+    Delivers notifications from a background task, so callers never wait on
+    (or fail because of) a slow or unreachable mail server.
+    Messages that arrive within `coalesce_seconds` of the first one are
+    sent together as one digest. Failed deliveries are retried a few times
+    and then dropped with an error log; the channel's connection is closed
+    once nothing has been sent for `idle_timeout` seconds.
+    """
+
+    def __init__(
+        self,
+        notifier: NotificationStrategy,
+        queue_size: int = settings.NOTIFY_QUEUE_SIZE,
+        coalesce_seconds: float = settings.NOTIFY_COALESCE_SECONDS,
+        max_batch: int = settings.NOTIFY_MAX_BATCH,
+        attempts: int = settings.NOTIFY_SEND_ATTEMPTS,
+        idle_timeout: float = settings.SMTP_IDLE_TIMEOUT
+    ):
+        self.notifier = notifier
+        self.coalesce_seconds = coalesce_seconds
+        self.max_batch = max(1, max_batch)
+        self.attempts = max(1, attempts)
+        self.idle_timeout = idle_timeout
+        self.sent = 0
+        self.failed = 0
+        self.dropped = 0
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self._task: Optional[asyncio.Task] = None
+
+    async def notify(self, message: str) -> None:
+        """Queue a message and return immediately"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
         try:
-            if self.port == 465:
-                smtp = aiosmtplib.SMTP(
-                    hostname=self.smtp_server,
-                    port=self.port,
-                    use_tls=True,
-                    validate_certs=True
-                )
-            else:
-                smtp = aiosmtplib.SMTP(
-                    hostname=self.smtp_server,
-                    port=self.port,
-                    use_tls=False, 
-                    validate_certs=True
+            self._queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            logging.warning(f"Notification queue full, dropping: {message[:80]}")
+
+    async def _collect(self) -> tuple:
+        """
+        Wait for a message, then gather whatever else arrives during the
+        coalescing window. Returns the batch and whether STOP was seen.
+        """
+        try:
+            first = await asyncio.wait_for(self._queue.get(), self.idle_timeout)
+        except asyncio.TimeoutError:
+            # Nothing to send for a while: don't hold the connection open
+            await self.notifier.close()
+            first = await self._queue.get()
+        if first is STOP:
+            return [], True
+
+        batch = [first]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.coalesce_seconds
+        while len(batch) < self.max_batch:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+            try:
+                message = await asyncio.wait_for(self._queue.get(), remaining)
+            except asyncio.TimeoutError:
+                break
+            if message is STOP:
+                return batch, True
+            batch.append(message)
+        return batch, False
+
+    async def _deliver(self, batch: List[str]) -> None:
+        messages = coalesce_messages(batch)
+        for attempt in range(1, self.attempts + 1):
+            try:
+                await self.notifier.notify_many(messages)
+                self.sent += len(batch)
+                return
+            except Exception as e:
+                logging.warning(
+                    f"Notification delivery failed (attempt {attempt}/{self.attempts}): {str(e)}"
                 )
+                if attempt < self.attempts:
+                    await asyncio.sleep(settings.RETRY_DELAY * 2 ** (attempt - 1))
+        self.failed += len(batch)
+        logging.error(f"Giving up on {len(batch)} notifications")
 
-            await smtp.connect()
-            
-            if self.port == 587:
-                await smtp.starttls()
-                
-            await smtp.login(self.username, self.password)
-            await smtp.send_message(msg)
-            await smtp.quit()
-                
-            print(f"Email sent to {self.to_email} successfully.")
-            
-        except Exception as e:
-            error_message = f"Failed to send email: {str(e)}"
-            print(error_message)
-            await ConsoleNotifier().notify(f"Scraping failed: {str(e)}")
-            raise Exception(error_message)
+    async def _run(self) -> None:
+        while True:
+            batch, stopped = await self._collect()
+            if batch:
+                await self._deliver(batch)
+            if stopped:
+                return
+
+    async def close(self, timeout: float = settings.NOTIFY_FLUSH_TIMEOUT) -> None:
+        """Deliver what is still queued (for up to `timeout` seconds), then hang up"""
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            try:
+                await asyncio.wait_for(self._queue.put(STOP), timeout)
+                await asyncio.wait_for(task, timeout)
+            except asyncio.TimeoutError:
+                task.cancel()
+                logging.error(f"Dropped {self._queue.qsize()} undelivered notifications on shutdown")
+        await self.notifier.close()
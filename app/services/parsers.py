@@ -0,0 +1,312 @@
+# app/services/parsers.py
+from abc import ABC, abstractmethod
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from decimal import Decimal
+import logging
+import re
+from typing import Dict, List, NamedTuple, Optional, Tuple, Type
+from bs4 import BeautifulSoup
+from ..core.config import settings
+from ..core.metrics import StageTimer
+from .scheduler import FairShareLimiter
+
+try:
+    from lxml import etree as lxml_etree, html as lxml_html
+except ImportError:  # pragma: no cover - lxml is optional
+    lxml_etree = lxml_html = None
+
+# (title, price, image_url) for one product on a listing page
+ProductListing = Tuple[str, Decimal, str]
+
+class ListingPage(NamedTuple):
+    """Everything the scraper needs from one WooCommerce listing page"""
+    products: List[ProductListing]
+    element_count: int
+    total_pages: Optional[int]
+
+def parse_price(price_text: str) -> Decimal:
+    return Decimal(
+        price_text.replace('₹', '')
+        .replace(',', '')
+        .replace('/-', '')
+        .strip()
+    )
+
+def is_usable_image(image_url: Optional[str]) -> bool:
+    return bool(image_url) and not image_url.endswith('svg+xml')
+
+class ParserBackend(ABC):
+    """Abstract base class for listing page parsers"""
+
+    name: str
+
+    @abstractmethod
+    def parse(self, html: str) -> ListingPage:
+        """Extract products and pagination from a listing page"""
+        pass
+
+class SoupParser(ParserBackend):
+    """
+    Reference implementation on BeautifulSoup's pure-Python html.parser.
+    Slow, but it defines the extraction rules the other backends follow.
+    """
+
+    name = 'html.parser'
+
+    def parse(self, html: str) -> ListingPage:
+        soup = BeautifulSoup(html, 'html.parser')
+        product_elements = soup.find_all('li', class_='product')
+
+        products = []
+        for element in product_elements:
+            try:
+                listing = self.parse_product_element(element)
+            except Exception as e:
+                logging.error(f"Error processing product: {str(e)}", exc_info=True)
+                continue
+            if listing is not None:
+                products.append(listing)
+
+        return ListingPage(products, len(product_elements), self.get_total_pages(soup))
+
+    def parse_product_element(self, element) -> Optional[ProductListing]:
+        title_container = element.find('h2', class_='woo-loop-product__title')
+        if title_container and title_container.a:
+            title = title_container.a.text.strip()
+        else:
+            return None
+
+        price_container = element.find('div', class_='mf-product-price-box')
+        if not price_container:
+            return None
+
+        price_element = (
+            price_container.find('ins', recursive=True) or
+            price_container.find('span', class_='woocommerce-Price-amount', recursive=True)
+        )
+
+        if not price_element:
+            return None
+
+        amount_element = price_element.find('bdi')
+        if not amount_element:
+            return None
+
+        price = parse_price(amount_element.text.strip())
+
+        img_container = element.find('div', class_='mf-product-thumbnail')
+        if not img_container:
+            return None
+
+        img_element = img_container.find('img')
+        if not img_element:
+            return None
+
+        image_url = (
+            img_element.get('data-lazy-src') or
+            img_element.get('src')
+        )
+
+        if not is_usable_image(image_url):
+            return None
+
+        return title, price, image_url
+
+    def get_total_pages(self, soup: BeautifulSoup) -> Optional[int]:
+        """
+        Extract total number of pages from the pagination.
+        The website shows pagination like: 1, 2, 3, 4, ..., 117, 118, 119
+        Returns None when the page has no pagination at all.
+        """
+        pagination = soup.find('ul', class_='page-numbers')
+        if not pagination:
+            return None
+
+        max_page = 1
+        for page in pagination.find_all('a', class_='page-numbers'):
+            if 'next' in page.get('class', []):
+                continue
+            try:
+                max_page = max(max_page, int(page.text.strip()))
+            except ValueError:
+                continue
+        return max_page
+
+# lxml refuses str input that declares its own encoding
+XML_DECLARATION = re.compile(r"^\s*<\?xml[^>]*\?>")
+
+def _has_class(name: str) -> str:
+    """XPath predicate matching a single class token, like bs4's class_="""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+def _first(element, xpath: str):
+    found = element.xpath(xpath)
+    return found[0] if found else None
+
+class LxmlParser(ParserBackend):
+    """
+    libxml2-backed parser applying the same rules as SoupParser through
+    XPath. Typically an order of magnitude faster than html.parser.
+    """
+
+    name = 'lxml'
+
+    PRODUCTS = f"//li[{_has_class('product')}]"
+    TITLE = f".//h2[{_has_class('woo-loop-product__title')}]"
+    PRICE_BOX = f".//div[{_has_class('mf-product-price-box')}]"
+    PRICE_AMOUNT = f".//span[{_has_class('woocommerce-Price-amount')}]"
+    THUMBNAIL = f".//div[{_has_class('mf-product-thumbnail')}]"
+    PAGINATION = f"//ul[{_has_class('page-numbers')}]"
+    PAGE_LINKS = f".//a[{_has_class('page-numbers')}]"
+
+    def parse(self, html: str) -> ListingPage:
+        try:
+            document = lxml_html.fromstring(XML_DECLARATION.sub("", html, count=1))
+        except lxml_etree.ParserError:
+            # Nothing but whitespace or comments; html.parser finds nothing either
+            return ListingPage([], 0, None)
+        product_elements = document.xpath(self.PRODUCTS)
+
+        products = []
+        for element in product_elements:
+            try:
+                listing = self.parse_product_element(element)
+            except Exception as e:
+                logging.error(f"Error processing product: {str(e)}", exc_info=True)
+                continue
+            if listing is not None:
+                products.append(listing)
+
+        return ListingPage(products, len(product_elements), self.get_total_pages(document))
+
+    def parse_product_element(self, element) -> Optional[ProductListing]:
+        title_container = _first(element, self.TITLE)
+        link = _first(title_container, './/a') if title_container is not None else None
+        if link is None:
+            return None
+        title = link.text_content().strip()
+
+        price_container = _first(element, self.PRICE_BOX)
+        if price_container is None:
+            return None
+
+        price_element = _first(price_container, './/ins')
+        if price_element is None:
+            price_element = _first(price_container, self.PRICE_AMOUNT)
+        if price_element is None:
+            return None
+
+        amount_element = _first(price_element, './/bdi')
+        if amount_element is None:
+            return None
+
+        price = parse_price(amount_element.text_content().strip())
+
+        img_container = _first(element, self.THUMBNAIL)
+        if img_container is None:
+            return None
+
+        img_element = _first(img_container, './/img')
+        if img_element is None:
+            return None
+
+        image_url = (
+            img_element.get('data-lazy-src') or
+            img_element.get('src')
+        )
+
+        if not is_usable_image(image_url):
+            return None
+
+        return title, price, image_url
+
+    def get_total_pages(self, document) -> Optional[int]:
+        pagination = _first(document, self.PAGINATION)
+        if pagination is None:
+            return None
+
+        max_page = 1
+        for page in pagination.xpath(self.PAGE_LINKS):
+            if 'next' in (page.get('class') or '').split():
+                continue
+            try:
+                max_page = max(max_page, int(page.text_content().strip()))
+            except ValueError:
+                continue
+        return max_page
+
+PARSER_BACKENDS: Dict[str, Type[ParserBackend]] = {
+    SoupParser.name: SoupParser,
+    LxmlParser.name: LxmlParser,
+}
+
+def resolve_backend(name: str) -> str:
+    """Validate a backend name, falling back to html.parser when lxml is missing"""
+    if name not in PARSER_BACKENDS:
+        raise ValueError(f"Unknown HTML parser backend: {name}")
+    if name == LxmlParser.name and lxml_html is None:
+        logging.warning("lxml is not installed, falling back to html.parser")
+        return SoupParser.name
+    return name
+
+def parse_listing(html: str, backend: str) -> ListingPage:
+    """Module-level entry point so parsing can run in a worker process"""
+    return PARSER_BACKENDS[backend]().parse(html)
+
+_process_pool: Optional[ProcessPoolExecutor] = None
+
+def get_process_pool(processes: int = settings.PARSER_PROCESSES) -> ProcessPoolExecutor:
+    global _process_pool
+    if _process_pool is None:
+        _process_pool = ProcessPoolExecutor(max_workers=processes)
+    return _process_pool
+
+def shutdown_process_pool() -> None:
+    global _process_pool
+    if _process_pool is not None:
+        _process_pool.shutdown(cancel_futures=True)
+        _process_pool = None
+
+class ListingParser:
+    """
+    Parses listing pages with the configured backend.
+    Pages larger than the offload threshold are parsed in a process pool so
+    parsing scales across cores and never stalls in-flight fetches. Parsers
+    of several sources share the pool; with a `budget`, their offloaded
+    parses take turns for it instead of queueing first come first served.
+    """
+
+    def __init__(
+        self,
+        backend: str = settings.HTML_PARSER_BACKEND,
+        offload_threshold: int = settings.PARSE_OFFLOAD_THRESHOLD,
+        processes: int = settings.PARSER_PROCESSES,
+        budget: Optional[FairShareLimiter] = None,
+        source: str = "default"
+    ):
+        self.backend = resolve_backend(backend)
+        self.offload_threshold = offload_threshold
+        self.processes = processes
+        self.budget = budget
+        self.source = source
+
+    async def _parse_in_pool(self, html: str) -> ListingPage:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            get_process_pool(self.processes), parse_listing, html, self.backend
+        )
+
+    async def parse(self, html: str) -> ListingPage:
+        with StageTimer("parse") as stage:
+            stage.size = len(html)
+            if self.processes > 0 and len(html) >= self.offload_threshold:
+                if self.budget is None:
+                    page = await self._parse_in_pool(html)
+                else:
+                    async with self.budget.slot(self.source):
+                        page = await self._parse_in_pool(html)
+            else:
+                page = parse_listing(html, self.backend)
+            stage.items = len(page.products)
+        return page
@@ -0,0 +1,49 @@
+# app/services/pipeline.py
+import asyncio
+from typing import AsyncIterator, List, TypeVar
+
+T = TypeVar("T")
+
+# Marker put on a stage queue once its producer has finished
+STOP = object()
+
+async def iterate_queue(queue: asyncio.Queue) -> AsyncIterator:
+    """Yield items from a stage queue until the STOP marker arrives"""
+    while True:
+        item = await queue.get()
+        if item is STOP:
+            return
+        yield item
+
+def drain_queue(queue: asyncio.Queue, first: T) -> tuple:
+    """
+    Collect everything already waiting on a queue without blocking.
+    Returns the collected items and whether the STOP marker was seen, so
+    a slow consumer can coalesce a burst of batches into one unit of work.
+    """
+    items = [first]
+    while True:
+        try:
+            item = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return items, False
+        if item is STOP:
+            return items, True
+        items.append(item)
+
+async def put_or_fail(queue: asyncio.Queue, item, consumer: asyncio.Task) -> None:
+    """
+    Put an item on a bounded queue, waiting for back-pressure to clear.
+    If the consuming stage dies while we wait, its exception is raised here
+    instead of blocking the producer forever on a full queue.
+    """
+    put = asyncio.ensure_future(queue.put(item))
+    done, _ = await asyncio.wait({put, consumer}, return_when=asyncio.FIRST_COMPLETED)
+    if put in done:
+        return
+    put.cancel()
+    consumer.result()
+    raise RuntimeError("Pipeline stage exited before consuming all items")
+
+def flatten(batches: List[List[T]]) -> List[T]:
+    return [item for batch in batches for item in batch]
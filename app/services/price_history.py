@@ -0,0 +1,229 @@
+# app/services/price_history.py
+from array import array
+import asyncio
+import bisect
+import json
+import logging
+import os
+import struct
+import time
+from typing import Dict, List, Optional, Tuple
+from ..core.config import settings
+
+# One change on disk: product id, timestamp, price
+RECORD = struct.Struct('<Idd')
+
+class PriceSeries:
+    """Array-backed timestamp/price columns for one product (8 bytes per value)"""
+
+    __slots__ = ('timestamps', 'prices')
+
+    def __init__(self):
+        self.timestamps = array('d')
+        self.prices = array('d')
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def last_price(self) -> Optional[float]:
+        return self.prices[-1] if self.prices else None
+
+    def append(self, timestamp: float, price: float) -> None:
+        self.timestamps.append(timestamp)
+        self.prices.append(price)
+
+    def range(self, start: Optional[float] = None, end: Optional[float] = None) -> List[Tuple[float, float]]:
+        lo = bisect.bisect_left(self.timestamps, start) if start is not None else 0
+        hi = bisect.bisect_right(self.timestamps, end) if end is not None else len(self.timestamps)
+        return list(zip(self.timestamps[lo:hi], self.prices[lo:hi]))
+
+    def price_before(self, index: int) -> Optional[float]:
+        return self.prices[index - 1] if index > 0 else None
+
+class PriceHistoryStore:
+    """
+    Per-product price history that records only actual changes.
+    In memory each product is a pair of array columns, plus one global
+    time-ordered change log (product id, timestamp) for "changed since"
+    queries. On disk the history is an append-only file of fixed 20-byte
+    records next to a file mapping product ids to titles.
+    """
+
+    def __init__(self, directory: str = settings.PRICE_HISTORY_PATH):
+        self.directory = directory
+        self.titles_path = os.path.join(directory, "titles.jsonl")
+        self.records_path = os.path.join(directory, "changes.bin")
+        self._lock = asyncio.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        """Forget the in-memory history; it is read from disk again on next use"""
+        self._titles: List[str] = []
+        self._ids: Dict[str, int] = {}
+        self._series: Dict[int, PriceSeries] = {}
+        self._log_timestamps = array('d')
+        self._log_ids = array('I')
+        self._log_positions = array('I')  # index of each change within its series
+        self._loaded = False
+
+    def __len__(self) -> int:
+        return len(self._log_timestamps)
+
+    def _apply(self, product_id: int, timestamp: float, price: float) -> None:
+        series = self._series.setdefault(product_id, PriceSeries())
+        # Keep both indexes time-ordered even if the clock steps backwards
+        if self._log_timestamps and timestamp < self._log_timestamps[-1]:
+            timestamp = self._log_timestamps[-1]
+        self._log_timestamps.append(timestamp)
+        self._log_ids.append(product_id)
+        self._log_positions.append(len(series))
+        series.append(timestamp, price)
+
+    def _load(self) -> None:
+        if os.path.exists(self.titles_path):
+            with open(self.titles_path, 'rb') as f:
+                data = f.read()
+            offset = 0
+            while offset < len(data):
+                end = data.find(b"\n", offset)
+                try:
+                    # A line without its newline was cut short by a crash
+                    if end == -1:
+                        raise ValueError("missing newline")
+                    title = json.loads(data[offset:end].decode('utf-8'))
+                except ValueError:
+                    # Ids are line numbers, so nothing after a torn line can
+                    # be trusted; cut it off so the next append starts clean
+                    logging.warning(
+                        f"Truncating price history titles at torn entry {len(self._titles)}"
+                    )
+                    self._truncate(self.titles_path, offset)
+                    break
+                self._ids[title] = len(self._titles)
+                self._titles.append(title)
+                offset = end + 1
+
+        if os.path.exists(self.records_path):
+            with open(self.records_path, 'rb') as f:
+                data = f.read()
+            usable = len(data) - len(data) % RECORD.size
+            if usable != len(data):
+                logging.warning("Truncating torn trailing record in price history")
+                # Keep later appends aligned on record boundaries
+                self._truncate(self.records_path, usable)
+            orphaned = False
+            for product_id, timestamp, price in RECORD.iter_unpack(data[:usable]):
+                if product_id < len(self._titles):
+                    self._apply(product_id, timestamp, price)
+                else:
+                    orphaned = True
+            if orphaned:
+                # Records of truncated titles would attach to whichever
+                # products get their ids next
+                logging.warning("Dropping price history records of truncated titles")
+                self._rewrite_records(data[:usable])
+
+        self._loaded = True
+        logging.info(f"Loaded {len(self)} price changes for {len(self._series)} products")
+
+    @staticmethod
+    def _truncate(path: str, size: int) -> None:
+        with open(path, 'r+b') as f:
+            f.truncate(size)
+
+    def _rewrite_records(self, data: bytes) -> None:
+        known = len(self._titles)
+        tmp_path = f"{self.records_path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(b"".join(
+                RECORD.pack(*record) for record in RECORD.iter_unpack(data) if record[0] < known
+            ))
+        os.replace(tmp_path, self.records_path)
+
+    def _append(self, new_titles: List[str], records: List[Tuple[int, float, float]]) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        if new_titles:
+            with open(self.titles_path, 'a', encoding='utf-8') as f:
+                f.write("".join(json.dumps(title, ensure_ascii=False) + "\n" for title in new_titles))
+        with open(self.records_path, 'ab') as f:
+            f.write(b"".join(RECORD.pack(*record) for record in records))
+
+    async def _ensure_loaded(self) -> None:
+        if not self._loaded:
+            await asyncio.to_thread(self._load)
+
+    async def record_prices(self, prices: Dict[str, float], timestamp: Optional[float] = None) -> int:
+        """
+        Record an observation of many products; only prices that differ from
+        the last recorded one are stored. Returns the number of changes.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        async with self._lock:
+            await self._ensure_loaded()
+
+            new_titles, records = [], []
+            for title, price in prices.items():
+                price = float(price)
+                product_id = self._ids.get(title)
+                if product_id is None:
+                    # Ids are only taken once the titles are on disk
+                    product_id = len(self._titles) + len(new_titles)
+                    new_titles.append(title)
+                else:
+                    series = self._series.get(product_id)
+                    if series is not None and series.last_price == price:
+                        continue
+                records.append((product_id, timestamp, price))
+
+            if not records:
+                return 0
+
+            try:
+                await asyncio.to_thread(self._append, new_titles, records)
+            except BaseException:
+                # Part of the write may have landed; re-read the files rather
+                # than guess which ids they now hold
+                self._reset()
+                raise
+            for title in new_titles:
+                self._ids[title] = len(self._titles)
+                self._titles.append(title)
+            for record in records:
+                self._apply(*record)
+            return len(records)
+
+    async def get_history(
+        self,
+        title: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None
+    ) -> Optional[List[Tuple[float, float]]]:
+        """(timestamp, price) points for one product in [start, end], None if unknown"""
+        async with self._lock:
+            await self._ensure_loaded()
+            product_id = self._ids.get(title)
+            series = self._series.get(product_id) if product_id is not None else None
+            if series is None:
+                return None
+            return series.range(start, end)
+
+    async def changed_since(self, since: float, limit: Optional[int] = None) -> List[Dict]:
+        """Price changes strictly after `since`, oldest first"""
+        async with self._lock:
+            await self._ensure_loaded()
+            start = bisect.bisect_right(self._log_timestamps, since)
+            stop = len(self._log_timestamps) if limit is None else min(len(self._log_timestamps), start + limit)
+
+            changes = []
+            for i in range(start, stop):
+                product_id = self._log_ids[i]
+                series = self._series[product_id]
+                position = self._log_positions[i]
+                changes.append({
+                    "product_title": self._titles[product_id],
+                    "timestamp": series.timestamps[position],
+                    "price": series.prices[position],
+                    "previous_price": series.price_before(position),
+                })
+            return changes
@@ -0,0 +1,36 @@
+# app/services/progress.py
+from dataclasses import dataclass, field
+import time
+from typing import Dict, Optional
+
+@dataclass
+class CrawlProgress:
+    """Live counters for one crawl, updated by the scraper and the pipeline"""
+
+    total_pages: Optional[int] = None
+    pages_done: int = 0
+    products: int = 0
+    updated: int = 0
+    errors: int = 0
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def finish(self) -> None:
+        self.finished_at = time.time()
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.time()) - self.started_at
+
+    def to_dict(self) -> Dict:
+        elapsed = max(self.elapsed, 1e-9)
+        return {
+            "total_pages": self.total_pages,
+            "pages_done": self.pages_done,
+            "products": self.products,
+            "updated": self.updated,
+            "errors": self.errors,
+            "elapsed_seconds": round(self.elapsed, 3),
+            "pages_per_second": round(self.pages_done / elapsed, 3),
+            "products_per_second": round(self.products / elapsed, 3),
+        }
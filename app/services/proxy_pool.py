@@ -0,0 +1,180 @@
+# app/services/proxy_pool.py
+import logging
+import random
+import time
+from typing import Dict, Iterable, List, Optional
+from urllib.parse import urlsplit
+from ..core.config import settings
+
+# Responses that point at the exit IP rather than the page: the proxy
+# rejected us, or the target is blocking/throttling that address
+PROXY_FAILURE_STATUSES = {403, 407, 429, 502, 503, 504}
+
+def redact_proxy(url: Optional[str]) -> Optional[str]:
+    """The proxy URL without its user:password, for logs and stats"""
+    if not url:
+        return url
+    parts = urlsplit(url)
+    if '@' not in parts.netloc:
+        return url
+    return parts._replace(netloc=parts.netloc.rsplit('@', 1)[1]).geturl()
+
+class ProxyStats:
+    """Health bookkeeping for one proxy"""
+
+    __slots__ = (
+        'url', 'latency', 'failure_rate', 'in_flight', 'requests', 'failures',
+        'consecutive_failures', 'ejections', 'ejected_until', 'probing'
+    )
+
+    def __init__(self, url: str):
+        self.url = url
+        self.latency: Optional[float] = None  # EWMA, seconds
+        self.failure_rate = 0.0  # EWMA of failures
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.probing = False
+
+    def score(self, default_latency: float) -> float:
+        """Lower is better: expected latency, inflated by load and failures"""
+        latency = self.latency if self.latency is not None else default_latency
+        return latency * (1 + self.in_flight) / max(0.05, 1 - self.failure_rate)
+
+    def to_dict(self, now: float) -> Dict:
+        return {
+            "proxy": redact_proxy(self.url),
+            "healthy": not self.ejected_until,
+            "ejected_for": round(max(0.0, self.ejected_until - now), 1),
+            "latency": round(self.latency, 3) if self.latency is not None else None,
+            "failure_rate": round(self.failure_rate, 3),
+            "in_flight": self.in_flight,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejections": self.ejections,
+        }
+
+class ProxyPool:
+    """
+    Spreads requests over a set of proxies and keeps the unhealthy ones out.
+    Each request goes to the better of two randomly picked healthy proxies,
+    scored by smoothed latency, in-flight requests and failure rate.
+    A proxy that fails repeatedly (or too often) is ejected for a while;
+    when the ejection expires it gets a single probe request, and is
+    re-admitted if that succeeds or ejected for twice as long if not.
+    """
+
+    def __init__(
+        self,
+        proxies: Iterable[str],
+        max_failures: int = settings.PROXY_MAX_FAILURES,
+        failure_rate_threshold: float = settings.PROXY_FAILURE_RATE,
+        min_requests: int = settings.PROXY_MIN_REQUESTS,
+        eject_seconds: float = settings.PROXY_EJECT_SECONDS,
+        max_eject_seconds: float = settings.PROXY_MAX_EJECT_SECONDS,
+        smoothing: float = 0.2
+    ):
+        self._proxies: Dict[str, ProxyStats] = {
+            url: ProxyStats(url) for url in dict.fromkeys(proxies) if url
+        }
+        self.max_failures = max_failures
+        self.failure_rate_threshold = failure_rate_threshold
+        self.min_requests = min_requests
+        self.eject_seconds = eject_seconds
+        self.max_eject_seconds = max_eject_seconds
+        self.smoothing = smoothing
+
+    def __len__(self) -> int:
+        return len(self._proxies)
+
+    def _candidates(self, now: float) -> List[ProxyStats]:
+        candidates = []
+        for stats in self._proxies.values():
+            if not stats.ejected_until:
+                candidates.append(stats)
+            elif stats.ejected_until <= now and not stats.probing:
+                # Ejection over: allow one probe request at a time
+                candidates.append(stats)
+        return candidates
+
+    def acquire(self) -> Optional[str]:
+        """Pick a proxy for the next request; None if the pool is empty"""
+        if not self._proxies:
+            return None
+        now = time.monotonic()
+        candidates = self._candidates(now)
+
+        if not candidates:
+            # Everything is ejected: use whichever comes back first rather
+            # than stalling the crawl or going out without a proxy
+            stats = min(self._proxies.values(), key=lambda s: s.ejected_until)
+        elif len(candidates) == 1:
+            stats = candidates[0]
+        else:
+            known = [s.latency for s in candidates if s.latency is not None]
+            default_latency = sum(known) / len(known) if known else 1.0
+            first, second = random.sample(candidates, 2)
+            stats = min(first, second, key=lambda s: s.score(default_latency))
+
+        if stats.ejected_until:
+            stats.probing = True
+        stats.in_flight += 1
+        stats.requests += 1
+        return stats.url
+
+    def release(self, proxy: Optional[str], latency: float, ok: Optional[bool]) -> None:
+        """
+        Report the outcome of a request made through `proxy`.
+        `ok=None` (e.g. the request was cancelled) only frees the slot; an
+        unfinished probe is dropped so the proxy can be probed again.
+        """
+        stats = self._proxies.get(proxy) if proxy else None
+        if stats is None:
+            return
+        stats.in_flight = max(0, stats.in_flight - 1)
+        if ok is None:
+            stats.probing = False
+            return
+        alpha = self.smoothing
+        stats.failure_rate = (1 - alpha) * stats.failure_rate + alpha * (0.0 if ok else 1.0)
+
+        if ok:
+            stats.latency = latency if stats.latency is None else (1 - alpha) * stats.latency + alpha * latency
+            stats.consecutive_failures = 0
+            if stats.probing:
+                logging.info(f"Proxy {redact_proxy(proxy)} recovered, re-admitting it")
+                stats.ejected_until = 0.0
+                stats.ejections = 0
+                stats.failure_rate = 0.0
+            stats.probing = False
+            return
+
+        stats.failures += 1
+        stats.consecutive_failures += 1
+        probing, stats.probing = stats.probing, False
+        if not probing and stats.ejected_until > time.monotonic():
+            # A request that started before the ejection; already handled
+            return
+        if (
+            probing
+            or stats.consecutive_failures >= self.max_failures
+            or (stats.requests >= self.min_requests and stats.failure_rate >= self.failure_rate_threshold)
+        ):
+            self._eject(stats)
+
+    def _eject(self, stats: ProxyStats) -> None:
+        duration = min(self.max_eject_seconds, self.eject_seconds * (2 ** stats.ejections))
+        stats.ejections += 1
+        stats.ejected_until = time.monotonic() + duration
+        stats.consecutive_failures = 0
+        logging.warning(
+            f"Ejecting proxy {redact_proxy(stats.url)} for {duration:.0f}s "
+            f"(failure rate {stats.failure_rate:.2f}, {stats.failures} failures)"
+        )
+
+    def stats(self) -> List[Dict]:
+        now = time.monotonic()
+        return [stats.to_dict(now) for stats in self._proxies.values()]
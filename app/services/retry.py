@@ -0,0 +1,194 @@
+# app/services/retry.py
+import asyncio
+from email.utils import parsedate_to_datetime
+import logging
+import random
+import time
+from typing import Awaitable, Callable, Dict, Iterable, Optional, TypeVar
+from urllib.parse import urlparse
+from aiohttp import ClientError, ClientResponse
+from ..core.config import settings
+
+T = TypeVar('T')
+
+class RetryableStatusError(Exception):
+    """Raised for a response whose status is worth retrying"""
+
+    def __init__(self, url: str, status: int, retry_after: Optional[float] = None):
+        super().__init__(f"HTTP {status} for URL: {url}")
+        self.status = status
+        self.retry_after = retry_after
+
+class CircuitOpenError(Exception):
+    """Raised instead of sending a request to a host whose circuit is open"""
+
+    def __init__(self, host: str, retry_in: float):
+        super().__init__(f"Circuit open for {host}, retry in {retry_in:.1f}s")
+        self.host = host
+        self.retry_in = retry_in
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP date)"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+    After `failure_threshold` consecutive failures the circuit opens and
+    requests are refused for `reset_timeout` seconds. Then a single trial
+    request is let through (half-open): success closes the circuit, failure
+    opens it again.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        failure_threshold: int = settings.CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = settings.CIRCUIT_RESET_TIMEOUT
+    ):
+        self.host = host
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def before_request(self) -> None:
+        """Raise CircuitOpenError unless a request may be sent now"""
+        state = self.state
+        if state == "closed":
+            return
+        if state == "half-open" and not self._trial_in_flight:
+            self._trial_in_flight = True
+            return
+        retry_in = max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+        raise CircuitOpenError(self.host, retry_in)
+
+    def release_trial(self) -> None:
+        """Give up a half-open trial without an outcome"""
+        self._trial_in_flight = False
+
+    def record_success(self) -> None:
+        if self.opened_at is not None:
+            logging.info(f"Circuit for {self.host} closed again")
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self._trial_in_flight or (self.opened_at is None and self.failures >= self.failure_threshold):
+            logging.warning(
+                f"Opening circuit for {self.host} for {self.reset_timeout:.0f}s "
+                f"after {self.failures} consecutive failures"
+            )
+            self.opened_at = time.monotonic()
+        self._trial_in_flight = False
+
+class RetryEngine:
+    """
+    Retry policy shared by page and image fetches.
+    Only transient failures are retried: connection errors, timeouts and
+    retryable statuses (429, 5xx, ...). Waits use decorrelated jitter so
+    concurrent tasks don't retry in lockstep, and never undercut a
+    server's Retry-After. A circuit breaker per host stops sending requests
+    while the host keeps failing.
+    """
+
+    def __init__(
+        self,
+        attempts: int = settings.DEFAULT_RETRY_ATTEMPTS,
+        base_delay: float = settings.RETRY_DELAY,
+        max_delay: float = settings.RETRY_MAX_DELAY,
+        max_retry_after: float = settings.RETRY_AFTER_MAX,
+        retryable_statuses: Iterable[int] = settings.RETRYABLE_STATUSES,
+        failure_threshold: int = settings.CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = settings.CIRCUIT_RESET_TIMEOUT
+    ):
+        self.attempts = attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.max_retry_after = max_retry_after
+        self.retryable_statuses = frozenset(retryable_statuses)
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+
+    def breaker_for(self, url: str) -> CircuitBreaker:
+        host = urlparse(url).netloc
+        if host not in self._breakers:
+            self._breakers[host] = CircuitBreaker(host, self.failure_threshold, self.reset_timeout)
+        return self._breakers[host]
+
+    def raise_for_status(self, url: str, response: ClientResponse) -> None:
+        """Turn a retryable response into a RetryableStatusError"""
+        if response.status in self.retryable_statuses:
+            raise RetryableStatusError(
+                url, response.status, parse_retry_after(response.headers.get('Retry-After'))
+            )
+
+    def next_delay(self, previous: float) -> float:
+        """Decorrelated jitter: uniform between the base and three times the last wait"""
+        return min(self.max_delay, random.uniform(self.base_delay, max(self.base_delay, previous * 3)))
+
+    async def execute(self, url: str, operation: Callable[[], Awaitable[T]]) -> T:
+        """
+        Run `operation` (one request attempt) with retries.
+        Non-retryable errors propagate immediately; the last error is
+        re-raised once the retries are used up.
+        """
+        breaker = self.breaker_for(url)
+        delay = self.base_delay
+        for attempt in range(self.attempts + 1):
+            try:
+                breaker.before_request()
+            except CircuitOpenError as e:
+                if attempt == self.attempts:
+                    raise
+                # Shed load: wait out the open circuit without sending anything
+                wait = max(e.retry_in, self.base_delay) + random.uniform(0, self.base_delay)
+                logging.warning(f"{str(e)}; holding {url} for {wait:.1f}s")
+                await asyncio.sleep(wait)
+                continue
+
+            try:
+                result = await operation()
+            except RetryableStatusError as e:
+                breaker.record_failure()
+                if attempt == self.attempts:
+                    raise
+                delay = self.next_delay(delay)
+                if e.retry_after is not None:
+                    delay = max(delay, min(e.retry_after, self.max_retry_after))
+                logging.warning(f"HTTP {e.status} for {url}, retrying in {delay:.1f}s")
+            except (ClientError, asyncio.TimeoutError) as e:
+                breaker.record_failure()
+                if attempt == self.attempts:
+                    raise
+                delay = self.next_delay(delay)
+                logging.warning(f"Error fetching {url} ({str(e) or type(e).__name__}), retrying in {delay:.1f}s")
+            except BaseException:
+                # Not the host's fault (e.g. cancelled or a local error)
+                breaker.release_trial()
+                raise
+            else:
+                breaker.record_success()
+                return result
+
+            await asyncio.sleep(delay)
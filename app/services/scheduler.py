@@ -0,0 +1,238 @@
+# app/services/scheduler.py
+import asyncio
+from collections import OrderedDict, deque
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Deque, Dict, Optional, Tuple
+from urllib.parse import urlparse
+from ..core.config import settings
+
+class TokenBucket:
+    """Token bucket rate limiter used to pace requests against a single host"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and consume it"""
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Concurrency limiter that adjusts its ceiling AIMD-style.
+    Every healthy response grows the limit by roughly one slot per window,
+    while throttling (429), server errors (5xx), failures or latency above
+    the target shrink it multiplicatively.
+    """
+
+    def __init__(
+        self,
+        initial: int = settings.INITIAL_CONCURRENCY,
+        minimum: int = settings.MIN_CONCURRENCY,
+        maximum: int = settings.MAX_CONCURRENCY,
+        latency_target: float = settings.LATENCY_TARGET,
+        decrease_factor: float = 0.5
+    ):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self.in_flight = 0
+        self.avg_latency: Optional[float] = None
+        self._last_decrease = 0.0
+        self._condition = asyncio.Condition()
+
+    async def acquire(self) -> None:
+        async with self._condition:
+            while self.in_flight >= int(self.limit):
+                await self._condition.wait()
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        async with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def record(self, latency: float, status: Optional[int] = None, error: bool = False) -> None:
+        """Feed one observation into the AIMD controller"""
+        if self.avg_latency is None:
+            self.avg_latency = latency
+        else:
+            self.avg_latency = 0.8 * self.avg_latency + 0.2 * latency
+
+        congested = (
+            error
+            or status == 429
+            or (status is not None and status >= 500)
+            or self.avg_latency > self.latency_target
+        )
+
+        if congested:
+            # Only back off once per latency window so a burst of failures
+            # from requests already in flight doesn't collapse the limit to 1
+            now = time.monotonic()
+            if now - self._last_decrease >= max(self.avg_latency, 0.1):
+                self.limit = max(self.minimum, self.limit * self.decrease_factor)
+                self._last_decrease = now
+                logging.warning(
+                    f"Congestion detected (status={status}, error={error}, "
+                    f"avg_latency={self.avg_latency:.2f}s), concurrency limit now {int(self.limit)}"
+                )
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+class FairShareLimiter:
+    """
+    A fixed number of slots shared by several named sources.
+    No source holds more than its quota at once. Slots freed while sources
+    are waiting are handed out round robin, one source at a time, rather
+    than first come first served, so a large catalog can't starve a small one.
+    """
+
+    def __init__(
+        self,
+        capacity: int,
+        quotas: Optional[Dict[str, int]] = None,
+        default_quota: Optional[int] = None
+    ):
+        self.capacity = max(1, capacity)
+        self.quotas = quotas or {}
+        self.default_quota = default_quota or self.capacity
+        self.in_use = 0
+        self.held: Dict[str, int] = {}
+        # source -> waiting acquirers; the order is the round robin
+        self._waiters: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+
+    def quota(self, source: str) -> int:
+        return max(1, min(self.capacity, self.quotas.get(source, self.default_quota)))
+
+    def _can_grant(self, source: str) -> bool:
+        return self.in_use < self.capacity and self.held.get(source, 0) < self.quota(source)
+
+    def _grant(self, source: str) -> None:
+        self.in_use += 1
+        self.held[source] = self.held.get(source, 0) + 1
+
+    def _dispatch(self) -> None:
+        granted = True
+        while granted and self.in_use < self.capacity:
+            granted = False
+            for source in list(self._waiters):
+                waiters = self._waiters[source]
+                while waiters and waiters[0].done():
+                    waiters.popleft()  # cancelled while waiting
+                if not waiters:
+                    del self._waiters[source]
+                    continue
+                if not self._can_grant(source):
+                    continue
+                self._grant(source)
+                waiters.popleft().set_result(None)
+                self._waiters.move_to_end(source)
+                granted = True
+
+    async def acquire(self, source: str) -> None:
+        # Anyone still waiting is over quota or out of capacity, so
+        # granting straight away never jumps the queue
+        if not self._waiters.get(source) and self._can_grant(source):
+            self._grant(source)
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.setdefault(source, deque()).append(waiter)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Granted just as we were cancelled; pass the slot on
+                self.release(source)
+            raise
+
+    def release(self, source: str) -> None:
+        self.in_use -= 1
+        self.held[source] -= 1
+        if not self.held[source]:
+            del self.held[source]
+        self._dispatch()
+
+    @asynccontextmanager
+    async def slot(self, source: str):
+        await self.acquire(source)
+        try:
+            yield
+        finally:
+            self.release(source)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            source: {"held": self.held.get(source, 0), "waiting": len(self._waiters.get(source, ()))}
+            for source in dict.fromkeys([*self.held, *self._waiters])
+        }
+
+class CrawlScheduler:
+    """
+    Coordinates outbound requests for a crawl: an adaptive concurrency
+    ceiling plus a token bucket per host and exit address, so traffic
+    spread over several proxies isn't squeezed through a single host limit.
+    When several sources crawl at once, each has its own scheduler and
+    they all draw from one shared `budget` of request slots.
+    """
+
+    def __init__(
+        self,
+        limiter: Optional[AdaptiveConcurrencyLimiter] = None,
+        rate_per_host: float = settings.RATE_LIMIT_PER_HOST,
+        burst: int = settings.RATE_LIMIT_BURST,
+        budget: Optional[FairShareLimiter] = None,
+        source: str = "default"
+    ):
+        self.limiter = limiter or AdaptiveConcurrencyLimiter()
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.budget = budget
+        self.source = source
+        self._buckets: Dict[Tuple[str, Optional[str]], TokenBucket] = {}
+
+    def bucket_for(self, url: str, proxy: Optional[str] = None) -> TokenBucket:
+        key = (urlparse(url).netloc, proxy)
+        if key not in self._buckets:
+            self._buckets[key] = TokenBucket(self.rate_per_host, self.burst)
+        return self._buckets[key]
+
+    @asynccontextmanager
+    async def slot(self, url: str, proxy: Optional[str] = None):
+        """Hold a concurrency slot and a rate-limit token for one request"""
+        await self.limiter.acquire()
+        try:
+            if self.budget is None:
+                await self.bucket_for(url, proxy).acquire()
+                yield
+            else:
+                async with self.budget.slot(self.source):
+                    await self.bucket_for(url, proxy).acquire()
+                    yield
+        finally:
+            await self.limiter.release()
+
+    def record(self, latency: float, status: Optional[int] = None, error: bool = False) -> None:
+        self.limiter.record(latency, status, error)
+
+    @property
+    def concurrency_limit(self) -> int:
+        return int(self.limiter.limit)
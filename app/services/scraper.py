@@ -1,293 +1,602 @@
 # app/services/scraper.py
 from abc import ABC, abstractmethod
-from bs4 import BeautifulSoup
-import aiohttp
-from aiohttp import ClientSession, TCPConnector, ClientTimeout
-from bs4 import BeautifulSoup
+from aiohttp import ClientError, ClientSession, ClientTimeout
+import functools
 import asyncio
-from decimal import Decimal
+from contextlib import asynccontextmanager
 import os
-from typing import List, Optional
+import time
+from typing import AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urlparse
 from ..schemas.product import Product
 from ..core.config import settings
+from ..core.metrics import HTTP_RESPONSES, StageTimer
+from .scheduler import CrawlScheduler
+from .pipeline import STOP, drain_queue, flatten
+from .image_downloader import ImageDownloadPool
+from .image_store import ImageStore
+from .http_cache import HttpCache
+from .parsers import ListingPage, ListingParser
+from .progress import CrawlProgress
+from .http_client import SharedSession, create_http_session
+from .proxy_pool import PROXY_FAILURE_STATUSES, ProxyPool
+from .retry import RetryEngine, RetryableStatusError
+from .checkpoint import CheckpointStore, CrawlCheckpoint, create_checkpoint_store
 import logging
 import brotli
 
+class PageResponse(NamedTuple):
+    """Outcome of a page request that needs no further retries"""
+    status: int
+    body: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+
 class ScraperStrategy(ABC):
     """Abstract base class for scraping strategies"""
+
+    name: str = "default"  # identifies the source in the registry and in logs
     
     @abstractmethod
-    async def scrape(self, page_limit: Optional[int] = None, proxy: Optional[str] = None) -> List[Product]:
+    def stream_batches(
+        self,
+        page_limit: Optional[int] = None,
+        proxy: Optional[str] = None,
+        progress: Optional[CrawlProgress] = None,
+        resume: bool = True
+    ) -> AsyncIterator[List[Product]]:
+        """
+        Yield batches of products as soon as they are scraped, updating progress
+        if given. With `resume`, an interrupted crawl continues from its checkpoint.
+        """
         pass
 
+    async def list_pages(self, page_limit: Optional[int] = None, proxy: Optional[str] = None) -> List[str]:
+        """URLs of the listing pages to crawl; needed for distributed crawls"""
+        raise NotImplementedError(f"{type(self).__name__} does not support distributed crawls")
+
+    @property
+    def supports_distributed(self) -> bool:
+        """Whether this strategy implements list_pages, so its pages can go to crawl workers"""
+        return type(self).list_pages is not ScraperStrategy.list_pages
+
+    async def stream(self, page_limit: Optional[int] = None, proxy: Optional[str] = None) -> AsyncIterator[Product]:
+        """Yield products one at a time as they are scraped"""
+        async for batch in self.stream_batches(page_limit, proxy):
+            for product in batch:
+                yield product
+
+    async def scrape(self, page_limit: Optional[int] = None, proxy: Optional[str] = None) -> List[Product]:
+        """Collect every product into a list; prefer stream() for large catalogs"""
+        return [product async for product in self.stream(page_limit, proxy)]
+
 class DentalStallScraper(ScraperStrategy):
-    """Concrete implementation for scraping DentalStall website"""
+    """
+    Concrete implementation for scraping DentalStall website.
+    Other suppliers running a WooCommerce shop with the same theme can be
+    scraped by giving their shop URL as `base_url`. Products are keyed by
+    title everywhere, so other sources set `title_prefix` to keep their
+    titles apart from the ones DentalStall uses.
+    """
 
-    def __init__(self):
+    def __init__(
+        self,
+        name: str = "dentalstall",
+        base_url: Optional[str] = None,
+        scheduler: Optional[CrawlScheduler] = None,
+        image_store: Optional[ImageStore] = None,
+        http_cache: Optional[HttpCache] = None,
+        parser: Optional[ListingParser] = None,
+        shared_session: Optional[SharedSession] = None,
+        proxy_pool: Optional[ProxyPool] = None,
+        retry: Optional[RetryEngine] = None,
+        checkpoints: Optional[CheckpointStore] = None,
+        title_prefix: str = ""
+    ):
+        self.name = name
+        self.base_url = base_url or settings.BASE_URL
+        self.title_prefix = title_prefix
+        self.scheduler = scheduler or CrawlScheduler(source=name)
+        self.image_store = image_store or ImageStore()
+        self.http_cache = http_cache or HttpCache()
+        self.parser = parser or ListingParser(source=name)
+        self.shared_session = shared_session
+        self.proxy_pool = proxy_pool if proxy_pool is not None else ProxyPool(settings.PROXIES)
+        self.retry = retry or RetryEngine()
+        self.checkpoints = checkpoints or create_checkpoint_store()
         self.timeout = ClientTimeout(total=30, connect=10)
+        self.image_timeout = ClientTimeout(total=30)
+        shop = urlparse(self.base_url)
         self.headers = {
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
             'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
             'Accept-Language': 'en-US,en;q=0.9',
             'Accept-Encoding': 'gzip, deflate, br',
             'Connection': 'keep-alive',
-            'Cache-Control': 'no-cache',
-            'Pragma': 'no-cache'
+            'Referer': f'{shop.scheme}://{shop.netloc}/',
+            'sec-ch-ua': '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
+            'sec-ch-ua-mobile': '?0',
+            'sec-ch-ua-platform': '"macOS"',
+            'Sec-Fetch-Dest': 'document',
+            'Sec-Fetch-Mode': 'navigate',
+            'Sec-Fetch-Site': 'same-origin',
+            'Sec-Fetch-User': '?1',
+            'Upgrade-Insecure-Requests': '1'
         }
 
-    
+    @asynccontextmanager
+    async def open_session(self):
+        """The shared session when one was provided, otherwise a session for this run"""
+        if self.shared_session is not None:
+            yield await self.shared_session.get()
+            return
+        async with create_http_session() as session:
+            yield session
 
-    async def fetch_page(self, session: ClientSession, url: str, retry_count: int = 0) -> Optional[str]:
-        """Enhanced fetch_page method with better error handling"""
+    @asynccontextmanager
+    async def request(
+        self,
+        session: ClientSession,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[ClientTimeout] = None,
+        proxies: Optional[ProxyPool] = None
+    ):
+        """
+        GET a URL through the next proxy in the pool, holding a scheduler slot
+        for it. Latency and outcome are reported to both the scheduler and
+        the proxy pool once the caller is done with the response. Errors of
+        the caller's own, like a failed disk write, pass through without
+        counting against the host or the proxy.
+        """
+        proxies = proxies if proxies is not None else self.proxy_pool
+        proxy = proxies.acquire()
+        # Exactly one release per acquire; None means neither success nor
+        # failure (cancelled, or the caller's own error), which must not
+        # count against the proxy
+        proxy_ok: Optional[bool] = None
+        latency = 0.0
         try:
-            async with session.get(url, timeout=self.timeout, allow_redirects=True) as response:
+            async with self.scheduler.slot(url, proxy):
+                start = time.monotonic()
+                try:
+                    async with session.get(
+                        url,
+                        timeout=timeout or self.timeout,
+                        allow_redirects=True,
+                        headers={**self.headers, **(headers or {})},
+                        proxy=proxy
+                    ) as response:
+                        yield response
+                        status = response.status
+                except RetryableStatusError as e:
+                    latency = time.monotonic() - start
+                    HTTP_RESPONSES.inc(status=e.status)
+                    self.scheduler.record(latency, e.status)
+                    proxy_ok = e.status not in PROXY_FAILURE_STATUSES
+                    raise
+                except (ClientError, asyncio.TimeoutError):
+                    latency = time.monotonic() - start
+                    self.scheduler.record(latency, error=True)
+                    proxy_ok = False
+                    raise
+                latency = time.monotonic() - start
+                HTTP_RESPONSES.inc(status=status)
+                self.scheduler.record(latency, status)
+                proxy_ok = status not in PROXY_FAILURE_STATUSES
+        finally:
+            proxies.release(proxy, latency, proxy_ok)
+
+    async def fetch_response(
+        self,
+        session: ClientSession,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        proxies: Optional[ProxyPool] = None
+    ) -> PageResponse:
+        """Fetch a URL with retries; 200 and 304 are both final answers"""
+
+        async def attempt() -> PageResponse:
+            async with self.request(session, url, headers, proxies=proxies) as response:
                 logging.debug(f"Fetching URL: {url}, Status: {response.status}")
+                self.retry.raise_for_status(url, response)
+                content = await response.text() if response.status == 200 else None
+                return PageResponse(
+                    response.status,
+                    content,
+                    response.headers.get('ETag'),
+                    response.headers.get('Last-Modified')
+                )
 
-                if response.status == 200:
-                    content = await response.text()
-                    if not content.strip():
-                        logging.error(f"Empty response received from {url}")
-                        return None
-                    return content
-                else:
-                    logging.error(f"HTTP {response.status} for URL: {url}")
-                    
-                    if retry_count < settings.DEFAULT_RETRY_ATTEMPTS:
-                        wait_time = settings.RETRY_DELAY * (retry_count + 1)
-                        logging.warning(f"Retrying {url} after {wait_time} seconds...")
-                        await asyncio.sleep(wait_time)
-                        return await self.fetch_page(session, url, retry_count + 1)
-                    raise Exception(f"Failed to fetch {url} after {retry_count} retries")
-
-        except asyncio.TimeoutError:
-            logging.error(f"Timeout fetching {url}")
-            if retry_count < settings.DEFAULT_RETRY_ATTEMPTS:
-                await asyncio.sleep(settings.RETRY_DELAY)
-                return await self.fetch_page(session, url, retry_count + 1)
-            raise
+        # Retry waits happen outside the scheduler slot so sleeping
+        # requests don't hold concurrency that healthy ones could use
+        with StageTimer("fetch") as stage:
+            try:
+                response = await self.retry.execute(url, attempt)
+            except Exception as e:
+                logging.error(f"Error fetching {url}: {str(e)}")
+                raise
+            stage.size = len(response.body) if response.body else 0
+            stage.failed = response.status not in (200, 304)
 
-        except Exception as e:
-            logging.error(f"Error fetching {url}: {str(e)}")
-            if retry_count < settings.DEFAULT_RETRY_ATTEMPTS:
-                await asyncio.sleep(settings.RETRY_DELAY)
-                return await self.fetch_page(session, url, retry_count + 1)
-            raise
+        if response.status not in (200, 304):
+            # Not worth retrying (404, 410, ...)
+            logging.error(f"HTTP {response.status} for URL: {url}")
+            raise Exception(f"Failed to fetch {url}: HTTP {response.status}")
+        return response
+
+    async def fetch_listing(
+        self,
+        session: ClientSession,
+        url: str,
+        proxies: Optional[ProxyPool] = None
+    ) -> Tuple[Optional[str], Optional[Dict]]:
+        """
+        Fetch a listing page through the HTTP cache.
+        Returns the page HTML and, when the server answered 304, the cache
+        entry it was served from (which may carry already-parsed products).
+        """
+        cached = await self.http_cache.get(url)
+        response = await self.fetch_response(session, url, HttpCache.conditional_headers(cached), proxies=proxies)
+
+        if response.status == 304:
+            if cached and cached.get('body'):
+                logging.debug(f"Listing {url} not modified, using cached copy")
+                return cached['body'], cached
+            # We never sent validators we can't honour, but be safe
+            logging.warning(f"Unexpected 304 for {url} without a cached body, refetching")
+            response = await self.fetch_response(session, url, proxies=proxies)
+
+        content = response.body
+        if not content or not content.strip():
+            logging.error(f"Empty response received from {url}")
+            return None, None
 
+        await self.http_cache.put(url, content, response.etag, response.last_modified)
+        return content, None
 
-    async def download_image(self, session: ClientSession, image_url: str, product_title: str) -> str:
+    async def fetch_page(
+        self,
+        session: ClientSession,
+        url: str,
+        proxies: Optional[ProxyPool] = None
+    ) -> Optional[str]:
+        """Enhanced fetch_page method with better error handling"""
+        content, _ = await self.fetch_listing(session, url, proxies)
+        return content
+
+    async def download_image(
+        self,
+        session: ClientSession,
+        image_url: str,
+        product_title: str,
+        proxies: Optional[ProxyPool] = None
+    ) -> str:
         """
         Downloads and saves a product image with proper error handling and validation.
+        Images already in the store are revalidated with a conditional GET and
+        only downloaded again when they changed.
         Returns the path where the image was saved.
         """
+        with StageTimer("image") as stage:
+            filepath = await self._download_image(session, image_url, product_title, proxies, stage)
+            stage.failed = not filepath
+        return filepath
+
+    async def _download_image(
+        self,
+        session: ClientSession,
+        image_url: str,
+        product_title: str,
+        proxies: Optional[ProxyPool],
+        stage: StageTimer
+    ) -> str:
         try:
-            safe_title = "".join(c for c in product_title if c.isalnum() or c in (' ', '-', '_'))
-            safe_title = safe_title[:50].strip()
-            filename = f"{safe_title}.jpg"
-            
-            os.makedirs(settings.IMAGE_STORAGE_PATH, exist_ok=True)
-            filepath = os.path.join(settings.IMAGE_STORAGE_PATH, filename)
-            
-            # Download image with timeout
-            async with session.get(image_url, timeout=30) as response:
-                if response.status != 200:
-                    logging.error(f"Failed to download image for {product_title}: HTTP {response.status}")
-                    return ""
-                    
-                # Read and save image content
-                image_data = await response.read()
-                if not image_data:
-                    logging.error(f"No image data received for {product_title}")
-                    return ""
-                    
-                with open(filepath, 'wb') as f:
-                    f.write(image_data)
-                    
-                logging.debug(f"Successfully saved image for {product_title} to {filepath}")
-                return filepath
+            headers = self.image_store.conditional_headers(image_url)
+
+            async def attempt() -> Tuple[int, str]:
+                # Stream the image into the store with timeout
+                async with self.request(session, image_url, headers, self.image_timeout, proxies) as response:
+                    self.retry.raise_for_status(image_url, response)
+                    filepath = ""
+                    if response.status == 200:
+                        filepath = await self.image_store.store_response(image_url, response)
+                        stage.size = self.image_store.stored_size(image_url)
+                    return response.status, filepath
+
+            status, filepath = await self.retry.execute(image_url, attempt)
+
+            if status == 304:
+                filepath = self.image_store.mark_fresh(image_url)
+                if filepath:
+                    logging.debug(f"Image for {product_title} unchanged, reusing {filepath}")
+                    return filepath
+                logging.error(f"Got 304 for {product_title} but no stored image to reuse")
+                return ""
+
+            if status != 200:
+                logging.error(f"Failed to download image for {product_title}: HTTP {status}")
+                return ""
+                
+            if not filepath:
+                logging.error(f"No image data received for {product_title}")
+                return ""
                 
+            logging.debug(f"Successfully saved image for {product_title} to {filepath}")
+            return filepath
+            
         except Exception as e:
             logging.error(f"Error downloading image for {product_title}: {str(e)}")
             return ""
 
-    async def scrape(self, page_limit: Optional[int] = None, proxy: Optional[str] = None) -> List[Product]:
+    def page_url(self, page: int) -> str:
+        return f"{self.base_url}page/{page}/"
+
+    async def discover_total_pages(
+        self,
+        session: ClientSession,
+        page_limit: Optional[int] = None,
+        proxies: Optional[ProxyPool] = None
+    ) -> int:
+        """Fetch the shop's first page and read the page count from its pagination"""
+        html = await self.fetch_page(session, self.base_url, proxies)
+        logging.debug(f"Fetched page content: {html[:500]}")
+
+        total_pages = self.get_total_pages(await self.parser.parse(html))
+        if page_limit:
+            total_pages = min(total_pages, page_limit)
+        return total_pages
+
+    async def list_pages(self, page_limit: Optional[int] = None, proxy: Optional[str] = None) -> List[str]:
+        async with self.open_session() as session:
+            total_pages = await self.discover_total_pages(
+                session, page_limit, ProxyPool([proxy]) if proxy else None
+            )
+        return [self.page_url(page) for page in range(1, total_pages + 1)]
+
+    async def stream_batches(
+        self,
+        page_limit: Optional[int] = None,
+        proxy: Optional[str] = None,
+        progress: Optional[CrawlProgress] = None,
+        resume: bool = True
+    ) -> AsyncIterator[List[Product]]:
         """
         Main scraping method that coordinates the entire scraping process.
-        This method manages the session, handles pagination, and collects all products.
+        This method manages the session and pagination, and yields products
+        in batches as soon as they are ready. Page workers feed a bounded
+        queue, so a slow consumer applies back-pressure to the crawl.
         """
-        all_products = []
+        # An explicit proxy pins this run to it; otherwise use the shared pool
+        proxies = ProxyPool([proxy]) if proxy else self.proxy_pool
+        download = functools.partial(self.download_image, proxies=proxies)
 
-        self.headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/avif,image/webp,image/apng,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.9',
-            'Accept-Encoding': 'gzip, deflate, br',
-            'Connection': 'keep-alive',
-            'Referer': 'https://dentalstall.com/',
-            'sec-ch-ua': '"Not_A Brand";v="8", "Chromium";v="120", "Google Chrome";v="120"',
-            'sec-ch-ua-mobile': '?0',
-            'sec-ch-ua-platform': '"macOS"',
-            'Sec-Fetch-Dest': 'document',
-            'Sec-Fetch-Mode': 'navigate',
-            'Sec-Fetch-Site': 'same-origin',
-            'Sec-Fetch-User': '?1',
-            'Upgrade-Insecure-Requests': '1'
-        }
-
-        cookie_jar = aiohttp.CookieJar(unsafe=True)
+        checkpoint = CrawlCheckpoint(
+            self.checkpoints,
+            CrawlCheckpoint.key_for(base_url=self.base_url, page_limit=page_limit, proxy=proxy)
+        )
+        resumed = resume and await checkpoint.restore()
 
         try:
-            async with aiohttp.ClientSession(
-                headers=self.headers,
-                cookie_jar=cookie_jar,
-                connector=aiohttp.TCPConnector(ssl=False)
-            ) as session:
-                html = await self.fetch_page(session, settings.BASE_URL)
-                soup = BeautifulSoup(html, 'html.parser')
+            async with self.open_session() as session:
+                if resumed:
+                    total_pages = checkpoint.total_pages
+                    logging.info(
+                        f"Resuming {self.name} crawl from checkpoint: {len(checkpoint.pages)} of "
+                        f"{total_pages} pages already done"
+                    )
+                else:
+                    total_pages = await self.discover_total_pages(session, page_limit, proxies)
+                    await checkpoint.begin(total_pages)
+                if progress is not None:
+                    # Sources crawled in the same job add up
+                    progress.total_pages = (progress.total_pages or 0) + total_pages
 
-                logging.debug(f"Fetched page content: {html[:500]}")
+                # Replay pages finished before the interruption; their
+                # products may not have reached storage yet
+                for products in list(checkpoint.pages.values()):
+                    if products:
+                        yield [Product(**data) for data in products]
+                    if progress is not None:
+                        progress.pages_done += 1
 
+                logging.info(
+                    f"Starting scrape of {total_pages} pages from {self.name} "
+                    f"(concurrency limit {self.scheduler.concurrency_limit}, "
+                    f"max {settings.MAX_CONCURRENCY})"
+                )
                 
-                total_pages = self.get_total_pages(soup)
-                if page_limit:
-                    total_pages = min(total_pages, page_limit)
-                
-                logging.info(f"Starting scrape of {total_pages} pages")
-                
-                tasks = []
+                page_urls = asyncio.Queue()
                 for page in range(1, total_pages + 1):
-                    url = f"{settings.BASE_URL}page/{page}/"
-                    tasks.append(self.scrape_page(session, url))
-                
-                page_results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                for result in page_results:
-                    if isinstance(result, Exception):
-                        logging.error(f"Error scraping page: {str(result)}")
-                        continue
-                    all_products.extend(result)
+                    url = self.page_url(page)
+                    if url not in checkpoint.pages:
+                        page_urls.put_nowait(url)
+
+                results = asyncio.Queue(maxsize=settings.PIPELINE_QUEUE_SIZE)
+
+                async with ImageDownloadPool(download) as image_pool:
+
+                    async def page_worker():
+                        while True:
+                            try:
+                                url = page_urls.get_nowait()
+                            except asyncio.QueueEmpty:
+                                return
+                            async for product in self.iter_page(session, url, image_pool, progress, proxies, checkpoint):
+                                await results.put([product])
+                            if progress is not None:
+                                progress.pages_done += 1
+
+                    async def close_results(workers):
+                        for result in await asyncio.gather(*workers, return_exceptions=True):
+                            if isinstance(result, Exception):
+                                logging.error(f"Error scraping page: {str(result)}")
+                        await results.put(STOP)
+
+                    workers = [
+                        asyncio.create_task(page_worker())
+                        for _ in range(min(settings.MAX_CONCURRENCY, page_urls.qsize()))
+                    ]
+                    closer = asyncio.create_task(close_results(workers))
+
+                    total_products = 0
+                    try:
+                        # Hand over whatever has accumulated since the last
+                        # batch, so products flow as soon as they are ready
+                        while True:
+                            first = await results.get()
+                            if first is STOP:
+                                break
+                            batches, stopped = drain_queue(results, first)
+                            batch = flatten(batches)
+                            total_products += len(batch)
+                            yield batch
+                            if stopped:
+                                break
+                    finally:
+                        # Stop the crawl if the consumer goes away early
+                        for task in workers + [closer]:
+                            task.cancel()
+                        await self.image_store.flush()
                 
-                logging.info(f"Successfully scraped {len(all_products)} products total")
-                return all_products
+                logging.info(
+                    f"Successfully scraped {total_products} products from {self.name} "
+                    f"(final concurrency limit {self.scheduler.concurrency_limit})"
+                )
+                if len(proxies):
+                    logging.info(f"Proxy pool stats: {proxies.stats()}")
+                # Only a crawl that ran to the end forgets its checkpoint
+                await checkpoint.clear()
 
         except Exception as e:
             logging.error(f"Error in scraping process: {str(e)}")
             raise
 
-    async def scrape_page(self, session: ClientSession, url: str) -> List[Product]:
+    async def iter_page(
+        self,
+        session: ClientSession,
+        url: str,
+        image_pool: ImageDownloadPool,
+        progress: Optional[CrawlProgress] = None,
+        proxies: Optional[ProxyPool] = None,
+        checkpoint: Optional[CrawlCheckpoint] = None
+    ) -> AsyncIterator[Product]:
         """
         Scrapes a single page of products from DentalStall.
         The site uses WooCommerce with a custom theme structure.
+        Image downloads are handed to the pool, and each product is yielded
+        as soon as its image job completes.
         """
-        products_on_page = []
-        
         try:
-            html = await self.fetch_page(session, url)
-            soup = BeautifulSoup(html, 'html.parser')
-            
-            product_elements = soup.find_all('li', class_='product')
-            logging.info(f"Found {len(product_elements)} product elements on {url}")
+            html, cached = await self.fetch_listing(session, url, proxies)
+        except Exception as e:
+            logging.error(f"Error scraping page {url}: {str(e)}", exc_info=True)
+            if progress is not None:
+                progress.errors += 1
+            return
+
+        # Fast path: the page is unchanged and we still have its products
+        cached_products = self._reusable_products(cached)
+        if cached_products is not None:
+            logging.info(f"Page {url} not modified, reusing {len(cached_products)} cached products")
+            for product in cached_products:
+                yield product
+            if checkpoint is not None:
+                await checkpoint.page_done(url, cached['products'])
+            return
+
+        try:
+            page = await self.parser.parse(html)
+        except Exception as e:
+            logging.error(f"Error scraping page {url}: {str(e)}", exc_info=True)
+            if progress is not None:
+                progress.errors += 1
+            return
             
-            for element in product_elements:
-                try:
-                    title_container = element.find('h2', class_='woo-loop-product__title')
-                    if title_container and title_container.a:
-                        title = title_container.a.text.strip()
-                    else:
-                        continue
-                    
-                    price_container = element.find('div', class_='mf-product-price-box')
-                    if not price_container:
-                        continue
-                        
-                    price_element = (
-                        price_container.find('ins', recursive=True) or 
-                        price_container.find('span', class_='woocommerce-Price-amount', recursive=True)
-                    )
-                    
-                    if not price_element:
-                        continue
-                    
-                    amount_element = price_element.find('bdi')
-                    if not amount_element:
-                        continue
-                        
-                    price_text = amount_element.text.strip()
-                    price = Decimal(
-                        price_text.replace('₹', '')
-                        .replace(',', '')
-                        .replace('/-', '')
-                        .strip()
-                    )
-                    
-                    img_container = element.find('div', class_='mf-product-thumbnail')
-                    if not img_container:
-                        continue
-                        
-                    img_element = img_container.find('img')
-                    if not img_element:
-                        continue
-                    
-                    image_url = (
-                        img_element.get('data-lazy-src') or 
-                        img_element.get('src')
-                    )
-                    
-                    if not image_url or image_url.endswith('svg+xml'):
+        logging.info(f"Found {page.element_count} product elements on {url}")
+
+        pending = {}
+        emitted = []
+        complete = True
+        try:
+            for title, price, image_url in page.products:
+                future = await image_pool.submit(session, image_url, title)
+                pending[future] = (title, price)
+
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for future in done:
+                    title, price = pending.pop(future)
+                    if future.cancelled():
+                        complete = False
                         continue
-                    
-                    image_path = await self.download_image(session, image_url, title)
+
+                    image_path = future.result()
                     if not image_path:
+                        complete = False
+                        if progress is not None:
+                            progress.errors += 1
                         continue
-                    
-                    product = Product(
-                        product_title=title,
-                        product_price=price,
-                        path_to_image=image_path
-                    )
-                    
-                    products_on_page.append(product)
-                    logging.info(f"Successfully processed product: {title} - ₹{price}")
-                    
-                except Exception as e:
-                    logging.error(f"Error processing product: {str(e)}", exc_info=True)
-                    continue
-            
-            return products_on_page
-            
-        except Exception as e:
-            logging.error(f"Error scraping page {url}: {str(e)}", exc_info=True)
-            return products_on_page
 
-    def get_total_pages(self, soup: BeautifulSoup) -> int:
-        """
-        Extract total number of pages from the pagination.
-        The website shows pagination like: 1, 2, 3, 4, ..., 117, 118, 119
-        """
-        try:
-            pagination = soup.find('ul', class_='page-numbers')
-            if not pagination:
-                logging.warning("No pagination found, defaulting to 1 page")
-                return 1
+                    try:
+                        product = Product(
+                            product_title=f"{self.title_prefix}{title}",
+                            product_price=price,
+                            path_to_image=image_path
+                        )
+                    except Exception as e:
+                        logging.error(f"Error processing product: {str(e)}", exc_info=True)
+                        continue
 
-            page_numbers = pagination.find_all('a', class_='page-numbers')
-            
-            if not page_numbers:
-                return 1
-
-            max_page = 1
-            for page in page_numbers:
-                if 'next' in page.get('class', []):
-                    continue
-                    
-                try:
-                    page_num = int(page.text.strip())
-                    max_page = max(max_page, page_num)
-                except ValueError:
-                    continue
+                    if not settings.LOW_OVERHEAD_MODE:
+                        logging.info(f"Successfully processed product: {title} - ₹{price}")
+                    emitted.append(product)
+                    yield product
 
-            logging.info(f"Total pages found: {max_page}")
-            return max_page
+            # Only remember the page's products when every image made it,
+            # otherwise a 304 next run would silently drop the missing ones
+            if complete:
+                products = [product.model_dump(mode='json') for product in emitted]
+                await self.http_cache.put_products(url, products)
+                if checkpoint is not None:
+                    await checkpoint.page_done(url, products)
+        finally:
+            for future in pending:
+                future.cancel()
 
+    @staticmethod
+    def _reusable_products(cached: Optional[Dict]) -> Optional[List[Product]]:
+        """Products from a cache entry, if all of their images are still on disk"""
+        if not cached or cached.get('products') is None:
+            return None
+        try:
+            products = [Product(**data) for data in cached['products']]
         except Exception as e:
-            logging.error(f"Error determining total pages: {str(e)}")
-            return 1
\ No newline at end of file
+            logging.warning(f"Discarding cached products for {cached.get('url')}: {str(e)}")
+            return None
+        if any(not product.path_to_image or not os.path.exists(product.path_to_image) for product in products):
+            return None
+        return products
+
+    async def scrape_page(
+        self,
+        session: ClientSession,
+        url: str,
+        image_pool: Optional[ImageDownloadPool] = None
+    ) -> List[Product]:
+        """Scrape a single page and return all of its products"""
+        if image_pool is None:
+            async with ImageDownloadPool(self.download_image) as pool:
+                return [product async for product in self.iter_page(session, url, pool)]
+        return [product async for product in self.iter_page(session, url, image_pool)]
+
+    def get_total_pages(self, page: ListingPage) -> int:
+        """
+        Total number of pages from the parsed pagination.
+        The website shows pagination like: 1, 2, 3, 4, ..., 117, 118, 119
+        """
+        if page.total_pages is None:
+            logging.warning("No pagination found, defaulting to 1 page")
+            return 1
+        logging.info(f"Total pages found: {page.total_pages}")
+        return page.total_pages
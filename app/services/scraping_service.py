@@ -1,10 +1,20 @@
 # app/services/scraping_service.py
+import asyncio
 import logging
-from typing import Dict, List, Optional
+import uuid
+from redis.exceptions import RedisError
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 from .scraper import ScraperStrategy, DentalStallScraper
-from .storage import StorageStrategy, JsonFileStorage
-from .notifier import EmailNotifier, NotificationStrategy, ConsoleNotifier
-from ..cache.redis_cache import RedisCache
+from .storage import StorageStrategy, create_storage
+from .notifier import EmailNotifier, NotificationDispatcher, NotificationStrategy, ConsoleNotifier
+from .price_history import PriceHistoryStore
+from .search_index import ProductSearchIndex
+from .progress import CrawlProgress
+from .work_queue import RedisWorkQueue
+from .pipeline import STOP, drain_queue, flatten, put_or_fail
+from ..cache.tiered_cache import TieredPriceCache
+from ..core.config import settings
+from ..core.metrics import PRODUCTS_SCRAPED, PRODUCTS_UPDATED, SCRAPE_RUNS, StageTimer, track_run
 from ..schemas.product import Product
 from decimal import Decimal
 
@@ -13,63 +23,282 @@ class ScrapingService:
     
     def __init__(
         self,
-        scraper: ScraperStrategy = DentalStallScraper(),
-        storage: StorageStrategy = JsonFileStorage(),
-        conoleNotifier: NotificationStrategy = ConsoleNotifier(),
-        emailNotifier: NotificationStrategy = EmailNotifier(),
-        cache: RedisCache = RedisCache()
+        scraper: Optional[ScraperStrategy] = None,
+        storage: Optional[StorageStrategy] = None,
+        conoleNotifier: Optional[NotificationStrategy] = None,
+        emailNotifier: Optional[NotificationStrategy] = None,
+        cache: Optional[TieredPriceCache] = None,
+        price_history: Optional[PriceHistoryStore] = None,
+        work_queue: Optional[RedisWorkQueue] = None,
+        search_index: Optional[ProductSearchIndex] = None
     ):
-        self.scraper = scraper
-        self.storage = storage
-        self.conoleNotifier = conoleNotifier
-        self.emailNotifier = emailNotifier
-        self.cache = cache
+        # Components are built per instance rather than as default arguments,
+        # so importing this module doesn't touch files or the network
+        self.scraper = scraper or DentalStallScraper()
+        self.storage = storage or create_storage()
+        self.conoleNotifier = conoleNotifier or ConsoleNotifier()
+        # Mail goes out in the background so a slow SMTP server can't hold up or fail a scrape
+        self.emailNotifier = emailNotifier or NotificationDispatcher(EmailNotifier())
+        self.cache = cache or TieredPriceCache()
+        self.price_history = price_history or PriceHistoryStore()
+        self.work_queue = work_queue or RedisWorkQueue(self.cache.redis)
+        self.search_index = search_index or ProductSearchIndex()
+        self._search_index_loaded: Optional[asyncio.Task] = None
+
+    async def diff_against_cache(self, products: List[Product]) -> List[Product]:
+        """Cache-diff stage: return the products whose price changed and refresh the cache"""
+        with StageTimer("cache_lookup", items=len(products)):
+            cached_prices = await self.cache.get_prices(
+                [product.product_title for product in products]
+            )
+
+        log_products = not settings.LOW_OVERHEAD_MODE and logging.getLogger().isEnabledFor(logging.DEBUG)
+        changed = []
+        for product in products:
+            cached_price = cached_prices.get(product.product_title)
+            if log_products:
+                logging.debug(
+                    f"Scraped product: {product.product_title} - {product.product_price} "
+                    f"(cached price: {cached_price})"
+                )
+            if cached_price is None or cached_price != float(product.product_price):
+                changed.append(product)
+
+        if changed:
+            await self.cache.set_prices({
+                product.product_title: float(product.product_price)
+                for product in changed
+            })
+        return changed
+
+    async def _storage_stage(self, queue: asyncio.Queue) -> None:
+        """Storage stage: upsert changed products, coalescing batches that queue up"""
+        while True:
+            first = await queue.get()
+            if first is STOP:
+                return
+            batches, stopped = drain_queue(queue, first)
+            products = flatten(batches)
+            with StageTimer("storage_write", items=len(products)):
+                await self.storage.upsert_products(products)
+            self.search_index.update(products)
+            if stopped:
+                return
+
+    async def process_product_stream(
+        self,
+        batches: AsyncIterator[List[Product]],
+        progress: Optional[CrawlProgress] = None
+    ) -> Dict[str, int]:
+        """
+        Run the cache-diff and storage stages over a stream of scraped batches.
+        Each batch is diffed as soon as it arrives and changed products are
+        handed to the storage stage through a bounded queue.
+        """
+        stats = {"total": 0, "updated": 0, "price_changes": 0}
+        storage_queue = asyncio.Queue(maxsize=settings.PIPELINE_QUEUE_SIZE)
+        storage_task = asyncio.create_task(self._storage_stage(storage_queue))
+
+        try:
+            async for batch in batches:
+                stats["total"] += len(batch)
+                changed = await self.diff_against_cache(batch)
+                stats["updated"] += len(changed)
+                # The history store does its own change detection, so cache
+                # expiry never shows up as a fake price movement
+                stats["price_changes"] += await self.price_history.record_prices({
+                    product.product_title: float(product.product_price)
+                    for product in batch
+                })
+                if progress is not None:
+                    progress.products = stats["total"]
+                    progress.updated = stats["updated"]
+                if changed:
+                    await put_or_fail(storage_queue, changed, storage_task)
+
+            await put_or_fail(storage_queue, STOP, storage_task)
+            await storage_task
+        except BaseException:
+            storage_task.cancel()
+            raise
+
+        return stats
 
     async def process_scraped_products(
         self,
         products: List[Product]
     ) -> Dict[str, int]:
         """Process scraped products and update storage if needed"""
-        stats = {"total": len(products), "updated": 0}
-        
-        existing_products = await self.storage.load_products()
-        existing_dict = {p.product_title: p for p in existing_products}
-
-        print(products,"products")
-        
-        products_to_update = []
-        for product in products:
-            print(f"Scraped product: {product.product_title} - {product.product_price}")
-            cached_price = await self.cache.get_product_price(product.product_title)
-            print(f"Cached price for {product.product_title}: {cached_price}")
+        async def single_batch():
+            yield products
 
+        return await self.process_product_stream(single_batch())
 
-            if cached_price is None or cached_price != float(product.product_price):
-                products_to_update.append(product)
-                await self.cache.set_product_price(
-                    product.product_title,
-                    float(product.product_price)
-                )
-                stats["updated"] += 1
+    async def get_stored_products(
+        self,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        title: Optional[str] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Product]:
+        """One page of stored products, ordered by title"""
+        return await self.storage.query_products(
+            min_price=min_price,
+            max_price=max_price,
+            title=title,
+            after=after,
+            limit=limit
+        )
+
+    async def iter_stored_products(
+        self,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        title: Optional[str] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None,
+        chunk_size: int = settings.PRODUCTS_STREAM_CHUNK_SIZE
+    ) -> AsyncIterator[Product]:
+        """Walk stored products chunk by chunk so callers never hold the whole catalog"""
+        remaining = limit
+        while remaining is None or remaining > 0:
+            size = chunk_size if remaining is None else min(chunk_size, remaining)
+            chunk = await self.get_stored_products(min_price, max_price, title, after, size)
+            for product in chunk:
+                yield product
+            if len(chunk) < size:
+                return
+            after = chunk[-1].product_title
+            if remaining is not None:
+                remaining -= len(chunk)
 
+    async def search_products(
+        self,
+        query: str,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        limit: int = 20,
+        fuzzy: bool = True
+    ) -> List[Tuple[Product, float]]:
+        """Search product titles; the index is filled from storage on first use"""
+        load = self._search_index_loaded
+        if load is None or (load.done() and (load.cancelled() or load.exception() is not None)):
+            load = self._search_index_loaded = asyncio.create_task(
+                self.search_index.load(self.iter_stored_products())
+            )
+        # Shielded so one cancelled request doesn't abort the load for everyone
+        await asyncio.shield(load)
+        return self.search_index.search(query, min_price, max_price, limit, fuzzy)
 
-        if products_to_update:
-            await self.storage.save_products(products_to_update)
+    async def get_price_history(
+        self,
+        product_title: str,
+        start: Optional[float] = None,
+        end: Optional[float] = None
+    ) -> Optional[List[Tuple[float, float]]]:
+        return await self.price_history.get_history(product_title, start, end)
 
-        return stats
+    async def get_price_changes(self, since: float, limit: Optional[int] = None) -> List[Dict]:
+        return await self.price_history.changed_since(since, limit)
 
-    async def run_scraping(
+    async def catalog_version(self) -> Optional[str]:
+        return await self.storage.catalog_version()
+
+    async def distributed_batches(
         self,
         page_limit: Optional[int] = None,
-        proxy: Optional[str] = None
+        progress: Optional[CrawlProgress] = None
+    ) -> AsyncIterator[List[Product]]:
+        """
+        Crawl through the shared work queue instead of in this process.
+        Page URLs are enqueued for the crawl workers and their results are
+        merged here: a page delivered twice (after a lease expired) only
+        contributes products whose price we haven't already seen this run.
+        """
+        run_id = uuid.uuid4().hex
+        urls = await self.scraper.list_pages(page_limit)
+        if progress is not None:
+            progress.total_pages = len(urls)
+        await self.work_queue.enqueue(run_id, urls)
+        logging.info(f"Distributed crawl {run_id}: queued {len(urls)} pages for workers")
+
+        seen_pages = set()
+        emitted: Dict[str, float] = {}
+        finished = False
+        try:
+            async for result in self.work_queue.results(run_id, len(urls)):
+                if result['url'] not in seen_pages:
+                    seen_pages.add(result['url'])
+                    if progress is not None:
+                        progress.pages_done += 1
+                        if result['status'] != "done":
+                            progress.errors += 1
+
+                batch = []
+                for data in result['products']:
+                    product = Product(**data)
+                    price = float(product.product_price)
+                    if emitted.get(product.product_title) == price:
+                        continue
+                    emitted[product.product_title] = price
+                    batch.append(product)
+                if batch:
+                    yield batch
+            finished = True
+        finally:
+            if not finished:
+                # Don't leave orphaned pages for the workers
+                try:
+                    await self.work_queue.cancel(run_id, urls)
+                except RedisError as e:
+                    logging.error(f"Could not cancel distributed crawl {run_id}: {str(e)}")
+
+    def check_scrape_options(
+        self,
+        proxy: Optional[str] = None,
+        resume: Optional[bool] = None,
+        distributed: bool = False
     ) -> None:
-        """Run the complete scraping process"""
+        """Raise ValueError for options the crawl would otherwise silently ignore"""
+        if not distributed:
+            return
+        if not self.scraper.supports_distributed:
+            raise ValueError(f"{type(self.scraper).__name__} does not support distributed crawls")
+        # Workers crawl through their own PROXIES and keep no checkpoints
+        if proxy:
+            raise ValueError("proxy is not supported for distributed crawls")
+        if resume is not None:
+            raise ValueError("resume is not supported for distributed crawls")
+
+    async def run_scraping(
+        self,
+        page_limit: Optional[int] = None,
+        proxy: Optional[str] = None,
+        progress: Optional[CrawlProgress] = None,
+        resume: Optional[bool] = None,
+        distributed: bool = False
+    ) -> Dict:
+        """Run the complete scraping process; `resume` defaults to true outside distributed mode"""
+        self.check_scrape_options(proxy, resume, distributed)
         try:
-            # Scrape products
-            products = await self.scraper.scrape(page_limit, proxy)
-            
-            stats = await self.process_scraped_products(products)
-            
+            with track_run() as stages:
+                if distributed:
+                    batches = self.distributed_batches(page_limit, progress)
+                else:
+                    batches = self.scraper.stream_batches(
+                        page_limit, proxy, progress, True if resume is None else resume
+                    )
+                # Scrape and process products as they stream in
+                stats = await self.process_product_stream(batches, progress)
+            stats["stages"] = stages.to_dict()
+            SCRAPE_RUNS.inc(status="success")
+            PRODUCTS_SCRAPED.inc(stats["total"])
+            PRODUCTS_UPDATED.inc(stats["updated"])
+
+            logging.info(f"Price cache stats: {self.cache.stats()}")
+            logging.info(f"Stage timings: {stats['stages']}")
+
             message = (
                 f"Scraping completed successfully!\n"
                 f"Total products scraped: {stats['total']}\n"
@@ -77,8 +306,17 @@ class ScrapingService:
             )
             await self.conoleNotifier.notify(message)
             await self.emailNotifier.notify("Scraping completed successfully!")
+            return stats
             
         except Exception as e:
+            SCRAPE_RUNS.inc(status="failed")
             error_message = f"Scraping failed: {str(e)}"
             await self.conoleNotifier.notify(error_message)
-            raise
\ No newline at end of file
+            raise
+
+    async def close(self) -> None:
+        """Flush pending cache writes and notifications and release storage resources"""
+        await self.cache.close()
+        await self.storage.close()
+        await self.emailNotifier.close()
+        await self.conoleNotifier.close()
@@ -0,0 +1,251 @@
+# app/services/search_index.py
+from bisect import bisect_left, insort
+import heapq
+import math
+import re
+from typing import AsyncIterable, Dict, Iterable, List, Optional, Set, Tuple
+from ..core.config import settings
+from ..schemas.product import Product
+
+TOKEN_PATTERN = re.compile(r"\w+")
+# Floating point slack when comparing summed scores
+SCORE_EPSILON = 1e-9
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.casefold())
+
+def tie_order(title: str) -> Tuple[int, str]:
+    """Among equal scores, shorter and then alphabetically first titles rank higher"""
+    return len(title), title
+
+def trigrams(token: str) -> Set[str]:
+    padded = f" {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+class ProductSearchIndex:
+    """
+    In-memory search over product titles.
+    Title tokens go into an inverted index (token -> products) and the token
+    vocabulary into a trigram index (trigram -> tokens). A query token is
+    matched exactly, as a prefix, and fuzzily against vocabulary tokens
+    with similar trigrams, so typos still find products. Matches are scored
+    by rarity (IDF) weighted by how close the match is. The index is updated
+    product by product as the catalog changes; it is never rebuilt.
+    """
+
+    def __init__(
+        self,
+        fuzzy_threshold: float = settings.SEARCH_FUZZY_THRESHOLD,
+        max_expansions: int = settings.SEARCH_MAX_EXPANSIONS
+    ):
+        self.fuzzy_threshold = fuzzy_threshold
+        self.max_expansions = max_expansions
+        self._products: Dict[str, Product] = {}
+        self._postings: Dict[str, Set[str]] = {}  # token -> titles
+        self._trigrams: Dict[str, Set[str]] = {}  # trigram -> tokens
+        self._trigram_counts: Dict[str, int] = {}  # token -> number of distinct trigrams
+        self._vocabulary: List[str] = []  # sorted, for prefix matches
+        self._ranked: List[str] = []  # every title in tie order
+
+    def __len__(self) -> int:
+        return len(self._products)
+
+    def _add_token(self, token: str, title: str) -> None:
+        postings = self._postings.get(token)
+        if postings is None:
+            postings = self._postings[token] = set()
+            insort(self._vocabulary, token)
+            token_trigrams = trigrams(token)
+            self._trigram_counts[token] = len(token_trigrams)
+            for trigram in token_trigrams:
+                self._trigrams.setdefault(trigram, set()).add(token)
+        postings.add(title)
+
+    def _remove_token(self, token: str, title: str) -> None:
+        postings = self._postings.get(token)
+        if postings is None:
+            return
+        postings.discard(title)
+        if postings:
+            return
+        del self._postings[token]
+        del self._trigram_counts[token]
+        del self._vocabulary[bisect_left(self._vocabulary, token)]
+        for trigram in trigrams(token):
+            tokens = self._trigrams.get(trigram)
+            if tokens is not None:
+                tokens.discard(token)
+                if not tokens:
+                    del self._trigrams[trigram]
+
+    def add(self, product: Product, replace: bool = True) -> None:
+        """Index a product, or refresh its price; with replace=False an indexed title is kept"""
+        title = product.product_title
+        if title in self._products:
+            if replace:
+                # The title is the key, so its tokens can't have changed
+                self._products[title] = product
+            return
+        self._products[title] = product
+        insort(self._ranked, title, key=tie_order)
+        for token in set(tokenize(title)):
+            self._add_token(token, title)
+
+    def update(self, products: Iterable[Product]) -> None:
+        for product in products:
+            self.add(product)
+
+    def remove(self, title: str) -> None:
+        if self._products.pop(title, None) is None:
+            return
+        del self._ranked[bisect_left(self._ranked, tie_order(title), key=tie_order)]
+        for token in set(tokenize(title)):
+            self._remove_token(token, title)
+
+    async def load(self, products: AsyncIterable[Product]) -> None:
+        """
+        Fill the index from storage. Titles already indexed keep their entry,
+        since an update that raced with the load is newer than storage.
+        """
+        async for product in products:
+            self.add(product, replace=False)
+
+    def _expand(self, token: str, fuzzy: bool) -> Dict[str, float]:
+        """Vocabulary tokens matching a query token, with a 0..1 closeness weight"""
+        matches: Dict[str, float] = {}
+        if token in self._postings:
+            matches[token] = 1.0
+
+        start = bisect_left(self._vocabulary, token)
+        for candidate in self._vocabulary[start:start + self.max_expansions]:
+            if not candidate.startswith(token):
+                break
+            matches.setdefault(candidate, 0.8 * len(token) / len(candidate))
+
+        if fuzzy and len(token) >= 3:
+            query = trigrams(token)
+            shared: Dict[str, int] = {}
+            for trigram in query:
+                for candidate in self._trigrams.get(trigram, ()):
+                    shared[candidate] = shared.get(candidate, 0) + 1
+            similar = []
+            for candidate, count in shared.items():
+                # Jaccard similarity of the two trigram sets
+                similarity = count / (len(query) + self._trigram_counts[candidate] - count)
+                if similarity >= self.fuzzy_threshold:
+                    similar.append((similarity, candidate))
+            for similarity, candidate in heapq.nlargest(self.max_expansions, similar):
+                if candidate not in matches:
+                    matches[candidate] = 0.6 * similarity
+        return matches
+
+    def search(
+        self,
+        query: str,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        limit: int = 20,
+        fuzzy: bool = True
+    ) -> List[Tuple[Product, float]]:
+        """
+        Best matching products with their scores, highest first.
+        Matching titles are kept in groups by score, and each query term
+        moves whole groups with set operations rather than scoring titles
+        one by one. Terms go strongest first; once `limit` titles already
+        score more than the remaining terms could give an unseen title,
+        those terms only re-score titles already found (MaxScore pruning).
+        """
+        total = len(self._products)
+        terms = []
+        for token in dict.fromkeys(tokenize(query)):
+            matches = [
+                (weight * math.log(1 + total / len(self._postings[match])), self._postings[match])
+                for match, weight in self._expand(token, fuzzy).items()
+            ]
+            if matches:
+                # A title counts with its best match for the term
+                matches.sort(key=lambda match: match[0], reverse=True)
+                terms.append(matches)
+        if limit <= 0 or not terms:
+            return []
+        terms.sort(key=lambda matches: matches[0][0], reverse=True)
+        # Most that terms[i:] can still add to a title
+        remaining = [0.0] * (len(terms) + 1)
+        for i in range(len(terms) - 1, -1, -1):
+            remaining[i] = remaining[i + 1] + terms[i][0][0]
+        filtered = min_price is not None or max_price is not None
+
+        groups: Dict[float, Set[str]] = {}  # score -> titles
+        seen: Set[str] = set()
+        for i, matches in enumerate(terms):
+            # Score of the limit-th best title so far; no title can end lower.
+            # A title that can only tie it may still win on tie order, and
+            # the sums are rounded, so ties are compared with a tolerance.
+            threshold = self._threshold(groups, limit)
+            if threshold is not None:
+                threshold -= SCORE_EPSILON
+                groups = {score: titles for score, titles in groups.items() if score + remaining[i] >= threshold}
+            admit = threshold is None or remaining[i] >= threshold
+
+            # The group sets are this call's own, so they are reused in place
+            scored: Dict[float, Set[str]] = {}
+            for score, titles in groups.items():
+                for weight, postings in matches:
+                    hits = titles & postings
+                    if hits:
+                        self._merge(scored, score + weight, hits)
+                        titles -= hits
+                if titles:
+                    self._merge(scored, score, titles)
+
+            if admit:
+                for weight, postings in matches:
+                    new = postings - seen
+                    if filtered:
+                        new = {title for title in new if self._in_price_range(title, min_price, max_price)}
+                    if new:
+                        seen |= new
+                        self._merge(scored, weight, new)
+            groups = scored
+
+        results: List[Tuple[float, str]] = []
+        for score in sorted(groups, reverse=True):
+            wanted = limit - len(results)
+            results.extend((score, title) for title in self._first_ranked(groups[score], wanted))
+            if len(results) >= limit:
+                break
+        return [(self._products[title], round(score, 4)) for score, title in results]
+
+    @staticmethod
+    def _merge(groups: Dict[float, Set[str]], score: float, titles: Set[str]) -> None:
+        group = groups.get(score)
+        if group is None:
+            groups[score] = titles
+        else:
+            group |= titles
+
+    @staticmethod
+    def _threshold(groups: Dict[float, Set[str]], limit: int) -> Optional[float]:
+        count = 0
+        for score in sorted(groups, reverse=True):
+            count += len(groups[score])
+            if count >= limit:
+                return score
+        return None
+
+    def _first_ranked(self, titles: Set[str], wanted: int) -> List[str]:
+        """The first `wanted` of `titles` in tie order"""
+        if len(titles) * len(titles) <= wanted * len(self._ranked):
+            # Small group: sorting it is cheaper than scanning for it
+            return sorted(titles, key=tie_order)[:wanted]
+        found = []
+        for title in self._ranked:
+            if title in titles:
+                found.append(title)
+                if len(found) >= wanted:
+                    break
+        return found
+
+    def _in_price_range(self, title: str, min_price: Optional[float], max_price: Optional[float]) -> bool:
+        price = self._products[title].product_price
+        return (min_price is None or price >= min_price) and (max_price is None or price <= max_price)
@@ -0,0 +1,183 @@
+# app/services/sources.py
+import asyncio
+from itertools import chain, zip_longest
+import logging
+from typing import AsyncIterator, Dict, Iterable, Iterator, List, Optional
+from ..core.config import settings
+from ..schemas.product import Product
+from .checkpoint import CheckpointStore, create_checkpoint_store
+from .http_cache import HttpCache
+from .http_client import SharedSession
+from .image_store import ImageStore
+from .parsers import ListingParser
+from .pipeline import STOP, drain_queue, flatten
+from .progress import CrawlProgress
+from .proxy_pool import ProxyPool
+from .retry import RetryEngine
+from .scheduler import CrawlScheduler, FairShareLimiter
+from .scraper import DentalStallScraper, ScraperStrategy
+
+# The original source; its products keep their bare titles
+PRIMARY_SOURCE = "dentalstall"
+
+class ScraperRegistry:
+    """Scraper strategies by source name, one per supplier"""
+
+    def __init__(self, scrapers: Iterable[ScraperStrategy] = ()):
+        self._scrapers: Dict[str, ScraperStrategy] = {}
+        for scraper in scrapers:
+            self.register(scraper)
+
+    def register(self, scraper: ScraperStrategy) -> None:
+        if scraper.name in self._scrapers:
+            raise ValueError(f"A source named {scraper.name} is already registered")
+        self._scrapers[scraper.name] = scraper
+
+    def get(self, name: str) -> ScraperStrategy:
+        return self._scrapers[name]
+
+    def for_url(self, url: str) -> Optional[ScraperStrategy]:
+        """The source whose shop URL is the longest prefix of `url`"""
+        best, best_length = None, -1
+        for scraper in self._scrapers.values():
+            base_url = getattr(scraper, 'base_url', None)
+            if base_url and url.startswith(base_url) and len(base_url) > best_length:
+                best, best_length = scraper, len(base_url)
+        return best
+
+    @property
+    def names(self) -> List[str]:
+        return list(self._scrapers)
+
+    def __len__(self) -> int:
+        return len(self._scrapers)
+
+    def __iter__(self) -> Iterator[ScraperStrategy]:
+        return iter(list(self._scrapers.values()))
+
+class MultiSourceScraper(ScraperStrategy):
+    """
+    Crawls every registered source at once as a single scraper.
+    Each source streams into one bounded queue, so their batches reach the
+    cache-diff and storage stages as a single stream. A source that fails
+    is logged and counted as an error while the others carry on; the crawl
+    only fails when every source does.
+    """
+
+    name = "all"
+
+    def __init__(self, registry: ScraperRegistry):
+        self.registry = registry
+
+    async def list_pages(self, page_limit: Optional[int] = None, proxy: Optional[str] = None) -> List[str]:
+        scrapers = list(self.registry)
+        listed = await asyncio.gather(
+            *(scraper.list_pages(page_limit, proxy) for scraper in scrapers),
+            return_exceptions=True
+        )
+        pages, failures = [], {}
+        for scraper, result in zip(scrapers, listed):
+            if isinstance(result, Exception):
+                failures[scraper.name] = str(result)
+                logging.error(f"Source {scraper.name} failed: {str(result)}")
+            else:
+                pages.append(result)
+        if scrapers and len(failures) == len(scrapers):
+            raise Exception(f"Every source failed: {failures}")
+        if failures:
+            logging.warning(f"Listing pages without {len(failures)} of {len(scrapers)} sources")
+        # Interleaved so crawl workers take turns between the sources
+        return [url for url in chain.from_iterable(zip_longest(*pages)) if url is not None]
+
+    async def stream_batches(
+        self,
+        page_limit: Optional[int] = None,
+        proxy: Optional[str] = None,
+        progress: Optional[CrawlProgress] = None,
+        resume: bool = True
+    ) -> AsyncIterator[List[Product]]:
+        scrapers = list(self.registry)
+        results = asyncio.Queue(maxsize=settings.PIPELINE_QUEUE_SIZE)
+        failures: Dict[str, str] = {}
+
+        async def pump(scraper: ScraperStrategy):
+            try:
+                async for batch in scraper.stream_batches(page_limit, proxy, progress, resume):
+                    await results.put(batch)
+            except Exception as e:
+                failures[scraper.name] = str(e)
+                logging.error(f"Source {scraper.name} failed: {str(e)}")
+                if progress is not None:
+                    progress.errors += 1
+
+        async def close_results(pumps):
+            await asyncio.gather(*pumps)
+            await results.put(STOP)
+
+        pumps = [asyncio.create_task(pump(scraper)) for scraper in scrapers]
+        closer = asyncio.create_task(close_results(pumps))
+        try:
+            while True:
+                first = await results.get()
+                if first is STOP:
+                    break
+                batches, stopped = drain_queue(results, first)
+                yield flatten(batches)
+                if stopped:
+                    break
+        finally:
+            # Stop every source if the consumer goes away early
+            for task in pumps + [closer]:
+                task.cancel()
+
+        if scrapers and len(failures) == len(scrapers):
+            raise Exception(f"Every source failed: {failures}")
+
+def create_scraper_registry(
+    shared_session: Optional[SharedSession] = None,
+    checkpoints: Optional[CheckpointStore] = None,
+    image_store: Optional[ImageStore] = None,
+    sources: Optional[Dict[str, str]] = None,
+    quotas: Optional[Dict[str, int]] = None,
+    max_concurrency: int = settings.GLOBAL_MAX_CONCURRENCY
+) -> ScraperRegistry:
+    """
+    DentalStall plus the configured extra sources (name -> shop URL).
+    The sources share one connection pool, image store, HTTP cache, proxy
+    pool and retry engine, one budget of request slots (`max_concurrency`
+    in total, at most the source's quota each) and one budget of parser
+    processes, so adding a source doesn't add resources, only a share.
+    Each source keeps its own congestion control and crawl checkpoint.
+    Products of the other sources are titled `<source>:<title>`. The title
+    is the key of the price cache, storage and price history, so two
+    suppliers selling the same product don't overwrite each other's price.
+    """
+    sources = {PRIMARY_SOURCE: settings.BASE_URL, **(sources if sources is not None else settings.SCRAPER_SOURCES)}
+    request_budget = FairShareLimiter(
+        max_concurrency,
+        quotas if quotas is not None else settings.SOURCE_QUOTAS,
+        settings.MAX_CONCURRENCY
+    )
+    parse_budget = FairShareLimiter(settings.PARSER_PROCESSES)
+    image_store = image_store or ImageStore()
+    http_cache = HttpCache()
+    proxy_pool = ProxyPool(settings.PROXIES)
+    retry = RetryEngine()
+    checkpoints = checkpoints or create_checkpoint_store()
+
+    registry = ScraperRegistry()
+    for name, base_url in sources.items():
+        registry.register(DentalStallScraper(
+            name=name,
+            base_url=base_url,
+            scheduler=CrawlScheduler(budget=request_budget, source=name),
+            image_store=image_store,
+            http_cache=http_cache,
+            parser=ListingParser(budget=parse_budget, source=name),
+            shared_session=shared_session,
+            proxy_pool=proxy_pool,
+            retry=retry,
+            checkpoints=checkpoints,
+            title_prefix="" if name == PRIMARY_SOURCE else f"{name}:"
+        ))
+    return registry
@@ -1,15 +1,23 @@
 # app/services/storage.py
 from abc import ABC, abstractmethod
+import asyncio
+import bisect
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
+import itertools
 import json
 import logging
 import os
-from typing import List
+import sqlite3
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
 from ..schemas.product import Product
 from ..core.config import settings
 
 class StorageStrategy(ABC):
     """Abstract base class for storage strategies"""
-    
+
     @abstractmethod
     async def save_products(self, products: List[Product]) -> None:
         """Save products to storage"""
@@ -20,69 +28,532 @@ class StorageStrategy(ABC):
         """Load products from storage"""
         pass
 
+    async def upsert_products(self, products: List[Product]) -> int:
+        """
+        Insert or update products keyed by title, keeping everything else.
+        Returns the number of products that were actually written.
+        Backends should override this with something cheaper than a full rewrite.
+        """
+        existing = {p.product_title: p for p in await self.load_products()}
+        changed = [p for p in products if existing.get(p.product_title) != p]
+        if changed:
+            existing.update((p.product_title, p) for p in changed)
+            await self.save_products(list(existing.values()))
+        return len(changed)
+
+    async def query_products(
+        self,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        title: Optional[str] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Product]:
+        """
+        Products ordered by title, filtered by price range and a
+        case-insensitive title substring, starting after the `after` title.
+        """
+        products = sorted(await self.load_products(), key=lambda p: p.product_title)
+        needle = title.lower() if title else None
+        results = []
+        for product in products:
+            if after is not None and product.product_title <= after:
+                continue
+            if min_price is not None and product.product_price < min_price:
+                continue
+            if max_price is not None and product.product_price > max_price:
+                continue
+            if needle and needle not in product.product_title.lower():
+                continue
+            results.append(product)
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    async def catalog_version(self) -> Optional[str]:
+        """
+        Opaque token that changes whenever the stored catalog changes.
+        None means the backend can't tell, so callers must not cache.
+        """
+        return None
+
+    async def close(self) -> None:
+        """Release any resources held by the backend"""
+        pass
+
 class JsonFileStorage(StorageStrategy):
-    """Concrete implementation for JSON file storage"""
-    
-    def __init__(self, file_path: str = settings.LOCAL_STORAGE_PATH):
+    """
+    JSON file storage with incremental upserts.
+    The catalog lives in a JSON snapshot plus an append-only change log of
+    upserts (one JSON object per line) next to it. Upserts only append to
+    the log; once it grows past a threshold it is folded into a new snapshot
+    written atomically via a temp file and rename. An in-memory title index
+    avoids re-reading either file on every call.
+    """
+
+    def __init__(
+        self,
+        file_path: str = settings.LOCAL_STORAGE_PATH,
+        compact_threshold: int = settings.STORAGE_COMPACT_THRESHOLD
+    ):
         self.file_path = file_path
+        self.log_path = f"{file_path}.log"
+        self.compact_threshold = compact_threshold
+        self._index: Optional[Dict[str, Product]] = None
+        self._sorted_titles: Optional[List[str]] = None
+        self._log_entries = 0
+        self._signature: Optional[Tuple] = None
+        self._lock = asyncio.Lock()
+
         # Create directory if it doesn't exist
         directory = os.path.dirname(self.file_path)
-        if not os.path.exists(directory):
+        if directory and not os.path.exists(directory):
             logging.info(f"Directory {directory} not found. Creating it now.")
             os.makedirs(directory, exist_ok=True)
-        
+
         if not os.path.exists(self.file_path):
             logging.info(f"Storage file not found. Creating a new file at {self.file_path}.")
             with open(self.file_path, 'w', encoding='utf-8') as f:
                 json.dump([], f, indent=2, ensure_ascii=False)
 
+    def _file_signature(self) -> Tuple:
+        """Cheap fingerprint of both files to notice writes from other instances"""
+        signature = []
+        for path in (self.file_path, self.log_path):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                signature.append(None)
+        return tuple(signature)
+
+    def _read_snapshot(self) -> Dict[str, Product]:
+        if not os.path.exists(self.file_path):
+            logging.warning("Storage file not found.")
+            return {}
+
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+            logging.debug(f"JSON content: {content[:500]}")
+
+        try:
+            data = json.loads(content)
+        except json.JSONDecodeError as e:
+            logging.error("Malformed JSON. Please check the file content.")
+            raise Exception(f"Error loading products from JSON: {e}")
+
+        index = {}
+        for idx, product_data in enumerate(data):
+            try:
+                product = Product(**product_data)
+            except Exception as e:
+                logging.warning(
+                    f"Skipping invalid product entry at index {idx}: {product_data} - Error: {e}"
+                )
+                continue
+            index[product.product_title] = product
+        return index
+
+    def _replay_log(self, index: Dict[str, Product]) -> int:
+        if not os.path.exists(self.log_path):
+            return 0
+
+        entries = 0
+        with open(self.log_path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    product = Product(**json.loads(line))
+                except Exception as e:
+                    # A torn final line from a crash mid-append is expected
+                    logging.warning(f"Skipping invalid change log entry at line {line_number}: {e}")
+                    continue
+                index[product.product_title] = product
+                entries += 1
+        return entries
+
+    def _load(self) -> None:
+        index = self._read_snapshot()
+        self._log_entries = self._replay_log(index)
+        self._index = index
+        self._sorted_titles = None
+        self._signature = self._file_signature()
+
+    def _ensure_loaded(self) -> None:
+        if self._index is None or self._signature != self._file_signature():
+            self._load()
+
+    def _write_snapshot(self, products: List[Product]) -> None:
+        """Atomically replace the snapshot and reset the change log"""
+        products_data = [product.model_dump() for product in products]
+        tmp_path = f"{self.file_path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(products_data, f, indent=2, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.file_path)
+
+        # Only drop the log once the snapshot containing it is in place;
+        # replaying it again after a crash here is harmless
+        if os.path.exists(self.log_path):
+            os.remove(self.log_path)
+        self._log_entries = 0
+
+    def _append_log(self, products: List[Product]) -> None:
+        lines = "".join(
+            json.dumps(product.model_dump(), ensure_ascii=False) + "\n"
+            for product in products
+        )
+        with open(self.log_path, 'a+b') as f:
+            # Start on a fresh line if a previous append was torn by a crash
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    lines = "\n" + lines
+            f.write(lines.encode('utf-8'))
+            f.flush()
+            os.fsync(f.fileno())
+        self._log_entries += len(products)
+
+    def _save(self, products: List[Product]) -> None:
+        self._write_snapshot(products)
+        self._index = {p.product_title: p for p in products}
+        self._sorted_titles = None
+        self._signature = self._file_signature()
+
+    def _upsert(self, products: List[Product]) -> int:
+        self._ensure_loaded()
+
+        changed = {}
+        for product in products:
+            if self._index.get(product.product_title) != product:
+                changed[product.product_title] = product
+        if not changed:
+            return 0
+
+        self._append_log(list(changed.values()))
+        if self._sorted_titles is not None and any(title not in self._index for title in changed):
+            self._sorted_titles = None
+        self._index.update(changed)
+
+        if self._log_entries >= self.compact_threshold:
+            logging.info(f"Compacting {self._log_entries} change log entries into {self.file_path}")
+            self._write_snapshot(list(self._index.values()))
+
+        self._signature = self._file_signature()
+        return len(changed)
 
     async def save_products(self, products: List[Product]) -> None:
-        """Save products to JSON file"""
+        """Replace the stored catalog with the given products"""
         try:
             if not products:
                 raise ValueError("No products to save")
-            
-            logging.debug(f"Saving {len(products)} products to {self.file_path}")
 
-            products_data = [product.model_dump() for product in products]
-            with open(self.file_path, 'w', encoding='utf-8') as f:
-                json.dump(products_data, f, indent=2, ensure_ascii=False)
+            logging.debug(f"Saving {len(products)} products to {self.file_path}")
+            async with self._lock:
+                await asyncio.to_thread(self._save, products)
         except ValueError as ve:
             raise Exception(f"Validation Error: {str(ve)}")
         except Exception as e:
             raise Exception(f"Error saving products to JSON: {str(e)}")
 
+    async def upsert_products(self, products: List[Product]) -> int:
+        """Append changed products to the change log, compacting when it grows"""
+        try:
+            async with self._lock:
+                return await asyncio.to_thread(self._upsert, products)
+        except Exception as e:
+            raise Exception(f"Error saving products to JSON: {str(e)}")
+
+    async def compact(self) -> None:
+        """Fold the change log into the snapshot now"""
+        async with self._lock:
+            await asyncio.to_thread(self._compact)
 
+    def _compact(self) -> None:
+        self._ensure_loaded()
+        if self._log_entries:
+            self._write_snapshot(list(self._index.values()))
+            self._signature = self._file_signature()
+
+    async def query_products(
+        self,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        title: Optional[str] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Product]:
+        """Filtered, title-ordered page served from the in-memory index"""
+        try:
+            async with self._lock:
+                await asyncio.to_thread(self._ensure_loaded)
+                if self._sorted_titles is None:
+                    self._sorted_titles = sorted(self._index)
+                titles, index = self._sorted_titles, self._index
+        except Exception as e:
+            logging.error(f"Unexpected error: {e}")
+            raise Exception(f"Error loading products from JSON: {str(e)}")
+
+        start = bisect.bisect_right(titles, after) if after is not None else 0
+        needle = title.lower() if title else None
+        results = []
+        for product_title in itertools.islice(titles, start, None):
+            product = index[product_title]
+            if min_price is not None and product.product_price < min_price:
+                continue
+            if max_price is not None and product.product_price > max_price:
+                continue
+            if needle and needle not in product_title.lower():
+                continue
+            results.append(product)
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    async def catalog_version(self) -> Optional[str]:
+        signature = await asyncio.to_thread(self._file_signature)
+        return hashlib.sha1(repr(signature).encode('utf-8')).hexdigest()[:16]
 
     async def load_products(self) -> List[Product]:
         """Load products from JSON file with validation"""
         try:
-            if not os.path.exists(self.file_path):
-                logging.warning("Storage file not found.")
-                return []
-            
-            with open(self.file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-                logging.debug(f"JSON content: {content[:500]}")
-
-                try:
-                    data = json.loads(content)
-                except json.JSONDecodeError as e:
-                    logging.error("Malformed JSON. Please check the file content.")
-                    raise Exception(f"Error loading products from JSON: {e}")
-                
-                valid_products = []
-                for idx, product_data in enumerate(data):
-                    try:
-                        valid_products.append(Product(**product_data))
-                    except Exception as e:
-                        logging.warning(
-                            f"Skipping invalid product entry at index {idx}: {product_data} - Error: {e}"
-                        )
-                
-                return valid_products
+            async with self._lock:
+                await asyncio.to_thread(self._ensure_loaded)
+                return list(self._index.values())
         except Exception as e:
             logging.error(f"Unexpected error: {e}")
             raise Exception(f"Error loading products from JSON: {str(e)}")
 
+
+class SqliteStorage(StorageStrategy):
+    """
+    SQLite storage in WAL mode.
+    Upserts are batched `INSERT ... ON CONFLICT` statements inside a single
+    transaction, and reads use indexes on title (primary key) and price so
+    filtered and paginated queries don't touch the whole catalog. All
+    database work runs in thread executors: one writer thread, since SQLite
+    allows a single writer, and a few reader threads that WAL lets proceed
+    concurrently with it.
+    """
+
+    UPSERT_SQL = """
+        INSERT INTO products (product_title, product_price, path_to_image, updated_at)
+        VALUES (?, ?, ?, ?)
+        ON CONFLICT(product_title) DO UPDATE SET
+            product_price = excluded.product_price,
+            path_to_image = excluded.path_to_image,
+            updated_at = excluded.updated_at
+        WHERE products.product_price IS NOT excluded.product_price
+           OR products.path_to_image IS NOT excluded.path_to_image
+    """
+
+    def __init__(
+        self,
+        db_path: str = settings.SQLITE_STORAGE_PATH,
+        batch_size: int = settings.SQLITE_BATCH_SIZE,
+        read_threads: int = settings.SQLITE_READ_THREADS
+    ):
+        self.db_path = db_path
+        self.batch_size = batch_size
+        self._local = threading.local()
+        self._connections: List[sqlite3.Connection] = []
+        self._connections_lock = threading.Lock()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-writer")
+        self._readers = ThreadPoolExecutor(max_workers=read_threads, thread_name_prefix="sqlite-reader")
+        self._schema_ready = False
+
+        directory = os.path.dirname(self.db_path)
+        if directory and not os.path.exists(directory):
+            logging.info(f"Directory {directory} not found. Creating it now.")
+            os.makedirs(directory, exist_ok=True)
+
+    def _connection(self) -> sqlite3.Connection:
+        """One connection per executor thread"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            # SQLite's own lower() and LIKE only fold ASCII; title filters
+            # must match JsonFileStorage's str.lower() exactly
+            conn.create_function("py_lower", 1, self._lower, deterministic=True)
+            self._local.conn = conn
+            with self._connections_lock:
+                self._connections.append(conn)
+        return conn
+
+    @staticmethod
+    def _lower(value: Optional[str]) -> Optional[str]:
+        return value.lower() if value is not None else None
+
+    def _ensure_schema(self) -> None:
+        if self._schema_ready:
+            return
+        conn = self._connection()
+        with conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS products (
+                    product_title TEXT PRIMARY KEY,
+                    product_price REAL NOT NULL,
+                    path_to_image TEXT,
+                    updated_at REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_products_price ON products (product_price)")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS catalog_meta (
+                    key TEXT PRIMARY KEY,
+                    value INTEGER NOT NULL
+                )
+            """)
+            conn.execute("INSERT OR IGNORE INTO catalog_meta (key, value) VALUES ('version', 0)")
+        self._schema_ready = True
+
+    @staticmethod
+    def _bump_version(conn: sqlite3.Connection) -> None:
+        conn.execute("UPDATE catalog_meta SET value = value + 1 WHERE key = 'version'")
+
+    async def _write(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, func, *args)
+
+    async def _read(self, func, *args):
+        if not self._schema_ready:
+            await self._write(self._ensure_schema)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._readers, func, *args)
+
+    def _rows(self, products: List[Product]) -> List[Tuple]:
+        now = time.time()
+        return [
+            (p.product_title, float(p.product_price), p.path_to_image, now)
+            for p in products
+        ]
+
+    def _upsert(self, products: List[Product]) -> int:
+        self._ensure_schema()
+        conn = self._connection()
+        rows = self._rows(products)
+        with conn:
+            before = conn.total_changes
+            for start in range(0, len(rows), self.batch_size):
+                conn.executemany(self.UPSERT_SQL, rows[start:start + self.batch_size])
+            changed = conn.total_changes - before
+            if changed:
+                self._bump_version(conn)
+        return changed
+
+    def _replace_all(self, products: List[Product]) -> None:
+        self._ensure_schema()
+        conn = self._connection()
+        rows = self._rows(products)
+        with conn:
+            conn.execute("DELETE FROM products")
+            for start in range(0, len(rows), self.batch_size):
+                conn.executemany(self.UPSERT_SQL, rows[start:start + self.batch_size])
+            self._bump_version(conn)
+
+    def _select(self, sql: str, params: Tuple = ()) -> List[Product]:
+        rows = self._connection().execute(sql, params).fetchall()
+        return [
+            Product(product_title=title, product_price=price, path_to_image=image)
+            for title, price, image in rows
+        ]
+
+    async def save_products(self, products: List[Product]) -> None:
+        """Replace the stored catalog with the given products"""
+        try:
+            if not products:
+                raise ValueError("No products to save")
+            await self._write(self._replace_all, products)
+        except ValueError as ve:
+            raise Exception(f"Validation Error: {str(ve)}")
+        except Exception as e:
+            raise Exception(f"Error saving products to SQLite: {str(e)}")
+
+    async def upsert_products(self, products: List[Product]) -> int:
+        """Batched upsert in one transaction; unchanged rows are left alone"""
+        if not products:
+            return 0
+        try:
+            return await self._write(self._upsert, products)
+        except Exception as e:
+            raise Exception(f"Error saving products to SQLite: {str(e)}")
+
+    async def load_products(self) -> List[Product]:
+        try:
+            return await self._read(
+                self._select,
+                "SELECT product_title, product_price, path_to_image FROM products ORDER BY product_title"
+            )
+        except Exception as e:
+            logging.error(f"Unexpected error: {e}")
+            raise Exception(f"Error loading products from SQLite: {str(e)}")
+
+    async def query_products(
+        self,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        title: Optional[str] = None,
+        after: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> List[Product]:
+        clauses, params = [], []
+        if after is not None:
+            clauses.append("product_title > ?")
+            params.append(after)
+        if min_price is not None:
+            clauses.append("product_price >= ?")
+            params.append(min_price)
+        if max_price is not None:
+            clauses.append("product_price <= ?")
+            params.append(max_price)
+        if title:
+            clauses.append("instr(py_lower(product_title), ?) > 0")
+            params.append(title.lower())
+
+        sql = "SELECT product_title, product_price, path_to_image FROM products"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY product_title"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        try:
+            return await self._read(self._select, sql, tuple(params))
+        except Exception as e:
+            logging.error(f"Unexpected error: {e}")
+            raise Exception(f"Error querying products from SQLite: {str(e)}")
+
+    def _version(self) -> str:
+        row = self._connection().execute(
+            "SELECT value FROM catalog_meta WHERE key = 'version'"
+        ).fetchone()
+        return str(row[0] if row else 0)
+
+    async def catalog_version(self) -> Optional[str]:
+        return await self._read(self._version)
+
+    async def close(self) -> None:
+        self._writer.shutdown(wait=True)
+        self._readers.shutdown(wait=True)
+        with self._connections_lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+
+STORAGE_BACKENDS = {
+    "json": JsonFileStorage,
+    "sqlite": SqliteStorage,
+}
+
+def create_storage(backend: str = settings.STORAGE_BACKEND) -> StorageStrategy:
+    """Build the storage backend selected in settings"""
+    try:
+        return STORAGE_BACKENDS[backend]()
+    except KeyError:
+        raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,193 @@
+# app/services/work_queue.py
+import json
+import logging
+import time
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from redis.exceptions import RedisError
+from ..cache.redis_cache import RedisCache
+from ..core.config import settings
+
+class WorkQueueTimeout(Exception):
+    """Raised when a distributed crawl stops making progress"""
+    pass
+
+class RedisWorkQueue:
+    """
+    Reliable page queue shared by every crawl worker.
+    Leasing a task moves it atomically from the pending list to a processing
+    list and stamps a lease deadline; workers extend the lease while they
+    work and acknowledge the task together with its result. Tasks whose
+    lease runs out (the worker died or stalled) are put back on the pending
+    list by `reap_expired`, so every page is eventually processed at least
+    once. Results are pushed to a per-run list read by the coordinator.
+    """
+
+    PENDING = "crawl:queue:pending"
+    PROCESSING = "crawl:queue:processing"
+    LEASES = "crawl:queue:leases"
+
+    def __init__(
+        self,
+        redis_cache: Optional[RedisCache] = None,
+        lease_seconds: float = settings.WORK_QUEUE_LEASE_SECONDS,
+        max_attempts: int = settings.WORK_QUEUE_MAX_ATTEMPTS,
+        result_ttl: int = settings.WORK_QUEUE_RESULT_TTL
+    ):
+        self.redis = redis_cache or RedisCache()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.result_ttl = result_ttl
+
+    @property
+    def client(self):
+        return self.redis.redis_client
+
+    @staticmethod
+    def _results_key(run_id: str) -> str:
+        return f"crawl:run:{run_id}:results"
+
+    @staticmethod
+    def _attempts_key(run_id: str) -> str:
+        return f"crawl:run:{run_id}:attempts"
+
+    async def enqueue(self, run_id: str, urls: List[str]) -> None:
+        tasks = [json.dumps({"run": run_id, "url": url}) for url in urls]
+        if tasks:
+            await self.client.rpush(self.PENDING, *tasks)
+
+    async def lease(self, timeout: float = 1.0) -> Optional[str]:
+        """Take the next task, waiting up to `timeout` seconds; None if there is none"""
+        task = await self.client.blmove(self.PENDING, self.PROCESSING, timeout, "LEFT", "RIGHT")
+        if task is not None:
+            await self.client.hset(self.LEASES, task, time.time() + self.lease_seconds)
+        return task
+
+    async def extend(self, task: str) -> None:
+        await self.client.hset(self.LEASES, task, time.time() + self.lease_seconds)
+
+    async def ack(self, task: str, products: List[Dict], status: str = "done") -> None:
+        """Publish a task's result and remove it from the processing list"""
+        run_id, url = self.parse(task)
+        result = json.dumps({"url": url, "status": status, "products": products}, ensure_ascii=False)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.rpush(self._results_key(run_id), result)
+            pipe.expire(self._results_key(run_id), self.result_ttl)
+            pipe.lrem(self.PROCESSING, 1, task)
+            pipe.hdel(self.LEASES, task)
+            await pipe.execute()
+
+    async def nack(self, task: str, products: Optional[List[Dict]] = None) -> bool:
+        """
+        Give a failed task back for another attempt.
+        Once it has failed `max_attempts` times it is acknowledged as failed
+        with whatever products it did produce. Returns True if requeued.
+        """
+        run_id, _ = self.parse(task)
+        attempts = await self.client.hincrby(self._attempts_key(run_id), task, 1)
+        if attempts >= self.max_attempts:
+            await self.ack(task, products or [], status="failed")
+            return False
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.expire(self._attempts_key(run_id), self.result_ttl)
+            pipe.lrem(self.PROCESSING, 1, task)
+            pipe.hdel(self.LEASES, task)
+            pipe.rpush(self.PENDING, task)
+            await pipe.execute()
+        return True
+
+    async def discard(self, task: str) -> None:
+        """Drop a leased task without reporting it, e.g. one that can't be parsed"""
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.lrem(self.PROCESSING, 1, task)
+            pipe.hdel(self.LEASES, task)
+            await pipe.execute()
+
+    async def reap_expired(self) -> int:
+        """
+        Requeue tasks whose lease ran out; returns how many were requeued.
+        An expired lease counts as a failed attempt, so a page that keeps
+        killing or hanging its worker is given up after `max_attempts`.
+        """
+        now = time.time()
+        requeued = 0
+        for task in await self.client.lrange(self.PROCESSING, 0, -1):
+            deadline = await self.client.hget(self.LEASES, task)
+            if deadline is None:
+                # Leased a moment ago and not stamped yet; start the clock
+                await self.client.hsetnx(self.LEASES, task, now + self.lease_seconds)
+                continue
+            if float(deadline) > now:
+                continue
+            # LREM is atomic, so a late ack and the reaper can't both win
+            if not await self.client.lrem(self.PROCESSING, 1, task):
+                continue
+            try:
+                run_id, url = self.parse(task)
+            except (ValueError, KeyError, TypeError) as e:
+                await self.client.hdel(self.LEASES, task)
+                logging.error(f"Dropping malformed task {task!r}: {str(e)}")
+                continue
+            attempts = await self.client.hincrby(self._attempts_key(run_id), task, 1)
+            if attempts >= self.max_attempts:
+                await self.ack(task, [], status="failed")
+                logging.error(f"Lease expired {attempts} times, giving up on {url}")
+                continue
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.expire(self._attempts_key(run_id), self.result_ttl)
+                pipe.hdel(self.LEASES, task)
+                pipe.rpush(self.PENDING, task)
+                await pipe.execute()
+            requeued += 1
+            logging.warning(f"Lease expired, requeued {url} (attempt {attempts}/{self.max_attempts})")
+        return requeued
+
+    async def results(
+        self,
+        run_id: str,
+        total: int,
+        idle_timeout: float = settings.WORK_QUEUE_IDLE_TIMEOUT
+    ) -> AsyncIterator[Dict]:
+        """
+        Yield result records for a run until every page has reported.
+        Reaps expired leases while waiting, and gives up if nothing arrives
+        for `idle_timeout` seconds (e.g. no worker is running).
+        """
+        finished = set()
+        last_progress = time.monotonic()
+        next_reap = 0.0
+        try:
+            while len(finished) < total:
+                if time.monotonic() >= next_reap:
+                    await self.reap_expired()
+                    next_reap = time.monotonic() + max(1.0, self.lease_seconds / 4)
+
+                item = await self.client.blpop([self._results_key(run_id)], timeout=1)
+                if item is None:
+                    if time.monotonic() - last_progress > idle_timeout:
+                        raise WorkQueueTimeout(
+                            f"No results for run {run_id} in {idle_timeout:.0f}s "
+                            f"({len(finished)}/{total} pages done)"
+                        )
+                    continue
+
+                last_progress = time.monotonic()
+                result = json.loads(item[1])
+                finished.add(result['url'])
+                yield result
+        finally:
+            try:
+                await self.client.delete(self._results_key(run_id), self._attempts_key(run_id))
+            except RedisError as e:
+                logging.error(f"Could not clean up run {run_id}: {str(e)}")
+
+    async def cancel(self, run_id: str, urls: List[str]) -> None:
+        """Drop a run's tasks that no worker has picked up yet"""
+        async with self.client.pipeline(transaction=False) as pipe:
+            for url in urls:
+                pipe.lrem(self.PENDING, 0, json.dumps({"run": run_id, "url": url}))
+            await pipe.execute()
+
+    @staticmethod
+    def parse(task: str) -> Tuple[str, str]:
+        data = json.loads(task)
+        return data['run'], data['url']
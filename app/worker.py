@@ -0,0 +1,44 @@
+# app/worker.py
+"""
+Crawl worker process for distributed scrapes.
+
+Run any number of these next to the API (same settings, same Redis):
+
+    python -m app.worker
+"""
+import asyncio
+import logging
+import signal
+from .cache.redis_cache import RedisCache
+from .services.crawl_worker import CrawlWorker
+from .services.http_client import SharedSession
+from .services.parsers import shutdown_process_pool
+from .services.sources import create_scraper_registry
+from .services.work_queue import RedisWorkQueue
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+
+async def main() -> None:
+    http_session = SharedSession()
+    redis_cache = RedisCache()
+    worker = CrawlWorker(
+        create_scraper_registry(shared_session=http_session),
+        RedisWorkQueue(redis_cache)
+    )
+
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, worker.stop)
+
+    try:
+        await worker.run()
+    finally:
+        await http_session.close()
+        await redis_cache.close()
+        shutdown_process_pool()
+
+if __name__ == "__main__":
+    asyncio.run(main())
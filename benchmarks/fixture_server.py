@@ -0,0 +1,208 @@
+# benchmarks/fixture_server.py
+"""
+Synthetic WooCommerce shop for offline benchmarks.
+
+Serves listing pages with the same markup the scraper's parsers expect
+(li.product, h2.woo-loop-product__title, div.mf-product-price-box,
+div.mf-product-thumbnail, ul.page-numbers) plus product images, with
+configurable size, latency and error injection.
+
+    python -m benchmarks.fixture_server --pages 120 --port 8080
+"""
+import argparse
+import asyncio
+from dataclasses import dataclass
+import hashlib
+import random
+from typing import Dict, Optional
+from aiohttp import web
+
+@dataclass
+class FixtureConfig:
+    pages: int = 120
+    products_per_page: int = 30
+    latency: float = 0.05  # mean seconds per response
+    jitter: float = 0.5  # +/- fraction of the latency
+    error_rate: float = 0.0  # fraction of responses replaced by a 503
+    image_size: int = 20_000  # bytes per image
+    filler_bytes: int = 2_000  # unrelated markup per product, like the real theme
+    price_change_rate: float = 0.0  # fraction of prices that change per "generation"
+    etags: bool = True
+    seed: int = 42
+
+@dataclass
+class FixtureStats:
+    requests: int = 0
+    pages: int = 0
+    images: int = 0
+    not_modified: int = 0
+    injected_errors: int = 0
+    bytes_sent: int = 0
+
+class FixtureShop:
+    """aiohttp application serving the synthetic catalog"""
+
+    def __init__(self, config: Optional[FixtureConfig] = None):
+        self.config = config or FixtureConfig()
+        self.stats = FixtureStats()
+        self.generation = 0
+        self._random = random.Random(self.config.seed)
+        self._image_cache: Dict[str, bytes] = {}
+
+    def bump_generation(self) -> None:
+        """Move to the next catalog version; some prices change"""
+        self.generation += 1
+
+    def price(self, page: int, index: int) -> int:
+        base = 100 + (page * 37 + index * 101) % 9_000
+        changes = 0
+        for generation in range(1, self.generation + 1):
+            digest = hashlib.sha1(f"{page}-{index}-{generation}".encode()).digest()
+            if digest[0] / 255 < self.config.price_change_rate:
+                changes += 1
+        return base + changes * 7
+
+    def _filler(self, page: int, index: int) -> str:
+        size = self.config.filler_bytes
+        if size <= 0:
+            return ""
+        text = f"Feature {page}-{index} "
+        return f'<div class="mf-product-details"><p>{text * max(1, size // len(text))}</p></div>'
+
+    def listing_html(self, page: int, base_url: str) -> str:
+        items = []
+        for index in range(self.config.products_per_page):
+            price = self.price(page, index)
+            items.append(
+                '<li class="product type-product">'
+                '<div class="mf-product-thumbnail">'
+                f'<a href="#"><img src="data:image/svg+xml,%3Csvg%3E" '
+                f'data-lazy-src="{base_url}images/{page}-{index}.jpg" alt=""></a></div>'
+                f'<h2 class="woo-loop-product__title"><a href="{base_url}product/{page}-{index}/">'
+                f'Benchmark Product {page}-{index}</a></h2>'
+                '<div class="mf-product-price-box"><span class="price">'
+                f'<span class="woocommerce-Price-amount amount"><bdi>₹{price:,}.00</bdi></span>'
+                '</span></div>'
+                f'{self._filler(page, index)}'
+                '</li>'
+            )
+
+        total = self.config.pages
+        shown = sorted({1, 2, 3, page, total} & set(range(1, total + 1)))
+        links = "".join(
+            f'<li><a class="page-numbers" href="{base_url}shop/page/{n}/">{n}</a></li>'
+            for n in shown
+        )
+        next_link = f'<li><a class="next page-numbers" href="{base_url}shop/page/{page + 1}/">→</a></li>' if page < total else ""
+        return (
+            '<!DOCTYPE html><html><head><title>Shop</title></head><body>'
+            f'<ul class="products columns-4">{"".join(items)}</ul>'
+            f'<nav class="woocommerce-pagination"><ul class="page-numbers">{links}{next_link}</ul></nav>'
+            '</body></html>'
+        )
+
+    async def _delay(self) -> None:
+        latency = self.config.latency
+        if latency > 0:
+            spread = latency * self.config.jitter
+            await asyncio.sleep(max(0.0, self._random.uniform(latency - spread, latency + spread)))
+
+    def _inject_error(self) -> Optional[web.Response]:
+        if self.config.error_rate and self._random.random() < self.config.error_rate:
+            self.stats.injected_errors += 1
+            return web.Response(status=503)
+        return None
+
+    def _not_modified(self, request: web.Request, etag: str) -> bool:
+        if self.config.etags and request.headers.get('If-None-Match') == etag:
+            self.stats.not_modified += 1
+            return True
+        return False
+
+    async def listing(self, request: web.Request) -> web.Response:
+        self.stats.requests += 1
+        await self._delay()
+        error = self._inject_error()
+        if error is not None:
+            return error
+
+        page = int(request.match_info.get('page', 1))
+        if page < 1 or page > self.config.pages:
+            return web.Response(status=404)
+
+        etag = f'"page-{page}-{self.generation}"'
+        if self._not_modified(request, etag):
+            return web.Response(status=304, headers={'ETag': etag})
+
+        body = self.listing_html(page, f"http://{request.host}/")
+        self.stats.pages += 1
+        self.stats.bytes_sent += len(body)
+        headers = {'ETag': etag} if self.config.etags else {}
+        return web.Response(text=body, content_type='text/html', headers=headers)
+
+    async def image(self, request: web.Request) -> web.Response:
+        self.stats.requests += 1
+        await self._delay()
+        error = self._inject_error()
+        if error is not None:
+            return error
+
+        name = request.match_info['name']
+        etag = f'"{name}"'
+        if self._not_modified(request, etag):
+            return web.Response(status=304, headers={'ETag': etag})
+
+        body = self._image_cache.get(name)
+        if body is None:
+            # Distinct bytes per image so the content-addressed store can't dedupe them
+            seed = hashlib.sha256(name.encode()).digest()
+            body = b'\xff\xd8\xff\xe0' + (seed * (self.config.image_size // len(seed) + 1))[:max(0, self.config.image_size - 4)]
+            self._image_cache[name] = body
+        self.stats.images += 1
+        self.stats.bytes_sent += len(body)
+        headers = {'ETag': etag} if self.config.etags else {}
+        return web.Response(body=body, content_type='image/jpeg', headers=headers)
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/shop/', self.listing)
+        app.router.add_get('/shop/page/{page:\\d+}/', self.listing)
+        app.router.add_get('/images/{name}', self.image)
+        return app
+
+async def start_fixture_server(
+    config: Optional[FixtureConfig] = None,
+    host: str = '127.0.0.1',
+    port: int = 0
+):
+    """Start the shop; returns (shop, runner, base_url). Port 0 picks a free port."""
+    shop = FixtureShop(config)
+    runner = web.AppRunner(shop.make_app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = runner.addresses[0][1]
+    return shop, runner, f"http://{host}:{bound_port}/shop/"
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Serve a synthetic WooCommerce shop")
+    parser.add_argument('--pages', type=int, default=FixtureConfig.pages)
+    parser.add_argument('--products-per-page', type=int, default=FixtureConfig.products_per_page)
+    parser.add_argument('--latency', type=float, default=FixtureConfig.latency)
+    parser.add_argument('--error-rate', type=float, default=FixtureConfig.error_rate)
+    parser.add_argument('--image-size', type=int, default=FixtureConfig.image_size)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    args = parser.parse_args()
+
+    config = FixtureConfig(
+        pages=args.pages,
+        products_per_page=args.products_per_page,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        image_size=args.image_size,
+    )
+    web.run_app(FixtureShop(config).make_app(), host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
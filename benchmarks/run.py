@@ -0,0 +1,263 @@
+# benchmarks/run.py
+"""
+Offline scraper benchmarks against the synthetic fixture shop.
+
+Runs the real pipeline (scheduler, retries, HTTP cache, parser, image store,
+tiered price cache, storage) end to end, first cold and then incrementally
+after some prices changed, and then each stage in isolation. Reports
+pages/sec, products/sec, p50/p99 latency per stage and peak memory.
+
+    python -m benchmarks.run --pages 40 --runs 2 --json results.json
+"""
+import argparse
+import asyncio
+from contextlib import contextmanager
+import json
+import logging
+import os
+import resource
+import tempfile
+import time
+from typing import Dict, List, Optional
+from app.cache.redis_cache import RedisCache
+from app.cache.tiered_cache import TieredPriceCache
+from app.core.config import settings
+from app.schemas.product import Product
+from app.services.checkpoint import FileCheckpointStore
+from app.services.http_cache import HttpCache
+from app.services.image_store import ImageStore
+from app.services.notifier import NotificationStrategy
+from app.services.parsers import PARSER_BACKENDS, ListingParser, shutdown_process_pool
+from app.services.price_history import PriceHistoryStore
+from app.services.proxy_pool import ProxyPool
+from app.services.retry import RetryEngine
+from app.services.scheduler import CrawlScheduler
+from app.services.scraper import DentalStallScraper
+from app.services.scraping_service import ScrapingService
+from app.services.storage import STORAGE_BACKENDS
+from .fixture_server import FixtureConfig, FixtureShop, start_fixture_server
+from .stages import PeakMemory, StageStats, instrument
+
+class NullNotifier(NotificationStrategy):
+    """Keeps notification cost out of the numbers"""
+
+    async def notify(self, message: str) -> None:
+        pass
+
+def build_service(args: argparse.Namespace, workdir: str) -> ScrapingService:
+    """The production components, with every path under `workdir`"""
+    scraper = DentalStallScraper(
+        scheduler=CrawlScheduler(rate_per_host=args.rate, burst=args.burst),
+        image_store=ImageStore(
+            os.path.join(workdir, "images"),
+            os.path.join(workdir, "images", "manifest.json")
+        ),
+        http_cache=HttpCache(os.path.join(workdir, "http_cache")),
+        parser=ListingParser(args.parser),
+        proxy_pool=ProxyPool([]),
+        retry=RetryEngine(base_delay=args.retry_delay, max_delay=args.retry_delay * 10),
+        checkpoints=FileCheckpointStore(os.path.join(workdir, "checkpoints")),
+    )
+    storage_path = os.path.join(workdir, "products.db" if args.storage == "sqlite" else "products.json")
+    return ScrapingService(
+        scraper=scraper,
+        storage=STORAGE_BACKENDS[args.storage](storage_path),
+        conoleNotifier=NullNotifier(),
+        emailNotifier=NullNotifier(),
+        cache=TieredPriceCache(RedisCache(args.redis_url)),
+        price_history=PriceHistoryStore(os.path.join(workdir, "price_history")),
+    )
+
+def max_rss_mb() -> float:
+    """Process memory high-water mark (ru_maxrss is KiB on Linux)"""
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+@contextmanager
+def instrumented(service: ScrapingService, stages: Dict[str, StageStats]):
+    """Time the pipeline stages of one service for the duration of the block"""
+    scraper = service.scraper
+    undo = [
+        instrument(scraper, "fetch_response", stages["scrape"]),
+        instrument(scraper.parser, "parse", stages["parse"],
+                   count=lambda args, result: len(result.products)),
+        instrument(scraper, "download_image", stages["image"]),
+        instrument(service, "diff_against_cache", stages["cache_diff"],
+                   count=lambda args, result: len(args[0])),
+        instrument(service.storage, "upsert_products", stages["storage"],
+                   count=lambda args, result: len(args[0])),
+    ]
+    try:
+        yield
+    finally:
+        for restore in reversed(undo):
+            restore()
+
+async def pipeline_pass(service: ScrapingService, shop: FixtureShop, label: str, pages: int) -> Dict:
+    """One full crawl through ScrapingService.run_scraping"""
+    stages = {name: StageStats(name) for name in ("scrape", "parse", "image", "cache_diff", "storage")}
+    requests_before = shop.stats.requests
+    with instrumented(service, stages):
+        start = time.perf_counter()
+        stats = await service.run_scraping(page_limit=pages)
+        await service.scraper.image_store.flush()
+        elapsed = time.perf_counter() - start
+
+    return {
+        "pass": label,
+        "seconds": round(elapsed, 3),
+        "pages_per_second": round(pages / elapsed, 1),
+        "products_per_second": round(stats["total"] / elapsed, 1),
+        "products": stats["total"],
+        "updated": stats["updated"],
+        "http_requests": shop.stats.requests - requests_before,
+        "max_rss_mb": max_rss_mb(),
+        "stages": [stage.to_dict() for stage in stages.values()],
+    }
+
+async def isolated_stages(args: argparse.Namespace, workdir: str) -> List[Dict]:
+    """
+    Each stage on its own over the whole catalog, under tracemalloc, so
+    peak memory can be attributed to a stage. tracemalloc slows Python
+    code down, so throughput here is lower than in the pipeline passes, and
+    it only sees Python allocations (not lxml's, or parser worker processes).
+    """
+    service = build_service(args, workdir)
+    scraper = service.scraper
+    urls = [scraper.page_url(page) for page in range(1, args.pages + 1)]
+    results = []
+
+    async def measure(stage: StageStats, work):
+        with PeakMemory() as memory:
+            start = time.perf_counter()
+            value = await work
+            stage.wall_time = time.perf_counter() - start
+        stage.peak_memory = memory.peak
+        results.append(stage.to_dict())
+        return value
+
+    try:
+        stage = StageStats("scrape")
+        async with scraper.open_session() as session:
+            restore = instrument(scraper, "fetch_response", stage)
+            responses = await measure(stage, asyncio.gather(
+                *(scraper.fetch_response(session, url) for url in urls)
+            ))
+            restore()
+        bodies = [response.body for response in responses]
+
+        stage = StageStats("parse")
+        restore = instrument(scraper.parser, "parse", stage, count=lambda args, result: len(result.products))
+
+        async def parse_all():
+            return await asyncio.gather(*(scraper.parser.parse(body) for body in bodies))
+
+        listings = await measure(stage, parse_all())
+        restore()
+        batches = [
+            [Product(product_title=title, product_price=float(price)) for title, price, _ in listing.products]
+            for listing in listings
+        ]
+
+        for name, method in (("cache_diff", service.diff_against_cache), ("storage", service.storage.upsert_products)):
+            stage = StageStats(name)
+
+            async def run_batches(method=method, stage=stage):
+                for batch in batches:
+                    start = time.perf_counter()
+                    await method(batch)
+                    stage.add(time.perf_counter() - start, len(batch))
+
+            await measure(stage, run_batches())
+    finally:
+        await service.close()
+    return results
+
+def print_table(title: str, rows: List[Dict]) -> None:
+    print(f"\n{title}")
+    print(f"  {'stage':<11}{'calls':>8}{'items':>9}{'items/s':>11}{'p50 ms':>10}{'p99 ms':>10}{'peak MB':>10}")
+    for row in rows:
+        peak = row['peak_memory_mb']
+        print(
+            f"  {row['stage']:<11}{row['calls']:>8}{row['items']:>9}"
+            f"{row['items_per_second'] or 0:>11}{row['p50_ms']:>10}{row['p99_ms']:>10}"
+            f"{peak if peak is not None else '-':>10}"
+        )
+
+async def run_benchmarks(args: argparse.Namespace, workdir: str) -> Dict:
+    config = FixtureConfig(
+        pages=args.pages,
+        products_per_page=args.products_per_page,
+        latency=args.latency,
+        error_rate=args.error_rate,
+        image_size=args.image_size,
+        price_change_rate=args.price_change_rate,
+    )
+    shop, runner, base_url = await start_fixture_server(config)
+    original_base_url = settings.BASE_URL
+    settings.BASE_URL = base_url
+    report = {"config": vars(args), "passes": [], "isolated": []}
+    try:
+        service = build_service(args, os.path.join(workdir, "pipeline"))
+        try:
+            for run in range(args.runs):
+                if run:
+                    shop.bump_generation()
+                label = "cold" if run == 0 else f"incremental-{run}"
+                result = await pipeline_pass(service, shop, label, args.pages)
+                report["passes"].append(result)
+                print(
+                    f"[{label}] {result['seconds']}s, {result['pages_per_second']} pages/s, "
+                    f"{result['products_per_second']} products/s, {result['updated']} updated, "
+                    f"{result['http_requests']} requests, max RSS {result['max_rss_mb']} MB"
+                )
+                print_table(f"Pipeline stages ({label})", result["stages"])
+        finally:
+            await service.close()
+
+        if not args.skip_isolated:
+            report["isolated"] = await isolated_stages(args, os.path.join(workdir, "isolated"))
+            print_table("Isolated stages (tracemalloc)", report["isolated"])
+    finally:
+        settings.BASE_URL = original_base_url
+        await runner.cleanup()
+        shutdown_process_pool()
+    return report
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmark the scraper against a local fixture shop")
+    parser.add_argument('--pages', type=int, default=40)
+    parser.add_argument('--products-per-page', type=int, default=FixtureConfig.products_per_page)
+    parser.add_argument('--latency', type=float, default=0.02, help="mean server latency in seconds")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of responses that are 503s")
+    parser.add_argument('--image-size', type=int, default=FixtureConfig.image_size)
+    parser.add_argument('--price-change-rate', type=float, default=0.05,
+                        help="fraction of prices that change between passes")
+    parser.add_argument('--runs', type=int, default=2, help="first pass is cold, the rest incremental")
+    parser.add_argument('--rate', type=float, default=1000.0, help="per-host request rate limit")
+    parser.add_argument('--burst', type=int, default=100)
+    parser.add_argument('--retry-delay', type=float, default=0.05)
+    parser.add_argument('--storage', choices=sorted(STORAGE_BACKENDS), default=settings.STORAGE_BACKEND)
+    parser.add_argument('--parser', choices=sorted(PARSER_BACKENDS), default=settings.HTML_PARSER_BACKEND)
+    parser.add_argument('--redis-url', default=settings.REDIS_URL,
+                        help="price cache; falls back to memory if unreachable")
+    parser.add_argument('--skip-isolated', action='store_true')
+    parser.add_argument('--workdir', help="keep scratch files here instead of a temp dir")
+    parser.add_argument('--json', dest='json_path', help="also write the report as JSON")
+    parser.add_argument('--log-level', default='WARNING')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    if args.workdir:
+        report = asyncio.run(run_benchmarks(args, args.workdir))
+    else:
+        with tempfile.TemporaryDirectory(prefix="atlys-bench-") as workdir:
+            report = asyncio.run(run_benchmarks(args, workdir))
+
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.json_path}")
+
+if __name__ == "__main__":
+    main()
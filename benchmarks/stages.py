@@ -0,0 +1,87 @@
+# benchmarks/stages.py
+import functools
+import math
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+def percentile(samples: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a list of samples"""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = math.ceil(fraction * len(ordered))
+    return ordered[min(len(ordered), max(1, rank)) - 1]
+
+class StageStats:
+    """Latency samples and item counts for one pipeline stage"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.samples: List[float] = []
+        self.items = 0
+        self.peak_memory: Optional[int] = None  # bytes, from an isolated run
+        self.wall_time: Optional[float] = None  # seconds the stage was measured over
+
+    def add(self, seconds: float, items: int = 1) -> None:
+        self.samples.append(seconds)
+        self.items += items
+
+    def to_dict(self) -> Dict[str, Any]:
+        wall = self.wall_time or sum(self.samples)
+        return {
+            "stage": self.name,
+            "calls": len(self.samples),
+            "items": self.items,
+            "items_per_second": round(self.items / wall, 1) if wall else None,
+            "p50_ms": round(percentile(self.samples, 0.50) * 1000, 3),
+            "p99_ms": round(percentile(self.samples, 0.99) * 1000, 3),
+            "peak_memory_mb": round(self.peak_memory / 2**20, 2) if self.peak_memory is not None else None,
+        }
+
+def instrument(
+    obj: Any,
+    method_name: str,
+    stage: StageStats,
+    count: Callable[[tuple, Any], int] = lambda args, result: 1
+) -> Callable[[], None]:
+    """
+    Time every call of an async method on one instance into `stage`.
+    Returns a function that removes the instrumentation again.
+    """
+    original = getattr(obj, method_name)
+    shadowed = method_name in vars(obj)
+
+    @functools.wraps(original)
+    async def timed(*args, **kwargs):
+        start = time.perf_counter()
+        result = await original(*args, **kwargs)
+        stage.add(time.perf_counter() - start, count(args, result))
+        return result
+
+    setattr(obj, method_name, timed)
+
+    def restore() -> None:
+        if shadowed:
+            setattr(obj, method_name, original)
+        else:
+            delattr(obj, method_name)
+
+    return restore
+
+class PeakMemory:
+    """Context manager measuring peak Python heap growth with tracemalloc"""
+
+    def __enter__(self) -> "PeakMemory":
+        self._was_tracing = tracemalloc.is_tracing()
+        if not self._was_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._baseline = tracemalloc.get_traced_memory()[0]
+        self.peak = 0
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.peak = max(0, tracemalloc.get_traced_memory()[1] - self._baseline)
+        if not self._was_tracing:
+            tracemalloc.stop()
@@ -0,0 +1,27 @@
+# tests/conftest.py
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+@pytest.fixture(autouse=True)
+def storage_dir(tmp_path, monkeypatch):
+    """Run each test in its own directory, so the relative storage paths stay out of the repo"""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.fixture
+def redis_server():
+    """An in-process fake Redis server; set `connected = False` to take it down"""
+    import fakeredis
+    return fakeredis.FakeServer()
+
+@pytest.fixture
+def redis_cache(redis_server):
+    """A RedisCache talking to the fake Redis server"""
+    import fakeredis
+    from app.cache.redis_cache import RedisCache
+    cache = RedisCache()
+    cache.redis_client = fakeredis.FakeAsyncRedis(server=redis_server, decode_responses=True)
+    return cache
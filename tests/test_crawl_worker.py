@@ -0,0 +1,83 @@
+# tests/test_crawl_worker.py
+import asyncio
+from contextlib import asynccontextmanager
+import json
+from app.schemas.product import Product
+from app.services.crawl_worker import CrawlWorker
+from app.services.sources import ScraperRegistry
+from app.services.work_queue import RedisWorkQueue
+
+class BrokenImageStore:
+    async def flush(self):
+        raise OSError("disk full")
+
+class StubScraper:
+    """Serves one product per page; pages named in `broken` fail mid-crawl"""
+
+    def __init__(self, name, base_url, broken=()):
+        self.name = name
+        self.base_url = base_url
+        self.broken = set(broken)
+        self.image_store = BrokenImageStore()
+        self.crawled = []
+
+    @asynccontextmanager
+    async def open_session(self):
+        yield None
+
+    async def download_image(self, session, image_url, product_title):
+        return ""
+
+    async def iter_page(self, session, url, image_pool, progress):
+        self.crawled.append(url)
+        yield Product(product_title=f"{self.name} {url}", product_price=1.0)
+        if url in self.broken:
+            raise OSError("checkpoint write failed")
+
+async def run_until_reported(worker, queue, run_id, count):
+    running = asyncio.create_task(worker.run())
+    key = queue._results_key(run_id)
+    while await queue.client.llen(key) < count:
+        assert not running.done(), running
+        await asyncio.sleep(0.05)
+    worker.stop()
+    await asyncio.wait_for(running, timeout=5)
+    return [json.loads(item) for item in await queue.client.lrange(key, 0, -1)]
+
+def test_worker_dispatches_pages_to_their_source(redis_cache):
+    async def scenario():
+        shop = StubScraper("shop", "https://shop.example/")
+        other = StubScraper("other", "https://other.example/")
+        queue = RedisWorkQueue(redis_cache)
+        worker = CrawlWorker(ScraperRegistry([shop, other]), queue, concurrency=2)
+        await queue.enqueue("run", ["https://shop.example/page/1/", "https://other.example/page/1/", "https://unknown.example/"])
+
+        results = {result["url"]: result for result in await run_until_reported(worker, queue, "run", 3)}
+        assert shop.crawled == ["https://shop.example/page/1/"]
+        assert other.crawled == ["https://other.example/page/1/"]
+        assert results["https://other.example/page/1/"]["products"][0]["product_title"] == "other https://other.example/page/1/"
+        assert results["https://unknown.example/"]["status"] == "failed"
+        assert worker.pages_done == 2
+
+    asyncio.run(scenario())
+
+def test_failing_and_malformed_tasks_do_not_stop_the_worker(redis_cache):
+    async def scenario():
+        shop = StubScraper("shop", "https://shop.example/", broken={"https://shop.example/bad/"})
+        queue = RedisWorkQueue(redis_cache, max_attempts=2)
+        worker = CrawlWorker(ScraperRegistry([shop]), queue, concurrency=1)
+        await queue.client.rpush(queue.PENDING, "not json", json.dumps({"url": "no run"}))
+        await queue.enqueue("run", ["https://shop.example/bad/", "https://shop.example/good/"])
+
+        results = {result["url"]: result for result in await run_until_reported(worker, queue, "run", 2)}
+        # The broken page was retried, then reported with what it produced
+        assert shop.crawled.count("https://shop.example/bad/") == 2
+        assert results["https://shop.example/bad/"]["status"] == "failed"
+        assert len(results["https://shop.example/bad/"]["products"]) == 1
+        assert results["https://shop.example/good/"]["status"] == "done"
+        # Malformed tasks are dropped rather than left leased
+        assert await queue.client.llen(queue.PENDING) == 0
+        assert await queue.client.llen(queue.PROCESSING) == 0
+        assert await queue.client.hlen(queue.LEASES) == 0
+
+    asyncio.run(scenario())
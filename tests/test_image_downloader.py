@@ -0,0 +1,49 @@
+# tests/test_image_downloader.py
+import asyncio
+from app.services.image_downloader import ImageDownloadPool
+
+def test_worker_survives_a_job_cancelled_mid_download():
+    async def scenario():
+        started = asyncio.Event()
+        release = asyncio.Event()
+
+        async def download(session, image_url, product_title):
+            if image_url == "slow":
+                started.set()
+                await release.wait()
+            return f"images/{product_title}.jpg"
+
+        async with ImageDownloadPool(download, concurrency=1) as pool:
+            cancelled = await pool.submit(None, "slow", "a")
+            await started.wait()
+            cancelled.cancel()
+            release.set()
+
+            later = await pool.submit(None, "fast", "b")
+            assert await asyncio.wait_for(later, timeout=1) == "images/b.jpg"
+
+    asyncio.run(scenario())
+
+def test_failed_download_resolves_to_empty_path():
+    async def scenario():
+        async def download(session, image_url, product_title):
+            raise OSError("disk full")
+
+        async with ImageDownloadPool(download, concurrency=2) as pool:
+            future = await pool.submit(None, "url", "a")
+            assert await asyncio.wait_for(future, timeout=1) == ""
+
+    asyncio.run(scenario())
+
+def test_close_cancels_queued_jobs():
+    async def scenario():
+        async def download(session, image_url, product_title):
+            await asyncio.sleep(10)
+
+        pool = ImageDownloadPool(download, concurrency=1)
+        futures = [await pool.submit(None, "url", str(i)) for i in range(3)]
+        await asyncio.sleep(0)
+        await pool.close()
+        assert all(future.cancelled() for future in futures)
+
+    asyncio.run(scenario())
@@ -0,0 +1,161 @@
+# tests/test_notifier.py
+import asyncio
+from email import message_from_bytes
+import time
+from app.cache.tiered_cache import TieredPriceCache
+from app.schemas.product import Product
+from app.services.notifier import EmailNotifier, NotificationDispatcher, NotificationStrategy
+from app.services.scraper import ScraperStrategy
+from app.services.scraping_service import ScrapingService
+
+class SmtpSink:
+    """
+    A local SMTP server that keeps what it receives.
+    `delay` slows down every accepted message; `drop` hangs up after each one.
+    """
+
+    def __init__(self, delay: float = 0.0, drop: bool = False):
+        self.delay = delay
+        self.drop = drop
+        self.connections = 0
+        self.messages = []
+        self.port = None
+        self._server = None
+
+    async def _session(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        writer.write(b"220 sink ESMTP\r\n")
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                command = line.decode().strip().upper()
+                if command.startswith(("EHLO", "HELO")):
+                    writer.write(b"250 sink\r\n")
+                elif command == "DATA":
+                    writer.write(b"354 go ahead\r\n")
+                    await writer.drain()
+                    data = b""
+                    while not data.endswith(b"\r\n.\r\n"):
+                        data += await reader.readline()
+                    await asyncio.sleep(self.delay)
+                    self.messages.append(message_from_bytes(data[:-5]))
+                    writer.write(b"250 queued\r\n")
+                    if self.drop:
+                        await writer.drain()
+                        return
+                elif command == "QUIT":
+                    writer.write(b"221 bye\r\n")
+                    await writer.drain()
+                    return
+                else:
+                    writer.write(b"250 ok\r\n")
+                await writer.drain()
+        finally:
+            writer.close()
+
+    async def __aenter__(self) -> "SmtpSink":
+        self._server = await asyncio.start_server(self._session, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self._server.close()
+
+    def notifier(self) -> EmailNotifier:
+        return EmailNotifier(smtp_server="127.0.0.1", port=self.port, password="", timeout=5)
+
+    async def wait_for(self, count: int) -> None:
+        while len(self.messages) < count:
+            await asyncio.sleep(0.01)
+
+def test_burst_is_sent_as_one_digest():
+    async def scenario():
+        async with SmtpSink() as sink:
+            dispatcher = NotificationDispatcher(sink.notifier(), coalesce_seconds=0.2, idle_timeout=60)
+            for message in ["Scrape done", "Price drop", "Scrape done", "Scrape done"]:
+                await dispatcher.notify(message)
+            await dispatcher.close()
+
+            assert len(sink.messages) == 1
+            digest = sink.messages[0]
+            assert digest["Subject"] == "Scraping Notification (2 updates)"
+            assert "Scrape done (x3)" in digest.get_payload()
+            assert "Price drop" in digest.get_payload()
+            assert dispatcher.sent == 4 and dispatcher.failed == 0
+
+    asyncio.run(scenario())
+
+def test_later_batches_reuse_the_connection():
+    async def scenario():
+        async with SmtpSink() as sink:
+            dispatcher = NotificationDispatcher(sink.notifier(), coalesce_seconds=0.01, idle_timeout=60)
+            for count in range(1, 4):
+                await dispatcher.notify(f"message {count}")
+                await asyncio.wait_for(sink.wait_for(count), 5)
+            await dispatcher.close()
+            assert sink.connections == 1
+            assert [message.get_payload() for message in sink.messages] == ["message 1", "message 2", "message 3"]
+
+    asyncio.run(scenario())
+
+def test_reconnects_after_the_server_hangs_up():
+    async def scenario():
+        async with SmtpSink(drop=True) as sink:
+            dispatcher = NotificationDispatcher(sink.notifier(), coalesce_seconds=0.01, idle_timeout=60, attempts=1)
+            for count in range(1, 3):
+                await dispatcher.notify(f"message {count}")
+                await asyncio.wait_for(sink.wait_for(count), 5)
+                # Let the client see the hang-up, as an idle connection would
+                await asyncio.sleep(0.05)
+            await dispatcher.close()
+            assert sink.connections == 2
+            assert dispatcher.sent == 2 and dispatcher.failed == 0
+
+    asyncio.run(scenario())
+
+def test_idle_connection_is_closed():
+    async def scenario():
+        async with SmtpSink() as sink:
+            notifier = sink.notifier()
+            dispatcher = NotificationDispatcher(notifier, coalesce_seconds=0.01, idle_timeout=0.1)
+            await dispatcher.notify("message")
+            await asyncio.wait_for(sink.wait_for(1), 5)
+            await asyncio.sleep(0.3)
+            assert notifier._smtp is None
+            await dispatcher.close()
+
+    asyncio.run(scenario())
+
+class OneBatchScraper(ScraperStrategy):
+    async def stream_batches(self, page_limit=None, proxy=None, progress=None, resume=True):
+        yield [Product(product_title="Forceps", product_price=100.0)]
+
+class SilentNotifier(NotificationStrategy):
+    async def notify(self, message: str) -> None:
+        pass
+
+def test_scrape_does_not_wait_for_mail_delivery(redis_cache):
+    async def scenario():
+        async with SmtpSink(delay=1.0) as sink:
+            dispatcher = NotificationDispatcher(sink.notifier(), coalesce_seconds=0.01)
+            service = ScrapingService(
+                scraper=OneBatchScraper(),
+                conoleNotifier=SilentNotifier(),
+                emailNotifier=dispatcher,
+                cache=TieredPriceCache(redis_cache)
+            )
+            start = time.monotonic()
+            stats = await service.run_scraping()
+            elapsed = time.monotonic() - start
+            assert stats["total"] == 1
+            assert elapsed < 0.5
+            assert sink.messages == []
+
+            # Shutdown still delivers what was queued
+            await service.close()
+            assert len(sink.messages) == 1
+            assert dispatcher.sent == 1
+
+    asyncio.run(scenario())
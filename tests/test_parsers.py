@@ -0,0 +1,57 @@
+# tests/test_parsers.py
+import pytest
+from benchmarks.fixture_server import FixtureConfig, FixtureShop
+from app.services.parsers import LxmlParser, SoupParser
+
+def product(title="Forceps", price_box=None, image='<img data-lazy-src="https://shop/a.jpg" src="x.svg">'):
+    if price_box is None:
+        price_box = '<span class="woocommerce-Price-amount amount"><bdi>₹1,250.00</bdi></span>'
+    return (
+        '<li class="product type-product">'
+        f'<div class="mf-product-thumbnail">{image}</div>'
+        f'<h2 class="woo-loop-product__title"><a href="#"> {title} </a></h2>'
+        f'<div class="mf-product-price-box">{price_box}</div>'
+        '</li>'
+    )
+
+def listing(*items, pagination=""):
+    return f'<html><body><ul class="products">{"".join(items)}</ul>{pagination}</body></html>'
+
+EDGE_CASES = {
+    "empty": "",
+    "whitespace": " \n\t ",
+    "comment only": "<!-- maintenance -->",
+    "plain text": "Service Unavailable",
+    "xml declaration": '<?xml version="1.0" encoding="utf-8"?>' + listing(product("Mirror ñ")),
+    "xml declaration only": '<?xml version="1.0" encoding="utf-8"?>',
+    "fragment": product(),
+    "sale price": listing(product(price_box=(
+        '<del><span class="woocommerce-Price-amount"><bdi>₹2,000.00</bdi></span></del>'
+        '<ins><span class="woocommerce-Price-amount"><bdi>₹1,500.00</bdi></span></ins>'
+    ))),
+    "missing amount": listing(product(price_box='<span class="woocommerce-Price-amount"></span>')),
+    "bad price": listing(product(price_box='<span class="woocommerce-Price-amount"><bdi>Call us</bdi></span>'), product("Probe")),
+    "placeholder image": listing(product(image='<img src="data:image/svg+xml">')),
+    "src only": listing(product(image='<img src="https://shop/b.jpg">')),
+    "no image": listing(product(image="")),
+    "no title link": listing('<li class="product"><h2 class="woo-loop-product__title">Bur</h2></li>'),
+    "class token lookalikes": listing(product().replace('class="product type-product"', 'class="products-grid"')),
+    "pagination": listing(product(), pagination=(
+        '<ul class="page-numbers"><li><a class="page-numbers">1</a></li><li><a class="page-numbers">…</a></li>'
+        '<li><a class="page-numbers">12</a></li><li><a class="next page-numbers">99</a></li></ul>'
+    )),
+    "pagination without links": listing(product(), pagination='<ul class="page-numbers"></ul>'),
+}
+
+@pytest.mark.parametrize("html", EDGE_CASES.values(), ids=EDGE_CASES.keys())
+def test_lxml_matches_html_parser_on_edge_cases(html):
+    assert LxmlParser().parse(html) == SoupParser().parse(html)
+
+def test_lxml_matches_html_parser_on_fixture_pages():
+    shop = FixtureShop(FixtureConfig(pages=5, products_per_page=12, filler_bytes=300, price_change_rate=0.5))
+    shop.bump_generation()
+    for page in range(1, 6):
+        html = shop.listing_html(page, "http://shop.test/")
+        expected = SoupParser().parse(html)
+        assert len(expected.products) == 12
+        assert LxmlParser().parse(html) == expected
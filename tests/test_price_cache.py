@@ -0,0 +1,119 @@
+# tests/test_price_cache.py
+import asyncio
+import pytest
+from app.cache.redis_cache import RedisCache
+from app.cache.tiered_cache import TieredPriceCache
+
+@pytest.fixture
+def round_trips(redis_cache, monkeypatch):
+    """Counts MGETs and pipeline executions, with batches of 2 keys"""
+    counts = {"mget": 0, "pipeline": 0}
+    chunks = RedisCache._chunks
+    monkeypatch.setattr(RedisCache, "_chunks", staticmethod(lambda items: chunks(items, 2)))
+
+    client = redis_cache.redis_client
+    mget = client.mget
+
+    async def counting_mget(*args, **kwargs):
+        counts["mget"] += 1
+        return await mget(*args, **kwargs)
+
+    pipeline = client.pipeline
+
+    def counting_pipeline(*args, **kwargs):
+        pipe = pipeline(*args, **kwargs)
+        execute = pipe.execute
+
+        async def counting_execute(*execute_args, **execute_kwargs):
+            counts["pipeline"] += 1
+            return await execute(*execute_args, **execute_kwargs)
+
+        pipe.execute = counting_execute
+        return pipe
+
+    monkeypatch.setattr(client, "mget", counting_mget)
+    monkeypatch.setattr(client, "pipeline", counting_pipeline)
+    return counts
+
+def test_bulk_prices_round_trip_in_batches(redis_cache, round_trips):
+    async def scenario():
+        await redis_cache.set_prices({"a": 1, "b": 2.5, "c": 3, "d": 4, "e": 5}, ttl=120)
+        assert round_trips["pipeline"] == 3
+
+        prices = await redis_cache.get_prices(["a", "b", "missing", "a", "e"])
+        assert prices == {"a": 1.0, "b": 2.5, "missing": None, "e": 5.0}
+        # Duplicates are only fetched once: a, b, missing, e
+        assert round_trips["mget"] == 2
+
+        assert 0 < await redis_cache.redis_client.ttl(redis_cache._key("a")) <= 120
+        assert await redis_cache.get_product_price("c") == 3.0
+
+    asyncio.run(scenario())
+
+def test_single_price_helpers_use_the_default_ttl(redis_cache):
+    async def scenario():
+        await redis_cache.set_product_price("a", 9.99)
+        assert await redis_cache.get_product_price("a") == 9.99
+        assert await redis_cache.redis_client.ttl(redis_cache._key("a")) > 0
+
+    asyncio.run(scenario())
+
+def test_redis_outage_is_hidden_by_the_bulk_helpers(redis_cache, redis_server):
+    async def scenario():
+        redis_server.connected = False
+        await redis_cache.set_prices({"a": 1.0})
+        assert await redis_cache.get_prices(["a", "b"]) == {"a": None, "b": None}
+        assert await redis_cache.ensure_connection() is False
+
+    asyncio.run(scenario())
+
+def test_tiered_cache_reads_through_and_serves_memory_hits(redis_cache, round_trips):
+    async def scenario():
+        await redis_cache.set_prices({"a": 1.0, "b": 2.0})
+        cache = TieredPriceCache(redis_cache)
+        assert await cache.get_prices(["a", "b", "c"]) == {"a": 1.0, "b": 2.0, "c": None}
+        fetched = round_trips["mget"]
+
+        assert await cache.get_prices(["a", "b"]) == {"a": 1.0, "b": 2.0}
+        assert round_trips["mget"] == fetched
+
+        await cache.set_prices({"c": 3.0}, ttl=60)
+        assert await redis_cache.get_product_price("c") == 3.0
+        assert 0 < await redis_cache.redis_client.ttl(redis_cache._key("c")) <= 60
+
+    asyncio.run(scenario())
+
+def test_tiered_cache_falls_back_to_memory_and_writes_behind(redis_cache, redis_server):
+    async def scenario():
+        # Memory entries expire at once, so every read goes to Redis
+        cache = TieredPriceCache(redis_cache, ttl=-1, retry_interval=0)
+        await cache.set_prices({"a": 1.0})
+
+        redis_server.connected = False
+        # The expired entry beats treating the product as new
+        assert await cache.get_prices(["a", "b"]) == {"a": 1.0, "b": None}
+        await cache.set_prices({"a": 2.0, "b": 3.0})
+        assert cache.stats()["pending_writes"] == 2
+        assert cache.stats()["redis_errors"] >= 1
+
+        redis_server.connected = True
+        await cache.flush()
+        assert cache.stats()["pending_writes"] == 0
+        assert await redis_cache.get_prices(["a", "b"]) == {"a": 2.0, "b": 3.0}
+
+    asyncio.run(scenario())
+
+def test_tiered_cache_waits_before_retrying_redis(redis_cache, redis_server):
+    async def scenario():
+        cache = TieredPriceCache(redis_cache, retry_interval=60)
+        redis_server.connected = False
+        await cache.get_prices(["a"])
+        assert not cache.redis_available
+
+        redis_server.connected = True
+        await redis_cache.set_prices({"a": 1.0})
+        # Still inside the retry interval, so Redis isn't asked
+        assert await cache.get_prices(["a"]) == {"a": None}
+        assert cache.stats()["redis_errors"] == 1
+
+    asyncio.run(scenario())
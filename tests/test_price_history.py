@@ -0,0 +1,65 @@
+# tests/test_price_history.py
+import asyncio
+import os
+import pytest
+from app.services.price_history import PriceHistoryStore
+
+def test_history_survives_a_restart():
+    async def scenario():
+        store = PriceHistoryStore("history")
+        assert await store.record_prices({"a": 1.0, "b": 2.0}, timestamp=1) == 2
+        assert await store.record_prices({"a": 1.0, "b": 3.0}, timestamp=2) == 1
+
+        reloaded = PriceHistoryStore("history")
+        assert await reloaded.get_history("a") == [(1, 1.0)]
+        assert await reloaded.get_history("b") == [(1, 2.0), (2, 3.0)]
+        assert [change["product_title"] for change in await reloaded.changed_since(1)] == ["b"]
+
+    asyncio.run(scenario())
+
+@pytest.mark.parametrize("titles_written", [False, True])
+def test_failed_append_does_not_misattribute_later_records(monkeypatch, titles_written):
+    async def scenario():
+        store = PriceHistoryStore("history")
+        await store.record_prices({"a": 1.0}, timestamp=1)
+
+        append = store._append
+
+        def failing_append(new_titles, records):
+            if titles_written:
+                # The titles land, then the disk fills up
+                append(new_titles, [])
+            raise OSError("No space left on device")
+
+        monkeypatch.setattr(store, "_append", failing_append)
+        with pytest.raises(OSError):
+            await store.record_prices({"b": 2.0, "c": 3.0}, timestamp=2)
+        monkeypatch.setattr(store, "_append", append)
+
+        await store.record_prices({"c": 4.0, "d": 5.0, "a": 6.0}, timestamp=3)
+        for history in (store, PriceHistoryStore("history")):
+            assert await history.get_history("a") == [(1, 1.0), (3, 6.0)]
+            assert await history.get_history("b") is None
+            assert await history.get_history("c") == [(3, 4.0)]
+            assert await history.get_history("d") == [(3, 5.0)]
+
+    asyncio.run(scenario())
+
+def test_torn_titles_line_is_truncated_with_its_records():
+    async def scenario():
+        store = PriceHistoryStore("history")
+        await store.record_prices({"a": 1.0, "b": 2.0}, timestamp=1)
+        titles_path = os.path.join("history", "titles.jsonl")
+        with open(titles_path, 'rb') as f:
+            data = f.read()
+        with open(titles_path, 'wb') as f:
+            f.write(data[:-3])
+
+        reloaded = PriceHistoryStore("history")
+        assert await reloaded.get_history("b") is None
+        await reloaded.record_prices({"c": 3.0}, timestamp=2)
+        again = PriceHistoryStore("history")
+        assert await again.get_history("a") == [(1, 1.0)]
+        assert await again.get_history("c") == [(2, 3.0)]
+
+    asyncio.run(scenario())
@@ -0,0 +1,83 @@
+# tests/test_search_index.py
+import heapq
+import math
+import random
+from app.schemas.product import Product
+from app.services.search_index import ProductSearchIndex, tie_order, tokenize
+
+WORDS = [
+    "nitrile", "latex", "gloves", "mask", "forceps", "composite", "resin", "bur",
+    "diamond", "carbide", "mirror", "probe", "scaler", "curette", "impression",
+    "alginate", "bond", "etch", "cement", "glass", "ionomer", "crown", "matrix",
+]
+
+def brute_force(index: ProductSearchIndex, query, min_price=None, max_price=None, limit=20, fuzzy=True):
+    """Scores every matching title, as the index did before pruning"""
+    total = len(index._products)
+    scores = {}
+    for token in dict.fromkeys(tokenize(query)):
+        best = {}
+        for match, weight in index._expand(token, fuzzy).items():
+            postings = index._postings[match]
+            score = weight * math.log(1 + total / len(postings))
+            for title in postings:
+                if score > best.get(title, 0.0):
+                    best[title] = score
+        for title, score in best.items():
+            scores[title] = scores.get(title, 0.0) + score
+    results = []
+    for title, score in scores.items():
+        price = index._products[title].product_price
+        if (min_price is None or price >= min_price) and (max_price is None or price <= max_price):
+            results.append((score, title))
+    top = heapq.nsmallest(limit, results, key=lambda item: (-item[0], *tie_order(item[1])))
+    return [(title, round(score, 4)) for score, title in top]
+
+def random_catalog(rng: random.Random, size: int):
+    titles = set()
+    while len(titles) < size:
+        words = rng.sample(WORDS, rng.randint(1, 4))
+        titles.add(" ".join(words) + f" {rng.randint(1, 20)}")
+    return [Product(product_title=title, product_price=rng.randint(1, 500)) for title in titles]
+
+def random_query(rng: random.Random) -> str:
+    words = rng.sample(WORDS, rng.randint(1, 4))
+    # Prefixes and typos exercise the prefix and fuzzy expansions
+    return " ".join(
+        word[:rng.randint(2, len(word))] if rng.random() < 0.2
+        else word.replace(word[1], "x", 1) if rng.random() < 0.1
+        else word
+        for word in words
+    )
+
+def test_search_matches_brute_force_scorer():
+    rng = random.Random(1729)
+    for _ in range(20):
+        index = ProductSearchIndex()
+        index.update(random_catalog(rng, rng.randint(20, 300)))
+        for _ in range(64):
+            query = random_query(rng)
+            limit = rng.choice([1, 3, 5, 20])
+            prices = rng.choice([(None, None), (50, None), (None, 200), (100, 300)])
+            found = [
+                (product.product_title, score)
+                for product, score in index.search(query, *prices, limit=limit)
+            ]
+            assert found == brute_force(index, query, *prices, limit=limit), query
+
+def test_equal_scores_rank_shorter_titles_first():
+    index = ProductSearchIndex()
+    index.update([
+        Product(product_title="nitrile forceps 13", product_price=1),
+        Product(product_title="nitrile forceps mask latex 2", product_price=1),
+        Product(product_title="nitrile forceps 2", product_price=1),
+    ])
+    titles = [product.product_title for product, _ in index.search("nitrile forceps", limit=2)]
+    assert titles == ["nitrile forceps 2", "nitrile forceps 13"]
+
+def test_removed_products_are_not_found():
+    index = ProductSearchIndex()
+    index.update([Product(product_title="diamond bur", product_price=5)])
+    index.remove("diamond bur")
+    assert index.search("diamond") == []
+    assert len(index) == 0
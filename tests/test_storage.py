@@ -0,0 +1,37 @@
+# tests/test_storage.py
+import asyncio
+import pytest
+from app.schemas.product import Product
+from app.services.storage import JsonFileStorage, SqliteStorage
+
+TITLES = [
+    "Élévateur Dentaire", "élévateur droit", "ÉLÉVATEUR courbe", "Straumann Ästhetik",
+    "ÄSTHETIK Kit", "Zahnbürste Größe M", "ZAHNBÜRSTE GRÖSSE L", "Ручка зеркала",
+    "РУЧКА ЗЕРКАЛА XL", "50% off_bur", "500 off bur", "Forceps\\Upper",
+]
+QUERIES = ["élé", "ÉLÉVATEUR", "ästhetik", "bürste", "größe", "ручка", "50%", "off_", "f\\u", "XL", "zz"]
+
+async def query_all(storage, **filters):
+    return [product.product_title for product in await storage.query_products(**filters)]
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_backends_agree_on_title_filters(query):
+    async def scenario():
+        products = [Product(product_title=title, product_price=10.0 + i) for i, title in enumerate(TITLES)]
+        json_storage = JsonFileStorage("products.json")
+        sqlite_storage = SqliteStorage("products.db")
+        try:
+            await json_storage.save_products(products)
+            await sqlite_storage.save_products(products)
+            expected = sorted(title for title in TITLES if query.lower() in title.lower())
+            assert await query_all(json_storage, title=query) == expected
+            assert await query_all(sqlite_storage, title=query) == expected
+            assert (
+                await query_all(json_storage, title=query, min_price=12, limit=2)
+                == await query_all(sqlite_storage, title=query, min_price=12, limit=2)
+            )
+        finally:
+            await json_storage.close()
+            await sqlite_storage.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,142 @@
+# tests/test_work_queue.py
+import asyncio
+import json
+import time
+import pytest
+from app.services.work_queue import RedisWorkQueue, WorkQueueTimeout
+
+def test_lease_ack_publishes_result(redis_cache):
+    async def scenario():
+        queue = RedisWorkQueue(redis_cache, lease_seconds=60)
+        await queue.enqueue("run", ["https://shop/page/1/"])
+        task = await queue.lease(timeout=0.1)
+        assert queue.parse(task) == ("run", "https://shop/page/1/")
+        assert await queue.client.lrange(queue.PROCESSING, 0, -1) == [task]
+        assert float(await queue.client.hget(queue.LEASES, task)) > time.time()
+
+        await queue.ack(task, [{"product_title": "a"}])
+        assert await queue.client.llen(queue.PROCESSING) == 0
+        assert await queue.client.hget(queue.LEASES, task) is None
+        result = json.loads(await queue.client.lpop(queue._results_key("run")))
+        assert result == {"url": "https://shop/page/1/", "status": "done", "products": [{"product_title": "a"}]}
+
+    asyncio.run(scenario())
+
+def test_lease_returns_none_when_empty(redis_cache):
+    async def scenario():
+        assert await RedisWorkQueue(redis_cache).lease(timeout=0.1) is None
+
+    asyncio.run(scenario())
+
+def test_extend_pushes_the_deadline(redis_cache):
+    async def scenario():
+        queue = RedisWorkQueue(redis_cache, lease_seconds=60)
+        await queue.enqueue("run", ["u"])
+        task = await queue.lease(timeout=0.1)
+        await queue.client.hset(queue.LEASES, task, time.time() - 1)
+        await queue.extend(task)
+        assert float(await queue.client.hget(queue.LEASES, task)) > time.time() + 30
+        assert await queue.reap_expired() == 0
+
+    asyncio.run(scenario())
+
+def test_nack_requeues_until_max_attempts(redis_cache):
+    async def scenario():
+        queue = RedisWorkQueue(redis_cache, max_attempts=2)
+        await queue.enqueue("run", ["u"])
+        task = await queue.lease(timeout=0.1)
+        assert await queue.nack(task) is True
+        assert await queue.client.lrange(queue.PENDING, 0, -1) == [task]
+
+        task = await queue.lease(timeout=0.1)
+        assert await queue.nack(task, [{"product_title": "a"}]) is False
+        assert await queue.client.llen(queue.PENDING) == 0
+        assert await queue.client.llen(queue.PROCESSING) == 0
+        result = json.loads(await queue.client.lpop(queue._results_key("run")))
+        assert result["status"] == "failed"
+        assert result["products"] == [{"product_title": "a"}]
+
+    asyncio.run(scenario())
+
+def test_expired_leases_count_as_attempts(redis_cache):
+    async def scenario():
+        queue = RedisWorkQueue(redis_cache, lease_seconds=60, max_attempts=3)
+        await queue.enqueue("run", ["u"])
+        for attempt in range(1, 3):
+            task = await queue.lease(timeout=0.1)
+            await queue.client.hset(queue.LEASES, task, time.time() - 1)
+            assert await queue.reap_expired() == 1
+            assert await queue.client.lrange(queue.PENDING, 0, -1) == [task]
+            assert int(await queue.client.hget(queue._attempts_key("run"), task)) == attempt
+
+        # The third expiry gives up on the page
+        task = await queue.lease(timeout=0.1)
+        await queue.client.hset(queue.LEASES, task, time.time() - 1)
+        assert await queue.reap_expired() == 0
+        assert await queue.client.llen(queue.PENDING) == 0
+        assert await queue.client.llen(queue.PROCESSING) == 0
+        result = json.loads(await queue.client.lpop(queue._results_key("run")))
+        assert result == {"url": "u", "status": "failed", "products": []}
+
+    asyncio.run(scenario())
+
+def test_reaper_leaves_live_and_unstamped_leases(redis_cache):
+    async def scenario():
+        queue = RedisWorkQueue(redis_cache, lease_seconds=60)
+        await queue.enqueue("run", ["a", "b"])
+        await queue.lease(timeout=0.1)
+        # A task moved to processing but not stamped yet
+        unstamped = await queue.client.lmove(queue.PENDING, queue.PROCESSING, "LEFT", "RIGHT")
+        assert await queue.reap_expired() == 0
+        assert await queue.client.llen(queue.PROCESSING) == 2
+        assert await queue.client.hget(queue.LEASES, unstamped) is not None
+
+    asyncio.run(scenario())
+
+def test_reaper_drops_malformed_tasks(redis_cache):
+    async def scenario():
+        queue = RedisWorkQueue(redis_cache)
+        await queue.client.rpush(queue.PROCESSING, "not json")
+        await queue.client.hset(queue.LEASES, "not json", time.time() - 1)
+        assert await queue.reap_expired() == 0
+        assert await queue.client.llen(queue.PROCESSING) == 0
+        assert await queue.client.hlen(queue.LEASES) == 0
+
+    asyncio.run(scenario())
+
+def test_results_count_each_page_once_and_clean_up(redis_cache):
+    async def scenario():
+        queue = RedisWorkQueue(redis_cache)
+        await queue.enqueue("run", ["a", "b"])
+        task = await queue.lease(timeout=0.1)
+        await queue.ack(task, [])
+        # A late ack after a requeue delivers the page a second time
+        await queue.ack(task, [])
+        await queue.ack(await queue.lease(timeout=0.1), [])
+        urls = [result["url"] async for result in queue.results("run", total=2, idle_timeout=1)]
+        assert urls == ["a", "a", "b"]
+        assert not await queue.client.exists(queue._results_key("run"), queue._attempts_key("run"))
+
+    asyncio.run(scenario())
+
+def test_results_give_up_without_progress(redis_cache):
+    async def scenario():
+        queue = RedisWorkQueue(redis_cache)
+        with pytest.raises(WorkQueueTimeout):
+            async for _ in queue.results("run", total=1, idle_timeout=0):
+                pass
+
+    asyncio.run(scenario())
+
+def test_cancel_drops_only_the_runs_pending_tasks(redis_cache):
+    async def scenario():
+        queue = RedisWorkQueue(redis_cache)
+        await queue.enqueue("run", ["a", "b", "c"])
+        await queue.enqueue("other", ["a"])
+        leased = await queue.lease(timeout=0.1)
+        await queue.cancel("run", ["a", "b", "c"])
+        pending = [queue.parse(task) for task in await queue.client.lrange(queue.PENDING, 0, -1)]
+        assert pending == [("other", "a")]
+        assert await queue.client.lrange(queue.PROCESSING, 0, -1) == [leased]
+
+    asyncio.run(scenario())